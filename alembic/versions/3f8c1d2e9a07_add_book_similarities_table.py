@@ -0,0 +1,36 @@
+"""add book similarities table
+
+Revision ID: 3f8c1d2e9a07
+Revises: 7b3e9a41c2d5
+Create Date: 2026-10-19 11:48:37.204115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8c1d2e9a07'
+down_revision: Union[str, Sequence[str], None] = '7b3e9a41c2d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('book_similarities',
+    sa.Column('book_uid', sa.UUID(), nullable=False),
+    sa.Column('similar', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('computed_at', postgresql.TIMESTAMP(), nullable=False),
+    sa.ForeignKeyConstraint(['book_uid'], ['books.uid'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('book_uid')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('book_similarities')
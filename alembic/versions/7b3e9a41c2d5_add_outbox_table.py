@@ -0,0 +1,46 @@
+"""add outbox table
+
+Revision ID: 7b3e9a41c2d5
+Revises: ddc6b4cc6417
+Create Date: 2026-10-19 11:02:14.512880
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '7b3e9a41c2d5'
+down_revision: Union[str, Sequence[str], None] = 'ddc6b4cc6417'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('outbox',
+    sa.Column('uid', sa.UUID(), nullable=False),
+    sa.Column('task_name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('dedup_key', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('status', sa.VARCHAR(), server_default='pending', nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('available_at', postgresql.TIMESTAMP(), nullable=False),
+    sa.Column('created_at', postgresql.TIMESTAMP(), nullable=True),
+    sa.Column('dispatched_at', postgresql.TIMESTAMP(), nullable=True),
+    sa.PrimaryKeyConstraint('uid'),
+    sa.UniqueConstraint('dedup_key')
+    )
+    # The dispatcher only ever looks at pending rows that are due
+    op.create_index('ix_outbox_pending_available_at', 'outbox', ['available_at'], unique=False, postgresql_where=sa.text("status = 'pending'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outbox_pending_available_at', table_name='outbox', postgresql_where=sa.text("status = 'pending'"))
+    op.drop_table('outbox')
@@ -0,0 +1,64 @@
+"""add book filter indexes and facets
+
+Revision ID: 9d4e6b1a7c38
+Revises: 3f8c1d2e9a07
+Create Date: 2026-10-19 12:31:05.918442
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4e6b1a7c38'
+down_revision: Union[str, Sequence[str], None] = '3f8c1d2e9a07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_books_created_at', 'books', ['created_at'], unique=False)
+    op.create_index('ix_books_language_created_at', 'books', ['language', 'created_at'], unique=False)
+    op.create_index('ix_books_publisher_created_at', 'books', ['publisher', 'created_at'], unique=False)
+    op.create_index('ix_books_author_created_at', 'books', ['author', 'created_at'], unique=False)
+    op.create_index('ix_books_published_date', 'books', ['published_date'], unique=False)
+    op.create_index('ix_books_page_count', 'books', ['page_count'], unique=False)
+
+    op.create_table('book_facets',
+    sa.Column('facet', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('value', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('book_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('facet', 'value')
+    )
+
+    # Backfill from existing books (same buckets as books/facets.py)
+    op.execute("""
+        INSERT INTO book_facets (facet, value, book_count)
+        SELECT facet, value, count(*) FROM (
+            SELECT 'language' AS facet, language AS value FROM books
+            UNION ALL SELECT 'publisher', publisher FROM books
+            UNION ALL SELECT 'author', author FROM books
+            UNION ALL SELECT 'published_decade', (extract(year FROM published_date)::int / 10 * 10)::text || 's' FROM books
+            UNION ALL SELECT 'page_range', CASE
+                WHEN page_count >= 500 THEN '500+'
+                WHEN page_count >= 300 THEN '300-499'
+                WHEN page_count >= 100 THEN '100-299'
+                ELSE '<100' END FROM books
+        ) AS facet_values
+        GROUP BY facet, value
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('book_facets')
+    op.drop_index('ix_books_page_count', table_name='books')
+    op.drop_index('ix_books_published_date', table_name='books')
+    op.drop_index('ix_books_author_created_at', table_name='books')
+    op.drop_index('ix_books_publisher_created_at', table_name='books')
+    op.drop_index('ix_books_language_created_at', table_name='books')
+    op.drop_index('ix_books_created_at', table_name='books')
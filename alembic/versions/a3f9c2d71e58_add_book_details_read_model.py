@@ -0,0 +1,75 @@
+"""add book details read model
+
+Revision ID: a3f9c2d71e58
+Revises: e8b4d0c6a215
+Create Date: 2026-10-19 18:24:37.210455
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f9c2d71e58'
+down_revision: Union[str, Sequence[str], None] = 'e8b4d0c6a215'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('book_details',
+    sa.Column('book_uid', sa.UUID(), nullable=False),
+    sa.Column('document', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('updated_at', postgresql.TIMESTAMP(), nullable=False),
+    sa.ForeignKeyConstraint(['book_uid'], ['books.uid'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('book_uid')
+    )
+
+    # Backfill every book (same document as books/read_model.py, default limits)
+    op.execute("""
+        INSERT INTO book_details (book_uid, document, updated_at)
+        SELECT
+            b.uid,
+            (to_jsonb(b) - 'user_uid') || jsonb_build_object(
+                'reviews', COALESCE(recent.reviews, '[]'::jsonb),
+                'review_count', stats.review_count,
+                'average_rating', stats.average_rating,
+                'similar_books', COALESCE(similar.books, '[]'::jsonb)
+            ),
+            now()
+        FROM books b
+        CROSS JOIN LATERAL (
+            SELECT count(*) AS review_count, round(avg(r.rating), 2) AS average_rating
+            FROM reviews r
+            WHERE r.book_uid = b.uid
+        ) stats
+        LEFT JOIN LATERAL (
+            SELECT jsonb_agg(to_jsonb(r) ORDER BY r.created_at DESC) AS reviews
+            FROM (
+                SELECT * FROM reviews
+                WHERE reviews.book_uid = b.uid
+                ORDER BY created_at DESC
+                LIMIT 20
+            ) r
+        ) recent ON true
+        LEFT JOIN LATERAL (
+            SELECT jsonb_agg(
+                jsonb_build_object('uid', sb.uid, 'title', sb.title, 'author', sb.author, 'score', (n.item ->> 'score')::float)
+                ORDER BY n.position
+            ) AS books
+            FROM book_similarities s
+            CROSS JOIN LATERAL jsonb_array_elements(s.similar) WITH ORDINALITY AS n(item, position)
+            JOIN books sb ON sb.uid = (n.item ->> 'uid')::uuid
+            WHERE s.book_uid = b.uid AND n.position <= 5
+        ) similar ON true
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('book_details')
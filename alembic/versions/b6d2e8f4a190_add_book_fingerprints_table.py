@@ -0,0 +1,42 @@
+"""add book fingerprints table
+
+Revision ID: b6d2e8f4a190
+Revises: f1c7e3a9b482
+Create Date: 2026-10-19 21:05:48.377120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d2e8f4a190'
+down_revision: Union[str, Sequence[str], None] = 'f1c7e3a9b482'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Filled by `python manage.py dedupe-books` (the hashing lives in books/dedup.py)
+    op.create_table('book_fingerprints',
+    sa.Column('book_uid', sa.UUID(), nullable=False),
+    sa.Column('buckets', postgresql.ARRAY(postgresql.BIGINT()), nullable=False),
+    sa.Column('duplicate_of', sa.UUID(), nullable=True),
+    sa.Column('similarity', sa.Float(), nullable=True),
+    sa.Column('updated_at', postgresql.TIMESTAMP(), nullable=False),
+    sa.ForeignKeyConstraint(['book_uid'], ['books.uid'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['duplicate_of'], ['books.uid'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('book_uid')
+    )
+    op.create_index('ix_book_fingerprints_buckets', 'book_fingerprints', ['buckets'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_book_fingerprints_buckets', table_name='book_fingerprints', postgresql_using='gin')
+    op.drop_table('book_fingerprints')
@@ -0,0 +1,36 @@
+"""add book stats table
+
+Revision ID: c5a2f7e14b96
+Revises: 9d4e6b1a7c38
+Create Date: 2026-10-19 15:02:11.583904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a2f7e14b96'
+down_revision: Union[str, Sequence[str], None] = '9d4e6b1a7c38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('book_stats',
+    sa.Column('book_uid', sa.UUID(), nullable=False),
+    sa.Column('view_count', sa.BIGINT(), server_default='0', nullable=False),
+    sa.Column('updated_at', postgresql.TIMESTAMP(), nullable=False),
+    sa.ForeignKeyConstraint(['book_uid'], ['books.uid'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('book_uid')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('book_stats')
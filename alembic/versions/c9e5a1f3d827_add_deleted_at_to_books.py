@@ -0,0 +1,31 @@
+"""add deleted_at to books
+
+Revision ID: c9e5a1f3d827
+Revises: b6d2e8f4a190
+Create Date: 2026-10-19 22:31:09.518266
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e5a1f3d827'
+down_revision: Union[str, Sequence[str], None] = 'b6d2e8f4a190'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nullable with no default: adding it doesn't rewrite the table
+    op.add_column('books', sa.Column('deleted_at', postgresql.TIMESTAMP(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('books', 'deleted_at')
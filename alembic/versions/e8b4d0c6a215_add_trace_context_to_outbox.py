@@ -0,0 +1,30 @@
+"""add trace context to outbox
+
+Revision ID: e8b4d0c6a215
+Revises: c5a2f7e14b96
+Create Date: 2026-10-19 16:21:47.309125
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b4d0c6a215'
+down_revision: Union[str, Sequence[str], None] = 'c5a2f7e14b96'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('outbox', sa.Column('trace_context', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('outbox', 'trace_context')
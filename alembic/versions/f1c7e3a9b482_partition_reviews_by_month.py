@@ -0,0 +1,100 @@
+"""partition reviews by month
+
+Revision ID: f1c7e3a9b482
+Revises: a3f9c2d71e58
+Create Date: 2026-10-19 19:40:12.904512
+
+"""
+from typing import Sequence, Union
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c7e3a9b482'
+down_revision: Union[str, Sequence[str], None] = 'a3f9c2d71e58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "uid, rating, review_text, user_uid, book_uid, created_at, updated_at"
+MONTHS_AHEAD = 3  # REVIEW_PARTITION_MONTHS_AHEAD; the daily job keeps it up from here
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The old heap steps aside (its pkey index name is schema-wide, so it moves too)
+    op.rename_table('reviews', 'reviews_legacy')
+    op.execute("ALTER INDEX reviews_pkey RENAME TO reviews_legacy_pkey")
+
+    op.create_table('reviews',
+    sa.Column('uid', sa.UUID(), nullable=False),
+    sa.Column('rating', sa.Integer(), nullable=False),
+    sa.Column('review_text', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('user_uid', sa.Uuid(), nullable=True),
+    sa.Column('book_uid', sa.Uuid(), nullable=True),
+    sa.Column('created_at', postgresql.TIMESTAMP(), nullable=False),
+    sa.Column('updated_at', postgresql.TIMESTAMP(), nullable=True),
+    sa.ForeignKeyConstraint(['book_uid'], ['books.uid'], ),
+    sa.ForeignKeyConstraint(['user_uid'], ['users.uid'], ),
+    sa.PrimaryKeyConstraint('uid', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)'
+    )
+    # Declared on the parent, created on every partition (current and future)
+    op.create_index('ix_reviews_book_uid_created_at', 'reviews', ['book_uid', sa.text('created_at DESC')])
+    op.create_index('ix_reviews_user_uid', 'reviews', ['user_uid'])
+
+    # One partition per month from the oldest review to MONTHS_AHEAD months out
+    bind = op.get_bind()
+    oldest, newest = bind.execute(sa.text(
+        "SELECT min(COALESCE(created_at, updated_at)), max(COALESCE(created_at, updated_at)) FROM reviews_legacy"
+    )).one()
+    this_month = datetime.now().date().replace(day=1)
+    month = min(oldest.date().replace(day=1), this_month) if oldest else this_month
+    last = add_months(this_month, MONTHS_AHEAD)
+    if newest:
+        last = max(last, newest.date().replace(day=1))
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE reviews_y{month.year}m{month.month:02d} PARTITION OF reviews "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        )
+        month = add_months(month, 1)
+
+    # created_at used to be nullable; those rows go in by their last edit (or now)
+    op.execute(f"""
+        INSERT INTO reviews ({COLUMNS})
+        SELECT uid, rating, review_text, user_uid, book_uid, COALESCE(created_at, updated_at, now()), updated_at
+        FROM reviews_legacy
+    """)
+    op.drop_table('reviews_legacy')
+    op.execute("ANALYZE reviews")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table('reviews', 'reviews_partitioned')
+    op.create_table('reviews',
+    sa.Column('uid', sa.UUID(), nullable=False),
+    sa.Column('rating', sa.Integer(), nullable=False),
+    sa.Column('review_text', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('user_uid', sa.Uuid(), nullable=True),
+    sa.Column('book_uid', sa.Uuid(), nullable=True),
+    sa.Column('created_at', postgresql.TIMESTAMP(), nullable=True),
+    sa.Column('updated_at', postgresql.TIMESTAMP(), nullable=True),
+    sa.ForeignKeyConstraint(['book_uid'], ['books.uid'], ),
+    sa.ForeignKeyConstraint(['user_uid'], ['users.uid'], ),
+    sa.PrimaryKeyConstraint('uid', name='reviews_plain_pkey')
+    )
+    op.execute(f"INSERT INTO reviews ({COLUMNS}) SELECT {COLUMNS} FROM reviews_partitioned")
+    # Drops the partitions with it
+    op.drop_table('reviews_partitioned')
+    op.execute("ALTER INDEX reviews_plain_pkey RENAME TO reviews_pkey")
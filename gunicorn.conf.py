@@ -0,0 +1,142 @@
+"""
+Gunicorn settings for running Bookly in production.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+Gunicorn manages the processes and each worker runs the app on uvicorn's event loop.
+Pick a profile with APP_ENV (development / staging / production). Any value can
+still be overridden with the usual GUNICORN_CMD_ARGS or command-line flags.
+"""
+import gc
+import math
+import os
+
+# ==========================================
+# 1. How many CPUs do we really have?
+# ==========================================
+def cgroup_cpu_limit():
+    """
+    CPUs allowed by the container's cgroup quota (e.g. `docker run --cpus=2`),
+    or None when there is no limit. os.cpu_count() would report every core on the host.
+    """
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+
+    # cgroup v1: quota is -1 when unlimited
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+def available_cpus() -> int:
+    try:
+        # Respects taskset / cpuset pinning
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(cpus, 1)
+
+# ==========================================
+# 2. Per-Environment Profiles
+# ==========================================
+# workers_per_cpu: each worker is one event loop (plus a thread pool for sync routes),
+# so roughly one per core keeps every core busy without processes fighting for CPU.
+PROFILES = {
+    "development": {
+        "workers_per_cpu": 0,   # always a single worker
+        "min_workers": 1,
+        "preload_app": False,   # --reload can't work with a preloaded app
+        "reload": True,
+        "max_requests": 0,
+        "loglevel": "debug",
+    },
+    "staging": {
+        "workers_per_cpu": 1,
+        "min_workers": 2,
+        "preload_app": True,
+        "reload": False,
+        "max_requests": 5000,
+        "loglevel": "info",
+    },
+    "production": {
+        "workers_per_cpu": 1,
+        "min_workers": 2,
+        "preload_app": True,
+        "reload": False,
+        "max_requests": 10000,
+        "loglevel": "info",
+    },
+}
+
+def worker_count(profile: dict, cpus: int) -> int:
+    # WEB_CONCURRENCY is the conventional override used by most hosting platforms
+    if os.environ.get("WEB_CONCURRENCY"):
+        return max(int(os.environ["WEB_CONCURRENCY"]), 1)
+    return max(profile["workers_per_cpu"] * cpus, profile["min_workers"])
+
+APP_ENV = os.environ.get("APP_ENV", "production")
+profile = PROFILES.get(APP_ENV, PROFILES["production"])
+
+# ==========================================
+# 3. Gunicorn Settings
+# ==========================================
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+pythonpath = "src"  # the app imports its modules as `config`, `db.main`, ...
+wsgi_app = "main:app"
+worker_class = "uvicorn_worker.UvicornWorker"
+workers = worker_count(profile, available_cpus())
+
+# Load the app once in the master and fork: workers share its memory pages copy-on-write
+preload_app = profile["preload_app"]
+reload = profile["reload"]
+
+# Recycle each worker after this many requests to cap slow memory growth.
+# The jitter stops every worker from restarting at the same moment.
+max_requests = int(os.environ.get("MAX_REQUESTS", profile["max_requests"]))
+max_requests_jitter = max_requests // 10
+
+# Must cover SHUTDOWN_READINESS_DELAY + SHUTDOWN_DRAIN_TIMEOUT (see lifespan.py)
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", 30))
+timeout = int(os.environ.get("WORKER_TIMEOUT", 60))
+keepalive = 5
+
+loglevel = profile["loglevel"]
+accesslog = None  # requests are already logged by the app's middleware
+errorlog = "-"
+
+# ==========================================
+# 4. Server Hooks
+# ==========================================
+def when_ready(server):
+    server.log.info(f"Profile '{APP_ENV}': {workers} workers on {available_cpus()} CPUs")
+    if preload_app:
+        # Move everything imported so far out of the GC's reach. Otherwise the first
+        # collection in each worker touches every object and un-shares those pages.
+        gc.freeze()
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+    # The engine was created in the master. Drop its pooled connections (without
+    # closing them, the master still owns the sockets) so this worker opens its own.
+    from db.main import engine, replica_router
+    engine.dispose(close=False)
+    for replica in replica_router.engines:
+        replica.dispose(close=False)
@@ -0,0 +1,92 @@
+"""
+Maintenance commands.
+
+    python manage.py rebuild-leaderboards
+    python manage.py rebuild-facets
+    python manage.py rebuild-book-details
+    python manage.py ensure-partitions
+    python manage.py dedupe-books [--merge]
+"""
+import argparse
+import os
+import sys
+
+# Same trick as reset_table.py: let the app's modules import each other from 'src'
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+def rebuild_leaderboards(args):
+    from sqlmodel import Session
+    from db.main import engine
+    from leaderboards import rebuild_leaderboards
+
+    print("🏆 Rebuilding leaderboards from the reviews table...")
+    with Session(engine) as session:
+        ranked = rebuild_leaderboards(session)
+    print(f"✅ {ranked} books ranked.")
+
+def rebuild_facets(args):
+    from sqlmodel import Session
+    from db.main import engine
+    from books.facets import rebuild_facets
+
+    print("📊 Recounting book facets...")
+    with Session(engine) as session:
+        values = rebuild_facets(session)
+    print(f"✅ {values} facet values counted.")
+
+def rebuild_book_details(args):
+    from sqlmodel import Session
+    from db.main import engine
+    from books.read_model import rebuild_book_details
+
+    print("📚 Rebuilding book detail documents...")
+    with Session(engine) as session:
+        books = rebuild_book_details(session)
+    print(f"✅ {books} documents rebuilt.")
+
+def ensure_partitions(args):
+    from sqlmodel import Session
+    from config import Config
+    from db.main import engine
+    from db.partitions import ensure_monthly_partitions
+
+    print(f"🗓️  Making sure review partitions exist {Config.REVIEW_PARTITION_MONTHS_AHEAD} months ahead...")
+    with Session(engine) as session:
+        created = ensure_monthly_partitions(session, "reviews", Config.REVIEW_PARTITION_MONTHS_AHEAD)
+    print(f"✅ {len(created)} partitions created.")
+
+def dedupe_books(args):
+    from sqlmodel import Session
+    from db.main import engine
+    from books.dedup import dedupe_catalogue
+
+    print("🔍 Looking for near-duplicate books...")
+    with Session(engine) as session:
+        result = dedupe_catalogue(session, merge=args.merge)
+    print(f"✅ {result['books']} books fingerprinted, {result['duplicates']} duplicates flagged, {result['merged']} merged.")
+
+COMMANDS = {
+    "rebuild-leaderboards": (rebuild_leaderboards, "Recompute the Redis leaderboards from Postgres"),
+    "rebuild-facets": (rebuild_facets, "Recount the book_facets table from the books table"),
+    "rebuild-book-details": (rebuild_book_details, "Regenerate the book_details read model from the source tables"),
+    "ensure-partitions": (ensure_partitions, "Create the upcoming monthly review partitions now"),
+    "dedupe-books": (
+        dedupe_books, "Fingerprint every book and flag near-duplicates",
+        (["--merge"], {"action": "store_true", "help": "also move duplicates' reviews to the original and delete them"}),
+    ),
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bookly maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (handler, help_text, *arguments) in COMMANDS.items():
+        subparser = subparsers.add_parser(name, help=help_text)
+        for flags, options in arguments:
+            subparser.add_argument(*flags, **options)
+        subparser.set_defaults(handler=handler)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
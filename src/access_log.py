@@ -0,0 +1,146 @@
+"""
+Structured access logging that stays out of the request's latency.
+
+The middleware only decides whether a request is logged and hands a LogRecord to a
+queue; JSON formatting and the write to stdout happen on a background thread
+(logging's QueueListener). Errors and slow requests are always logged, everything
+else is sampled at ACCESS_LOG_SAMPLE_RATE.
+"""
+from logging.handlers import QueueHandler, QueueListener
+from starlette.datastructures import MutableHeaders
+from datetime import datetime, timezone
+import json
+import logging
+import queue
+import random
+import sys
+import time
+import uuid
+from config import Config
+
+access_logger = logging.getLogger("bookly.access")
+
+# ==========================================
+# 1. JSON Formatting (runs on the writer thread)
+# ==========================================
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, default=str)
+
+# ==========================================
+# 2. Queue Handler & Background Writer
+# ==========================================
+class DroppingQueueHandler(QueueHandler):
+    """
+    Enqueues records untouched (QueueHandler.prepare would format them on the request
+    path) and drops them when the writer can't keep up instead of blocking requests.
+    """
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class AccessLog:
+    """Lifespan hooks for the writer thread (one per worker: threads don't survive a fork)."""
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=Config.ACCESS_LOG_QUEUE_SIZE)
+        self.handler = DroppingQueueHandler(self.queue)
+        self._listener = None
+
+        access_logger.addHandler(self.handler)
+        access_logger.setLevel(logging.INFO)
+        access_logger.propagate = False
+
+    def start(self):
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(JsonFormatter())
+        self._listener = QueueListener(self.queue, output)
+        self._listener.start()
+
+    def stop(self):
+        if self._listener:
+            # Writes out whatever is still queued before returning
+            self._listener.stop()
+            self._listener = None
+        if self.handler.dropped:
+            logging.getLogger(__name__).warning(f"{self.handler.dropped} access log records dropped (queue full)")
+
+access_log = AccessLog()
+
+# ==========================================
+# 3. Sampling
+# ==========================================
+def should_log(status_code: int, duration_ms: float, sample_rate: float, slow_ms: float) -> bool:
+    if status_code >= 400 or duration_ms >= slow_ms:
+        return True
+    return random.random() < sample_rate
+
+# ==========================================
+# 4. Middleware
+# ==========================================
+class AccessLogMiddleware:
+    """
+    Pure ASGI (no BaseHTTPMiddleware task per request). Adds `X-Request-ID` (taken
+    from the client if it sent one) and `X-Process-Time` to every response.
+    """
+    def __init__(self, app, sample_rate: float = 1.0, slow_ms: float = 500):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        scope.setdefault("state", {})["request_id"] = request_id
+
+        status_code = 500  # unless a response starts, the request failed
+
+        async def send_with_headers(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Request-ID", request_id)
+                headers.append("X-Process-Time", f"{time.perf_counter() - start:.4f}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            if should_log(status_code, duration_ms, self.sample_rate, self.slow_ms):
+                route = scope.get("route")
+                client = scope.get("client")
+                access_logger.info("request", extra={"fields": {
+                    "request_id": request_id,
+                    "method": scope["method"],
+                    # The template (/api/v1/books/{book_uid}) groups well in log search; the path doesn't
+                    "route": getattr(route, "path_format", None),
+                    "path": scope["path"],
+                    "status": status_code,
+                    "duration_ms": round(duration_ms, 2),
+                    "client": client[0] if client else None,
+                }})
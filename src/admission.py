@@ -0,0 +1,241 @@
+"""
+Admission control: shed load at the door instead of queueing without bound.
+
+Every request takes a slot from its route's limiter and from the global one. When a
+limiter is full the request waits in a short priority queue (authenticated writes
+first, anonymous reads last) and gets a fast 503 + Retry-After if no slot frees up
+within ADMISSION_QUEUE_TIMEOUT_MS. Nothing reaches the threadpool or the DB pool
+beyond what the limits allow.
+
+The limits aren't fixed numbers. Each limiter measures its requests' latency and
+adjusts itself with the Gradient2 rule from Netflix's concurrency-limits: while
+recent latency stays near the long-term baseline the limit grows, once latency
+climbs (queueing somewhere downstream) it shrinks in proportion. 5xx responses
+cut it multiplicatively, AIMD style.
+"""
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.routing import Match
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from config import Config
+
+# Lower is served first
+PRIORITY_WRITE = 0           # authenticated POST/PATCH/DELETE
+PRIORITY_AUTHENTICATED = 1   # authenticated reads
+PRIORITY_ANONYMOUS = 2
+
+# ==========================================
+# 1. Adaptive Limit (Gradient2)
+# ==========================================
+class GradientLimit:
+    """
+    - `short_rtt`: latency over the last ~10 requests.
+    - `long_rtt`: baseline over the last ~LONG_WINDOW requests.
+    - gradient = clamp(TOLERANCE * long / short, 0.5, 1.0): 1.0 while latency is normal,
+      falling towards 0.5 as it degrades.
+    - new limit = limit * gradient + sqrt(limit), smoothed. The sqrt term is the
+      headroom that lets the limit probe upwards when nothing is wrong.
+    """
+    SHORT_WINDOW = 10
+    LONG_WINDOW = 600
+    TOLERANCE = 1.5      # latency may grow this much before we back off
+    SMOOTHING = 0.2
+    ERROR_BACKOFF = 0.9  # multiplicative decrease on 5xx
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.short_rtt = None
+        self.long_rtt = None
+
+    def _ewma(self, average, sample: float, window: int) -> float:
+        if average is None:
+            return sample
+        return average + (sample - average) * (2 / (window + 1))
+
+    def _clamp(self, limit: float) -> float:
+        return max(self.min_limit, min(self.max_limit, limit))
+
+    def on_sample(self, rtt: float, in_flight: int, failed: bool = False):
+        if failed:
+            self.limit = self._clamp(self.limit * self.ERROR_BACKOFF)
+            return
+
+        self.short_rtt = self._ewma(self.short_rtt, rtt, self.SHORT_WINDOW)
+        self.long_rtt = self._ewma(self.long_rtt, rtt, self.LONG_WINDOW)
+        # After a slow period the baseline would stay inflated for a long time; pull it down
+        if self.long_rtt > 2 * self.short_rtt:
+            self.long_rtt *= 0.95
+
+        # Not using the limit we have: latency says nothing about whether a bigger one is safe
+        if in_flight < self.limit / 2:
+            return
+
+        gradient = max(0.5, min(1.0, self.TOLERANCE * self.long_rtt / self.short_rtt))
+        target = self.limit * gradient + math.sqrt(self.limit)
+        self.limit = self._clamp(self.limit * (1 - self.SMOOTHING) + target * self.SMOOTHING)
+
+# ==========================================
+# 2. Limiter (slots + bounded priority queue)
+# ==========================================
+class Limiter:
+    """Runs on the event loop only, so plain counters are enough (no locks)."""
+    def __init__(self, limit: GradientLimit, queue_size: int):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.in_flight = 0
+        self.rejected = 0
+        self._waiters = []  # heap of (priority, arrival, future)
+        self._arrivals = itertools.count()
+
+    @property
+    def capacity(self) -> int:
+        return int(self.limit.limit)
+
+    async def acquire(self, priority: int, timeout: float) -> bool:
+        if self.in_flight < self.capacity and not self._waiters:
+            self.in_flight += 1
+            return True
+
+        if len(self._waiters) >= self.queue_size:
+            # Full queue: a request only gets in by pushing out a lower-priority one
+            worst = max(self._waiters, default=None)
+            if worst is None or worst[0] <= priority:
+                self.rejected += 1
+                return False
+            self._remove(worst)
+            worst[2].set_result(False)
+            self.rejected += 1
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._arrivals), future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            await asyncio.wait({future}, timeout=timeout)
+        except asyncio.CancelledError:
+            # Client went away while queued; hand back a slot if we were just given one
+            if future.done() and future.result():
+                self.release()
+            else:
+                self._remove(entry)
+                future.cancel()
+            raise
+
+        if future.done():
+            return future.result()
+        self._remove(entry)
+        future.cancel()
+        self.rejected += 1
+        return False
+
+    def release(self):
+        self.in_flight -= 1
+        self._grant()
+
+    def record(self, rtt: float, in_flight: int, failed: bool):
+        self.limit.on_sample(rtt, in_flight, failed)
+        # A grown limit can let waiters in right away
+        self._grant()
+
+    def _grant(self):
+        while self._waiters and self.in_flight < self.capacity:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(True)
+
+    def _remove(self, entry):
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+
+def new_limiter(initial: int) -> Limiter:
+    return Limiter(
+        GradientLimit(initial, Config.ADMISSION_MIN_LIMIT, Config.ADMISSION_MAX_LIMIT),
+        queue_size=Config.ADMISSION_QUEUE_SIZE
+    )
+
+# ==========================================
+# 3. Request Classification
+# ==========================================
+def request_priority(scope) -> int:
+    # The token isn't verified here; a bogus one jumps the queue only to get a fast 401
+    authenticated = any(name == b"authorization" for name, _ in scope["headers"])
+    if not authenticated:
+        return PRIORITY_ANONYMOUS
+    if scope["method"] in ("GET", "HEAD", "OPTIONS"):
+        return PRIORITY_AUTHENTICATED
+    return PRIORITY_WRITE
+
+def route_template(scope):
+    """The matching route's path (e.g. /api/v1/books/{book_uid}), or None for a 404."""
+    app = scope.get("app")
+    for route in getattr(getattr(app, "router", None), "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", None)
+    return None
+
+# ==========================================
+# 4. Middleware
+# ==========================================
+class AdmissionMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.global_limiter = new_limiter(Config.ADMISSION_INITIAL_LIMIT)
+        self.route_limiters = {}
+
+    def limiter_for(self, route: str) -> Limiter:
+        limiter = self.route_limiters.get(route)
+        if limiter is None:
+            limiter = self.route_limiters[route] = new_limiter(Config.ADMISSION_ROUTE_INITIAL_LIMIT)
+        return limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/health"):
+            return await self.app(scope, receive, send)
+
+        route = route_template(scope)
+        if route is None or route in Config.ADMISSION_EXEMPT_ROUTES:
+            return await self.app(scope, receive, send)
+
+        priority = request_priority(scope)
+        deadline = time.monotonic() + Config.ADMISSION_QUEUE_TIMEOUT_MS / 1000
+        # Route first: a request stuck behind its own route shouldn't sit on a global slot
+        acquired = []
+        for limiter in (self.limiter_for(route), self.global_limiter):
+            if not await limiter.acquire(priority, max(0.0, deadline - time.monotonic())):
+                for held in acquired:
+                    held.release()
+                return await self.reject(scope, receive, send)
+            acquired.append(limiter)
+
+        status_code = 500
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight = [limiter.in_flight for limiter in acquired]
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            rtt = time.perf_counter() - start
+            for limiter, load in zip(acquired, in_flight):
+                limiter.release()
+                limiter.record(rtt, load, failed=status_code >= 500)
+
+    async def reject(self, scope, receive, send):
+        response = JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"error_code": "OVERLOADED", "message": "Server is busy, please retry shortly."},
+            headers={"Retry-After": str(Config.ADMISSION_RETRY_AFTER_SECONDS)}
+        )
+        await response(scope, receive, send)
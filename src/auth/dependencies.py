@@ -2,10 +2,11 @@ from fastapi import Request, Depends
 from fastapi.security import HTTPBearer
 from fastapi.security.http import HTTPAuthorizationCredentials
 from .utils import decode_token
-from db.redis import token_in_blocklist
+from db.redis import token_in_blocklist, mark_user_write
 from sqlmodel import Session
-from db.main import get_session
+from db.main import get_session, replica_router
 from .service import UserService
+from tracing import span
 from typing import List
 from db.models import User
 from errors import (
@@ -22,7 +23,8 @@ class TokenBearer(HTTPBearer):
     async def __call__(self, request: Request) -> dict:
         creds: HTTPAuthorizationCredentials = await super().__call__(request)
         token = creds.credentials
-        token_data = decode_token(token)
+        with span("jwt.decode"):
+            token_data = decode_token(token)
 
         if not token_data:
             raise InvalidToken()
@@ -59,13 +61,21 @@ async def get_current_user(
     session: Session = Depends(get_session)
 ):
     user_email = token_details['user']['email']
-    user_service = UserService(session)
-    user = user_service.get_user_by_email(user_email)
+    with span("get_current_user"):
+        user_service = UserService(session)
+        user = user_service.get_user_by_email(user_email)
     
     if not user:
         raise UserNotFound()
     return user
 
+# 3. READ-YOUR-WRITES
+# Declared on write routes. It runs before the route, so the marker is in place
+# before the client can possibly see the response and issue its next read.
+async def record_user_write(token_details: dict = Depends(access_token_bearer)):
+    if replica_router.enabled:
+        await mark_user_write(token_details['user']['user_uid'])
+
 class RoleChecker:
     def __init__(self, allowed_roles: List[str]):
         self.allowed_roles = allowed_roles
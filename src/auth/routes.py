@@ -1,48 +1,43 @@
-from fastapi import APIRouter, Depends, status, BackgroundTasks
+from fastapi import APIRouter, Depends, status, Query
 from fastapi.responses import JSONResponse
 from sqlmodel import Session
 from datetime import datetime, timedelta
-from celery_tasks import send_email_task
-from db.main import get_session 
-from .schemas import UserCreate, UserResponse, UserLoginModel
+from typing import List
+from db.main import get_session, SessionReleasingRoute
+from .schemas import UserCreate, UserResponse, UserLoginModel, UserProfileModel
+from books.service import BookService
+from books.schemas import Book
 from .service import UserService
 from .utils import create_access_token, verify_password
 from .dependencies import RefreshTokenBearer, AccessTokenBearer, get_current_user
 from db.redis import add_jti_to_blocklist
-from mail import create_url_safe_token, decode_url_safe_token
-from config import Config
-# ✅ Make sure UserAlreadyExists is imported
-from errors import InvalidCredentials, UserNotFound, InvalidToken, UserAlreadyExists
+from fieldsets import select_fields, serialize, FieldSelection
+from mail import decode_url_safe_token
+from outbox import outbox_dispatcher
+from errors import InvalidCredentials, UserNotFound, InvalidToken
 
-router = APIRouter() 
+router = APIRouter(route_class=SessionReleasingRoute)
 
 error_400 = {400: {"description": "Invalid credentials"}}
 error_401 = {401: {"description": "Invalid token"}}
 error_404 = {404: {"description": "Not found"}} 
 error_409 = {409: {"description": "User already exists"}}
 
+# ?fields=uid,title on /me/books
+book_fields = select_fields(Book)
+
 @router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED, responses=error_409)
-async def signup(
+def signup(
     user_data: UserCreate, 
-    background_tasks: BackgroundTasks,
     session: Session = Depends(get_session)
 ):
     service = UserService(session)
     
-    # ✅ FIX: Check both Email AND Username
-    if service.user_exists(user_data.email, user_data.username):
-        raise UserAlreadyExists()
-
+    # Raises UserAlreadyExists if the email OR username is taken.
+    # The verification email is queued in the outbox in the same transaction,
+    # so the request never waits on (or loses a job to) the Celery broker.
     new_user = service.create_user(user_data)
-    
-    # ✅ FIX: Safe Email Sending (Won't crash if Redis is down)
-    try:
-        token = create_url_safe_token({"email": new_user.email})
-        link = f"{Config.DOMAIN}/api/v1/auth/verify/{token}"
-        send_email_task.delay(email=new_user.email, link=link)
-    except Exception as e:
-        # Log it, but don't crash the User Creation
-        print(f"⚠️ Warning: Email task failed: {e}")
+    outbox_dispatcher.notify()
         
     return new_user
 
@@ -102,6 +97,20 @@ async def logout(token_details: dict = Depends(AccessTokenBearer())):
     await add_jti_to_blocklist(jti)
     return JSONResponse(content={"message": "Logged Out Successfully"}, status_code=status.HTTP_200_OK)
 
-@router.get("/me", response_model=UserResponse, responses=error_401)
-async def get_current_user_profile(user = Depends(get_current_user)):
-    return user
\ No newline at end of file
+@router.get("/me", response_model=UserProfileModel, responses=error_401)
+def get_current_user_profile(user = Depends(get_current_user), session: Session = Depends(get_session)):
+    stats = UserService(session).get_user_stats(user.uid)
+    return UserProfileModel(**user.model_dump(), **stats)
+
+@router.get("/me/books", response_model=List[Book], responses=error_401)
+def get_current_user_books(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    selection: FieldSelection = Depends(book_fields),
+    user = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
+    if selection.is_sparse:
+        rows = BookService().get_user_books_fields(str(user.uid), selection, session, offset=offset, limit=limit)
+        return JSONResponse([serialize(Book, row, selection.fields) for row in rows])
+    return BookService().get_user_books(str(user.uid), session, offset=offset, limit=limit)
\ No newline at end of file
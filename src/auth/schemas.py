@@ -1,8 +1,6 @@
 from pydantic import BaseModel, Field, EmailStr, ConfigDict, field_serializer
 import uuid
 from datetime import datetime
-from typing import List
-from books.schemas import Book
 
 class UserCreate(BaseModel):
     # ✅ THE FIX: Prevent empty strings causing crashes
@@ -25,7 +23,6 @@ class UserResponse(BaseModel):
     is_verified: bool
     role: str
     created_at: datetime
-    books: List[Book] = [] 
     
     # ✅ THE FIX: Add "Z" here too
     @field_serializer('created_at')
@@ -35,4 +32,10 @@ class UserResponse(BaseModel):
         return dt.isoformat()
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class UserProfileModel(UserResponse):
+    # Summary counts instead of the whole library; the books themselves
+    # are paginated under GET /api/v1/auth/me/books
+    book_count: int
+    review_count: int
\ No newline at end of file
@@ -1,39 +1,79 @@
-from sqlmodel import Session, select
+from sqlmodel import Session, select, func
+from sqlalchemy import lambda_stmt, exists
+from sqlalchemy.dialects.postgresql import insert
 from .schemas import UserCreate
-from db.models import User
+from db.models import User, Book, Review
 from .utils import generate_passwd_hash
+from errors import UserAlreadyExists
+from outbox import enqueue_task
+from mail import create_url_safe_token
+from config import Config
+from tracing import traced
 
+# Runs on every authenticated request (get_current_user), so it's a cached lambda
+# statement like book_by_uid in books/service.py
+def user_by_email(email: str):
+    return lambda_stmt(lambda: select(User).where(User.email == email))
+
+@traced
 class UserService:
     def __init__(self, session: Session):
         self.session = session
 
     def get_user_by_email(self, email: str):
-        statement = select(User).where(User.email == email)
-        return self.session.exec(statement).first()
+        return self.session.exec(user_by_email(email)).scalars().first()
 
-    # ✅ THE FIX: Update definition to accept 'username'
-    def user_exists(self, email: str, username: str = None) -> bool:
-        # Check if EITHER the email OR the username matches
-        statement = select(User).where((User.email == email) | (User.username == username))
-        user = self.session.exec(statement).first()
-        return True if user else False
+    def get_user_stats(self, user_uid) -> dict:
+        # Both counts in one round-trip, without loading a single book or review
+        book_count = (
+            select(func.count()).select_from(Book)
+            .where(Book.user_uid == user_uid, Book.deleted_at.is_(None))
+            .scalar_subquery()
+        )
+        # Like GET /reviews (ON_LIVE_BOOK in reviews/service.py), reviews of deleted books don't count
+        on_deleted_book = exists().where(Book.uid == Review.book_uid, Book.deleted_at.is_not(None))
+        review_count = (
+            select(func.count()).select_from(Review)
+            .where(Review.user_uid == user_uid, ~on_deleted_book)
+            .scalar_subquery()
+        )
+        counts = self.session.exec(select(book_count, review_count)).one()
+        return {"book_count": counts[0], "review_count": counts[1]}
 
     def create_user(self, user_data: UserCreate):
         hashed_pwd = generate_passwd_hash(user_data.password)
 
-        new_user = User(
-            username=user_data.username,
-            email=user_data.email,
-            first_name=user_data.first_name,
-            last_name=user_data.last_name,
-            password_hash=hashed_pwd,
-            is_verified=False
+        # One round-trip: the unique indexes on email/username do the existence check.
+        # ON CONFLICT DO NOTHING returns no row when the user already exists.
+        statement = (
+            insert(User)
+            .values(
+                username=user_data.username,
+                email=user_data.email,
+                first_name=user_data.first_name,
+                last_name=user_data.last_name,
+                password_hash=hashed_pwd,
+                is_verified=False
+            )
+            .on_conflict_do_nothing()
+            .returning(User)
         )
+        new_user = self.session.exec(statement).scalars().first()
 
-        self.session.add(new_user)
+        if not new_user:
+            self.session.rollback()
+            raise UserAlreadyExists()
+
+        # Queued in the same transaction as the user row: both are stored or neither is
+        token = create_url_safe_token({"email": new_user.email})
+        enqueue_task(
+            self.session,
+            task_name="send_email_task",
+            payload={"email": new_user.email, "link": f"{Config.DOMAIN}/api/v1/auth/verify/{token}"},
+            dedup_key=f"verify-email:{new_user.uid}"
+        )
         self.session.commit()
-        self.session.refresh(new_user)
-        
+
         return new_user
 
     def update_user(self, user: User, update_data: dict):
@@ -1,18 +1,22 @@
-from passlib.context import CryptContext
 from datetime import timedelta, datetime
+from functools import lru_cache
 import jwt
 from config import Config
 import uuid
 import logging
 
 # 1. Hashing Logic
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Built on first use so importing the app doesn't pay for passlib + bcrypt
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def generate_passwd_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 # 2. Token Logic (The "Ticket Printer")
 def create_access_token(user_data: dict, expiry: timedelta = None, refresh: bool = False):
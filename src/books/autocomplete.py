@@ -0,0 +1,308 @@
+"""
+Search-as-you-type for book titles and authors.
+
+Each worker keeps a sorted list of (term, book_uid) entries in memory and answers
+prefix lookups with bisect, so typing never reaches Postgres. Prefixes of up to
+TOP_PREFIX_LENGTH characters match too much of the list to rank on every keystroke,
+so each keeps its MAX_SUGGESTIONS most popular books ready. The list is built from
+the books table at startup, patched by book writes, and kept in step across workers
+through a Redis channel. A periodic rebuild refreshes popularity (review counts) and
+repairs anything a missed message left behind.
+"""
+from sqlmodel import Session, select, func
+from bisect import bisect_left, insort
+import asyncio
+import heapq
+import json
+import logging
+import os
+import sys
+import threading
+import unicodedata
+from config import Config
+from db.models import Book, Review
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "autocomplete:changes"
+# Sorts after any character a real term can contain
+HIGHEST = "\U0010ffff"
+# Prefixes this short match a large slice of the index, so their rankings are kept up to date
+TOP_PREFIX_LENGTH = 3
+MAX_SUGGESTIONS = 20
+
+# ==========================================
+# 1. Normalisation
+# ==========================================
+def normalize(text: str) -> str:
+    """Case-, accent- and whitespace-insensitive form: 'Gabriel García  Márquez' -> 'gabriel garcia marquez'."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.split())
+
+def index_terms(title: str, author: str) -> set:
+    """
+    The title and author from every word onwards, so 'rings' finds 'The Lord of the Rings'
+    and 'tolkien' finds 'J. R. R. Tolkien'.
+    """
+    terms = set()
+    for text in (title, author):
+        words = normalize(text).split(" ")
+        for i in range(len(words)):
+            if words[i]:
+                terms.add(" ".join(words[i:]))
+    return terms
+
+def short_prefixes(terms) -> set:
+    return {term[:length] for term in terms for length in range(1, min(len(term), TOP_PREFIX_LENGTH) + 1)}
+
+# ==========================================
+# 2. The Index
+# ==========================================
+class AutocompleteIndex:
+    """
+    Sorted (term, book_uid) tuples plus per-book details. Reads are lock-free (every
+    mutation swaps or edits a single list); writes are serialised by a lock because
+    sync routes run in a thread pool.
+
+    `top` maps each short prefix to its most popular uids, best first. A list shorter
+    than MAX_SUGGESTIONS holds every book with that prefix. Removing a book from a
+    full list leaves a gap only a scan can fill, so that prefix is marked stale and
+    rescanned at its next lookup.
+    """
+    # Rough per-entry cost besides the term itself: tuple + list slot
+    ENTRY_OVERHEAD = sys.getsizeof(("", "")) + 8
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries = []
+        self.books = {}       # uid -> (title, author, popularity)
+        self.top = {}         # short prefix -> up to MAX_SUGGESTIONS uids, most popular first
+        self.size_bytes = 0
+        self.skipped = 0      # books left out because of the memory budget
+        self._stale = set()
+        self._lock = threading.Lock()
+
+    def _entry_cost(self, term: str) -> int:
+        return sys.getsizeof(term) + self.ENTRY_OVERHEAD
+
+    def _book_cost(self, terms) -> int:
+        return sum(self._entry_cost(term) for term in terms)
+
+    def _rank(self, uid: str):
+        title, _, popularity = self.books[uid]
+        return (-popularity, title)
+
+    def build(self, rows):
+        """
+        Replaces the whole index from (uid, title, author, popularity) rows. The most
+        popular books are indexed first, so when the budget runs out it's the long
+        tail that goes missing.
+        """
+        entries, books, top, size, skipped = [], {}, {}, 0, 0
+        # Search order, so the top lists fill up best first
+        for uid, title, author, popularity in sorted(rows, key=lambda row: (-row[3], row[1])):
+            uid = str(uid)
+            terms = index_terms(title, author)
+            cost = self._book_cost(terms)
+            if size + cost > self.max_bytes:
+                skipped += 1
+                continue
+            entries.extend((term, uid) for term in terms)
+            books[uid] = (title, author, popularity)
+            size += cost
+            for prefix in short_prefixes(terms):
+                ranked = top.setdefault(prefix, [])
+                if len(ranked) < MAX_SUGGESTIONS:
+                    ranked.append(uid)
+        entries.sort()
+
+        with self._lock:
+            self.entries, self.books, self.top, self.size_bytes, self.skipped = entries, books, top, size, skipped
+            self._stale = set()
+
+    def add(self, uid: str, title: str, author: str, popularity: int = None):
+        """Adds or replaces a book. Keeps its known popularity unless a new one is given."""
+        with self._lock:
+            previous = self.books.get(uid)
+            if popularity is None:
+                popularity = previous[2] if previous else 0
+            terms = index_terms(title, author)
+            rank = (-popularity, title)
+            # Lists the book goes straight back into, no lower down, have no gap to refill
+            kept = short_prefixes(terms) if previous and rank <= self._rank(uid) else set()
+            self._remove(uid, kept)
+
+            cost = self._book_cost(terms)
+            if self.size_bytes + cost > self.max_bytes:
+                self.skipped += 1
+                self._stale |= kept
+                return
+            for term in terms:
+                insort(self.entries, (term, uid))
+            self.books[uid] = (title, author, popularity)
+            self.size_bytes += cost
+
+            for prefix in short_prefixes(terms) - self._stale:
+                ranked = self.top.get(prefix, [])
+                if len(ranked) == MAX_SUGGESTIONS and rank >= self._rank(ranked[-1]):
+                    continue
+                position = next((i for i, other in enumerate(ranked) if rank < self._rank(other)), len(ranked))
+                # A new list, swapped in whole, so a concurrent search never sees it half-edited
+                self.top[prefix] = (ranked[:position] + [uid] + ranked[position:])[:MAX_SUGGESTIONS]
+
+    def remove(self, uid: str):
+        with self._lock:
+            self._remove(uid)
+
+    def _remove(self, uid: str, kept=frozenset()):
+        book = self.books.pop(uid, None)
+        if book is None:
+            return
+        terms = index_terms(book[0], book[1])
+        for term in terms:
+            i = bisect_left(self.entries, (term, uid))
+            if i < len(self.entries) and self.entries[i] == (term, uid):
+                del self.entries[i]
+                self.size_bytes -= self._entry_cost(term)
+        for prefix in short_prefixes(terms):
+            ranked = self.top.get(prefix, [])
+            if uid in ranked:
+                if len(ranked) == MAX_SUGGESTIONS and prefix not in kept:
+                    self._stale.add(prefix)
+                self.top[prefix] = [other for other in ranked if other != uid]
+
+    def _matching(self, prefix: str, scan_limit: int = None) -> dict:
+        """uid -> book for the entries starting with `prefix`, the first `scan_limit` of them if given."""
+        entries, books = self.entries, self.books
+        start = bisect_left(entries, (prefix,))
+        end = bisect_left(entries, (prefix + HIGHEST,), lo=start)
+        if scan_limit is not None:
+            end = min(end, start + scan_limit)
+        found = {}
+        for _, uid in entries[start:end]:
+            book = books.get(uid)  # None if a writer removed it mid-scan
+            if book is not None:
+                found[uid] = book
+        return found
+
+    def _ranked_for(self, prefix: str) -> list:
+        if prefix in self._stale:
+            # A full scan of the prefix's range, once, to refill the list after a removal
+            with self._lock:
+                if prefix in self._stale:
+                    found = self._matching(prefix)
+                    self.top[prefix] = heapq.nsmallest(MAX_SUGGESTIONS, found, key=self._rank)
+                    self._stale.discard(prefix)
+        return self.top.get(prefix, [])
+
+    def search(self, prefix: str, limit: int = 10):
+        """Books with a title/author word starting with `prefix`, most popular first."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        limit = min(limit, MAX_SUGGESTIONS)
+
+        if len(prefix) <= TOP_PREFIX_LENGTH:
+            books = self.books
+            best = [(uid, books[uid]) for uid in self._ranked_for(prefix)[:limit] if uid in books]
+        else:
+            # Longer prefixes match few entries; the cap only guards against pathological ones
+            found = self._matching(prefix, Config.AUTOCOMPLETE_SCAN_LIMIT)
+            best = heapq.nsmallest(limit, found.items(), key=lambda item: (-item[1][2], item[1][0]))
+        return [{"uid": uid, "title": title, "author": author} for uid, (title, author, _) in best]
+
+autocomplete_index = AutocompleteIndex(max_bytes=Config.AUTOCOMPLETE_MAX_MEMORY_MB * 1024 * 1024)
+
+# ==========================================
+# 3. Loading & Keeping In Sync
+# ==========================================
+def load_books(session: Session):
+    """(uid, title, author, review count) for every book."""
+    review_count = (
+        select(func.count(Review.uid))
+        .where(Review.book_uid == Book.uid)
+        .correlate(Book)
+        .scalar_subquery()
+    )
+    return session.exec(
+        select(Book.uid, Book.title, Book.author, review_count).where(Book.deleted_at.is_(None))
+    ).all()
+
+def rebuild_index():
+    from db.main import engine
+    with Session(engine) as session:
+        autocomplete_index.build(load_books(session))
+    logger.info(
+        f"Autocomplete index: {len(autocomplete_index.books)} books, "
+        f"{autocomplete_index.size_bytes / 1024 / 1024:.1f} MB, {autocomplete_index.skipped} over budget"
+    )
+
+def apply_change(change: dict):
+    if change["op"] == "upsert":
+        autocomplete_index.add(change["uid"], change["title"], change["author"])
+    else:
+        autocomplete_index.remove(change["uid"])
+
+def publish_change(message: dict):
+    """Applies a book change here and tells the other workers about it."""
+    apply_change(message)
+    # Looked up at publish time: with a preloaded app the workers are forks of one master
+    message["origin"] = os.getpid()
+
+    from redis.exceptions import RedisError
+    from db.redis import get_sync_redis
+    try:
+        get_sync_redis().publish(CHANNEL, json.dumps(message))
+    except RedisError as e:
+        # Other workers pick the change up at their next rebuild
+        logger.warning(f"Could not publish autocomplete change: {e}")
+
+def book_saved(uid: str, title: str, author: str):
+    publish_change({"op": "upsert", "uid": uid, "title": title, "author": author})
+
+def book_deleted(uid: str):
+    publish_change({"op": "delete", "uid": uid})
+
+class AutocompleteSync:
+    """Lifespan task: applies changes published by other workers and rebuilds periodically."""
+    def __init__(self):
+        self._tasks = []
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._refresh())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _listen(self):
+        from db.redis import get_redis
+        while True:
+            try:
+                async with get_redis().pubsub() as pubsub:
+                    await pubsub.subscribe(CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        change = json.loads(message["data"])
+                        if change.get("origin") != os.getpid():
+                            apply_change(change)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Autocomplete subscription lost: {e}")
+                await asyncio.sleep(5)
+
+    async def _refresh(self):
+        from starlette.concurrency import run_in_threadpool
+        while True:
+            await asyncio.sleep(Config.AUTOCOMPLETE_REBUILD_SECONDS)
+            try:
+                await run_in_threadpool(rebuild_index)
+            except Exception as e:
+                logger.warning(f"Autocomplete rebuild failed: {e}")
+
+autocomplete_sync = AutocompleteSync()
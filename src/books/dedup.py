@@ -0,0 +1,223 @@
+"""
+Near-duplicate books: "The Hobbit" by "J. R. R. Tolkien" (George Allen & Unwin) and
+"The Hobbit." by "J.R.R. Tolkien" (George Allen and Unwin) are one book.
+
+Every book is reduced to the set of byte trigrams of its normalised title, author
+and publisher. Two books are duplicates when those sets overlap by at least
+DUPLICATE_BOOKS_THRESHOLD (Jaccard similarity). Comparing a new book against the
+whole catalogue would be a full scan, so:
+
+- MinHash: NUM_PERM random hash functions, each keeping the smallest hash of the
+  set. Two sets agree on a given minimum with probability equal to their Jaccard
+  similarity. All of it is vectorised NumPy, for one book or thousands at once.
+- LSH: the signature is cut into BANDS bands of ROWS values, each band hashed to a
+  bucket key. Similar books share at least one bucket with high probability
+  (~99.98% at 0.8 similarity, ~64% at 0.5), dissimilar ones almost never.
+
+The bucket keys live in `book_fingerprints` behind a GIN index, so finding the
+candidates for a new book is one indexed lookup. Candidates are then checked
+exactly against their trigram sets.
+
+Changing NUM_PERM, BANDS, ROWS or SEED changes every bucket key: run
+`python manage.py dedupe-books` afterwards to recompute them.
+"""
+from sqlmodel import Session, select
+from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime
+from typing import NamedTuple, Optional
+import logging
+import uuid
+import numpy as np
+from config import Config
+from db.models import Book, BookFingerprint
+from .autocomplete import normalize
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+PRIME = (1 << 31) - 1   # hashes stay below 2**31, so signatures fit in uint32
+SEED = 20261019         # fixed: bucket keys must agree across processes and deploys
+
+_rng = np.random.default_rng(SEED)
+_A = _rng.integers(1, PRIME, size=(NUM_PERM, 1), dtype=np.uint64)
+_B = _rng.integers(0, PRIME, size=(NUM_PERM, 1), dtype=np.uint64)
+# One multiplier per (band, row); distinct per band, so equal rows in different bands don't collide
+_BAND_MULTIPLIERS = _rng.integers(1, 1 << 63, size=(BANDS, ROWS), dtype=np.uint64) | np.uint64(1)
+
+# ==========================================
+# 1. MinHash Signatures (pure NumPy)
+# ==========================================
+def canonical(text: str) -> str:
+    """normalize() plus punctuation folded away: 'J.R.R. Tolkien' and 'J. R. R. Tolkien' -> 'j r r tolkien'."""
+    text = normalize(text).replace("&", " and ")
+    return " ".join("".join(c if c.isalnum() else " " for c in text).split())
+
+def shingles(title: str, author: str, publisher: str) -> np.ndarray:
+    """Sorted unique byte trigrams, each packed into one integer (< 2**24)."""
+    text = " | ".join(canonical(part) for part in (title, author, publisher)).encode()
+    data = np.frombuffer(text.ljust(3), dtype=np.uint8).astype(np.uint64)
+    grams = (data[:-2] << np.uint64(16)) | (data[1:-1] << np.uint64(8)) | data[2:]
+    return np.unique(grams)
+
+def signatures(shingle_sets: list) -> np.ndarray:
+    """(books x NUM_PERM) MinHash signatures in one pass: every hash of every trigram, then a minimum per book."""
+    flat = np.concatenate(shingle_sets)
+    starts = np.cumsum([0] + [len(s) for s in shingle_sets[:-1]])
+    hashed = (_A * flat + _B) % np.uint64(PRIME)   # (NUM_PERM x trigrams); a*x < 2**55, no overflow
+    return np.minimum.reduceat(hashed, starts, axis=1).T.astype(np.uint32)
+
+def bucket_keys(signature_rows: np.ndarray) -> np.ndarray:
+    """(books x BANDS) LSH bucket keys as int64, ready for a BIGINT[] column."""
+    bands = signature_rows.astype(np.uint64).reshape(len(signature_rows), BANDS, ROWS)
+    # Multiplications wrap around mod 2**64, which is what we want from a hash
+    return (bands * _BAND_MULTIPLIERS).sum(axis=2, dtype=np.uint64).view(np.int64)
+
+def jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    overlap = len(np.intersect1d(a, b, assume_unique=True))
+    return overlap / (len(a) + len(b) - overlap)
+
+class Fingerprint(NamedTuple):
+    shingles: np.ndarray
+    signature: np.ndarray
+    buckets: list
+
+    @classmethod
+    def of(cls, title: str, author: str, publisher: str) -> "Fingerprint":
+        return cls.many([(title, author, publisher)])[0]
+
+    @classmethod
+    def many(cls, books: list) -> list:
+        """[(title, author, publisher), ...] -> fingerprints, hashed together."""
+        if not books:
+            return []
+        sets = [shingles(*book) for book in books]
+        rows = signatures(sets)
+        keys = bucket_keys(rows)
+        return [cls(sets[i], rows[i], keys[i].tolist()) for i in range(len(books))]
+
+class Match(NamedTuple):
+    book_uid: str
+    similarity: float
+
+# ==========================================
+# 2. Ingest (one indexed lookup per book)
+# ==========================================
+def find_duplicate(session: Session, fingerprint: Fingerprint, exclude=None) -> Optional[Match]:
+    """The most similar existing book at or above the threshold, or None."""
+    statement = (
+        select(Book.uid, Book.title, Book.author, Book.publisher)
+        .join(BookFingerprint, BookFingerprint.book_uid == Book.uid)
+        .where(BookFingerprint.buckets.overlap(fingerprint.buckets), Book.deleted_at.is_(None))
+    )
+    if exclude is not None:
+        statement = statement.where(Book.uid != exclude)
+
+    best = None
+    for row in session.exec(statement).all():
+        score = jaccard(fingerprint.shingles, shingles(row.title, row.author, row.publisher))
+        if score >= Config.DUPLICATE_BOOKS_THRESHOLD and (best is None or score > best.similarity):
+            best = Match(str(row.uid), round(score, 4))
+    return best
+
+def save_fingerprints(session: Session, rows: list):
+    """Upserts [{"book_uid", "buckets", "duplicate_of", "similarity"}, ...]. Does NOT commit."""
+    now = datetime.now()
+    for start in range(0, len(rows), 1000):
+        statement = insert(BookFingerprint).values([{**row, "updated_at": now} for row in rows[start:start + 1000]])
+        statement = statement.on_conflict_do_update(
+            index_elements=["book_uid"],
+            set_={name: statement.excluded[name] for name in ("buckets", "duplicate_of", "similarity", "updated_at")}
+        )
+        session.exec(statement)
+
+def book_fingerprinted(session: Session, book_uid, fingerprint: Fingerprint, match: Optional[Match] = None):
+    save_fingerprints(session, [{
+        "book_uid": book_uid,
+        "buckets": fingerprint.buckets,
+        "duplicate_of": match.book_uid if match else None,
+        "similarity": match.similarity if match else None,
+    }])
+
+# ==========================================
+# 3. Whole-Catalogue Pass
+# ==========================================
+def dedupe_catalogue(session: Session, merge: bool = False, chunk_size: int = 1000) -> dict:
+    """
+    One pass over the books, oldest first, with no pairwise comparison: a book is only
+    compared with the oldest book in each of its LSH buckets, so the work grows with
+    the number of books. The older book of a pair is kept as the original.
+
+    Recomputes every fingerprint and duplicate_of flag. With `merge`, duplicates'
+    reviews are moved to the original and the duplicates deleted.
+
+    Similarity here is estimated from the signatures (the share of equal MinHash
+    values, within ~0.05 at 64 hashes) so that no trigram sets are kept in memory.
+    """
+    statement = (
+        select(Book.uid, Book.title, Book.author, Book.publisher)
+        .where(Book.deleted_at.is_(None))
+        .order_by(Book.created_at, Book.uid)
+        .execution_options(yield_per=chunk_size)
+    )
+    originals = {}      # bucket key -> index of the oldest original in it
+    uids, kept = [], []  # per book seen; signatures only of originals
+    duplicates = {}      # duplicate uid -> (original uid, similarity)
+
+    result = session.exec(statement)
+    for chunk in result.partitions(chunk_size):
+        fingerprints = Fingerprint.many([(row.title, row.author, row.publisher) for row in chunk])
+        rows = []
+        for row, fingerprint in zip(chunk, fingerprints):
+            index = len(uids)
+            uids.append(str(row.uid))
+
+            best = None
+            for candidate in {originals.get(key) for key in fingerprint.buckets} - {None}:
+                score = float(np.mean(kept[candidate] == fingerprint.signature))
+                if score >= Config.DUPLICATE_BOOKS_THRESHOLD and (best is None or score > best.similarity):
+                    best = Match(uids[candidate], round(score, 4))
+
+            if best:
+                duplicates[uids[index]] = best
+                kept.append(None)
+            else:
+                kept.append(fingerprint.signature)
+                for key in fingerprint.buckets:
+                    originals.setdefault(key, index)
+
+            rows.append({
+                "book_uid": row.uid,
+                "buckets": fingerprint.buckets,
+                "duplicate_of": best.book_uid if best else None,
+                "similarity": best.similarity if best else None,
+            })
+        save_fingerprints(session, rows)
+    session.commit()
+
+    merged = merge_duplicates(session, duplicates) if merge else 0
+    logger.info(f"Dedupe: {len(uids)} books, {len(duplicates)} duplicates, {merged} merged")
+    return {"books": len(uids), "duplicates": len(duplicates), "merged": merged}
+
+def merge_duplicates(session: Session, duplicates: dict) -> int:
+    """Moves each duplicate's reviews to its original, then deletes the duplicate."""
+    from sqlmodel import update
+    from db.models import Review
+    from .read_model import book_changed
+    from .service import BookService
+
+    book_service = BookService()
+    merged = 0
+    for duplicate_uid, original in duplicates.items():
+        original_uid = uuid.UUID(original.book_uid)
+        session.exec(
+            update(Review)
+            .where(Review.book_uid == uuid.UUID(duplicate_uid))
+            .values(book_uid=original_uid)
+        )
+        book_changed(session, original_uid)
+        # Facets, autocomplete and the commit go through the normal delete path
+        book_service.delete_book(duplicate_uid, session)
+        merged += 1
+    return merged
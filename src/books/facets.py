@@ -0,0 +1,91 @@
+"""
+Facet counts for the book browse sidebar.
+
+`book_facets` holds one row per (facet, value) with the number of books that have
+it. BookService adjusts the rows in the same transaction as every book write, so
+the sidebar is a single indexed read instead of a GROUP BY over `books`.
+"""
+from sqlmodel import Session, select, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from collections import Counter
+from db.models import Book, BookFacet
+
+# (lower bound, label); a book lands in the last range whose bound it reaches
+PAGE_RANGES = [(0, "<100"), (100, "100-299"), (300, "300-499"), (500, "500+")]
+
+def page_range(page_count: int) -> str:
+    label = PAGE_RANGES[0][1]
+    for lower, name in PAGE_RANGES:
+        if page_count >= lower:
+            label = name
+    return label
+
+# Facet name -> how to read its value from a book (anything with these attributes)
+FACETS = {
+    "language": lambda book: book.language,
+    "publisher": lambda book: book.publisher,
+    "author": lambda book: book.author,
+    "published_decade": lambda book: f"{book.published_date.year // 10 * 10}s",
+    "page_range": lambda book: page_range(book.page_count),
+}
+# Columns a write has to return so the facets can be adjusted
+FACET_COLUMNS = ["language", "publisher", "author", "published_date", "page_count"]
+
+def facet_values(book) -> list:
+    return [(facet, value_of(book)) for facet, value_of in FACETS.items()]
+
+def facet_changes(old=None, new=None) -> Counter:
+    """
+    Count deltas for a write: +1 for the new book's values, -1 for the old one's.
+    Values that didn't change cancel out and are dropped.
+    """
+    changes = Counter()
+    if old is not None:
+        changes.subtract(facet_values(old))
+    if new is not None:
+        changes.update(facet_values(new))
+    return Counter({key: delta for key, delta in changes.items() if delta})
+
+def apply_facet_changes(session: Session, changes: Counter):
+    """Upserts the deltas. Does NOT commit: it rides on the book write's transaction."""
+    # Always the same row order, so two writers can't lock each other's rows crosswise
+    rows = [{"facet": facet, "value": value, "book_count": delta} for (facet, value), delta in sorted(changes.items())]
+    for start in range(0, len(rows), 1000):
+        statement = insert(BookFacet).values(rows[start:start + 1000])
+        statement = statement.on_conflict_do_update(
+            index_elements=["facet", "value"],
+            set_={"book_count": BookFacet.book_count + statement.excluded.book_count}
+        )
+        session.exec(statement)
+
+def get_facet_counts(session: Session, limit: int) -> dict:
+    """{facet: [{"value": ..., "count": ...}, ...]} with each facet's most common values first."""
+    rank = func.row_number().over(
+        partition_by=BookFacet.facet,
+        order_by=(BookFacet.book_count.desc(), BookFacet.value)
+    ).label("rank")
+    ranked = (
+        select(BookFacet.facet, BookFacet.value, BookFacet.book_count, rank)
+        .where(BookFacet.book_count > 0)
+        .subquery()
+    )
+    statement = select(ranked.c.facet, ranked.c.value, ranked.c.book_count).where(ranked.c.rank <= limit).order_by(ranked.c.facet, ranked.c.rank)
+
+    facets = {facet: [] for facet in FACETS}
+    for facet, value, count in session.exec(statement):
+        if facet in facets:
+            facets[facet].append({"value": value, "count": count})
+    return facets
+
+def rebuild_facets(session: Session) -> int:
+    """Recounts every facet from the books table (recovery / after bulk imports)."""
+    columns = [getattr(Book, name) for name in FACET_COLUMNS]
+    counts = Counter()
+    statement = select(*columns).where(Book.deleted_at.is_(None)).execution_options(yield_per=10000)
+    for book in session.exec(statement):
+        counts.update(facet_values(book))
+
+    session.exec(delete(BookFacet))
+    apply_facet_changes(session, counts)
+    session.commit()
+    return len(counts)
@@ -0,0 +1,39 @@
+"""
+Filter query builder for browsing books.
+
+Every filter maps onto an index on `books` (see the Book model): language, publisher
+and author are (column, created_at) composites so the newest-first list needs no
+sort step, and the two ranges use plain btree indexes.
+"""
+from db.models import Book
+from .schemas import BookFilterModel
+
+def equals_any(column, values: list):
+    # A single value compiles to "=", which the planner handles best
+    return column == values[0] if len(values) == 1 else column.in_(values)
+
+def book_filter_conditions(filters: BookFilterModel) -> list:
+    conditions = []
+    if filters.language:
+        conditions.append(equals_any(Book.language, filters.language))
+    if filters.publisher:
+        conditions.append(equals_any(Book.publisher, filters.publisher))
+    if filters.author:
+        conditions.append(equals_any(Book.author, filters.author))
+    if filters.published_from is not None:
+        conditions.append(Book.published_date >= filters.published_from)
+    if filters.published_to is not None:
+        conditions.append(Book.published_date <= filters.published_to)
+    if filters.min_pages is not None:
+        conditions.append(Book.page_count >= filters.min_pages)
+    if filters.max_pages is not None:
+        conditions.append(Book.page_count <= filters.max_pages)
+    return conditions
+
+def apply_book_filters(statement, filters: BookFilterModel = None):
+    # Deleted books wait for their purge job; they're never listed
+    statement = statement.where(Book.deleted_at.is_(None))
+    if filters is None:
+        return statement
+    conditions = book_filter_conditions(filters)
+    return statement.where(*conditions) if conditions else statement
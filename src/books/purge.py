@@ -0,0 +1,81 @@
+"""
+Deleting a book, second half.
+
+`BookService.delete_book` only sets `deleted_at` (every read filters on it), takes
+the book out of the facet counts, its detail document, autocomplete and the
+leaderboards, and queues `purge_book` through the outbox. This job then removes
+what's left without ever holding many locks at once:
+
+1. Reviews, BOOK_PURGE_BATCH_SIZE at a time, each batch its own short transaction.
+2. The book row, with the last stragglers (a review written mid-purge) in the same
+   transaction. The FK cascade takes book_details, book_stats, book_similarities
+   and book_fingerprints with it.
+3. The detail documents of books that listed it as similar, so they stop
+   showing it.
+
+Safe to run twice: a second run finds nothing left to delete.
+"""
+from sqlmodel import Session, select, delete
+from sqlalchemy import tuple_
+import logging
+import time
+import uuid
+from config import Config
+from db.models import Book, Review, BookSimilarity
+from .read_model import refresh_book_details
+
+logger = logging.getLogger(__name__)
+
+def delete_review_batch(session: Session, book_uid: uuid.UUID) -> int:
+    # (uid, created_at) is the partitioned primary key, so each delete goes straight to its partition
+    batch = (
+        select(Review.uid, Review.created_at)
+        .where(Review.book_uid == book_uid)
+        .limit(Config.BOOK_PURGE_BATCH_SIZE)
+    )
+    statement = (
+        delete(Review)
+        .where(tuple_(Review.uid, Review.created_at).in_(batch))
+        .returning(Review.uid)
+    )
+    return len(session.exec(statement).all())
+
+def purge_book(book_uid: str) -> int:
+    """Removes a deleted book's reviews and then the book. Returns the number of reviews removed."""
+    from db.main import engine
+    book_uid_obj = uuid.UUID(book_uid)
+
+    with Session(engine) as session:
+        # Just the flag: loading the Book would pull in every review through the selectin loader
+        book = session.exec(select(Book.uid, Book.deleted_at).where(Book.uid == book_uid_obj)).first()
+        if book is None:
+            return 0  # already purged
+        if book.deleted_at is None:
+            logger.error(f"Refusing to purge book {book_uid}: it isn't marked deleted")
+            return 0
+
+        removed = 0
+        while True:
+            count = delete_review_batch(session, book_uid_obj)
+            session.commit()
+            removed += count
+            if count < Config.BOOK_PURGE_BATCH_SIZE:
+                break
+            # Leave room for the requests sharing these tables
+            time.sleep(Config.BOOK_PURGE_PAUSE_SECONDS)
+
+        # Books whose stored neighbours include this one (the JSONB containment uses no index,
+        # but it runs once per purge, in the worker)
+        neighbours = session.exec(
+            select(BookSimilarity.book_uid).where(BookSimilarity.similar.contains([{"uid": book_uid}]))
+        ).all()
+
+        # Locking the book blocks new reviews (their FK check needs a share lock on it)
+        session.exec(select(Book.uid).where(Book.uid == book_uid_obj).with_for_update())
+        removed += len(session.exec(delete(Review).where(Review.book_uid == book_uid_obj).returning(Review.uid)).all())
+        session.exec(delete(Book).where(Book.uid == book_uid_obj))
+        refresh_book_details(session, [uid for uid in neighbours if uid != book_uid_obj])
+        session.commit()
+
+    logger.info(f"Purged book {book_uid}: {removed} reviews removed, {len(neighbours)} neighbours refreshed")
+    return removed
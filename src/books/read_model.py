@@ -0,0 +1,92 @@
+"""
+Book-detail read model.
+
+`book_details` keeps one JSONB document per book with everything the detail page
+shows: the book's fields, its most recent reviews, the review count and average
+rating, and its similar books. `GET /api/v1/books/{book_uid}` reads that one row by
+primary key instead of joining books, reviews and similarities on every request.
+
+Writes keep it current. BookService and ReviewService call `book_changed()` in the
+same transaction as the change, so a committed write is never missing from the
+document. The similarity job refreshes the books it rescored, and
+`python manage.py rebuild-book-details` regenerates the whole table.
+"""
+from sqlmodel import Session, select
+from sqlalchemy import text, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from config import Config
+from db.models import Book, BookDetail
+
+# The whole document in one statement. Lateral subqueries keep every part scoped to
+# its book, so the same SQL serves one book or a batch of thousands.
+DOCUMENT_SQL = """
+INSERT INTO book_details (book_uid, document, updated_at)
+SELECT
+    b.uid,
+    (to_jsonb(b) - 'user_uid') || jsonb_build_object(
+        'reviews', COALESCE(recent.reviews, '[]'::jsonb),
+        'review_count', stats.review_count,
+        'average_rating', stats.average_rating,
+        'similar_books', COALESCE(similar.books, '[]'::jsonb)
+    ),
+    now()
+FROM books b
+CROSS JOIN LATERAL (
+    SELECT count(*) AS review_count, round(avg(r.rating), 2) AS average_rating
+    FROM reviews r
+    WHERE r.book_uid = b.uid
+) stats
+LEFT JOIN LATERAL (
+    SELECT jsonb_agg(to_jsonb(r) ORDER BY r.created_at DESC) AS reviews
+    FROM (
+        SELECT * FROM reviews
+        WHERE reviews.book_uid = b.uid
+        ORDER BY created_at DESC
+        LIMIT :recent_reviews
+    ) r
+) recent ON true
+LEFT JOIN LATERAL (
+    SELECT jsonb_agg(
+        jsonb_build_object('uid', sb.uid, 'title', sb.title, 'author', sb.author, 'score', (n.item ->> 'score')::float)
+        ORDER BY n.position
+    ) AS books
+    FROM book_similarities s
+    CROSS JOIN LATERAL jsonb_array_elements(s.similar) WITH ORDINALITY AS n(item, position)
+    JOIN books sb ON sb.uid = (n.item ->> 'uid')::uuid AND sb.deleted_at IS NULL
+    WHERE s.book_uid = b.uid AND n.position <= :similar_books
+) similar ON true
+WHERE b.uid = ANY(:book_uids) AND b.deleted_at IS NULL
+ON CONFLICT (book_uid) DO UPDATE
+SET document = excluded.document, updated_at = excluded.updated_at
+"""
+
+refresh_statement = text(DOCUMENT_SQL).bindparams(
+    bindparam("book_uids", type_=ARRAY(UUID(as_uuid=False)))
+)
+
+def refresh_book_details(session: Session, book_uids: list):
+    """Rebuilds the documents of these books. Does NOT commit."""
+    for start in range(0, len(book_uids), 1000):
+        session.exec(refresh_statement, params={
+            "book_uids": [str(book_uid) for book_uid in book_uids[start:start + 1000]],
+            "recent_reviews": Config.BOOK_DETAIL_RECENT_REVIEWS,
+            "similar_books": Config.BOOK_DETAIL_SIMILAR_BOOKS,
+        })
+
+def book_changed(session: Session, book_uid):
+    """
+    The write event: call it after changing a book or its reviews, before committing.
+    Locking the document first makes concurrent writers to the same book take turns,
+    so the second one rebuilds from a snapshot that includes the first one's change.
+    """
+    session.flush()
+    session.exec(select(BookDetail.book_uid).where(BookDetail.book_uid == book_uid).with_for_update())
+    refresh_book_details(session, [book_uid])
+
+def rebuild_book_details(session: Session) -> int:
+    """Regenerates every document from the source tables (recovery / after bulk imports)."""
+    book_uids = session.exec(select(Book.uid).where(Book.deleted_at.is_(None))).all()
+    for start in range(0, len(book_uids), 1000):
+        refresh_book_details(session, book_uids[start:start + 1000])
+        session.commit()
+    return len(book_uids)
@@ -1,13 +1,22 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Body, Depends, Query, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlmodel import Session
-from typing import List
+from typing import Annotated, Dict, List, Literal
 import uuid
-from db.main import get_session
+from db.main import get_session, get_read_session, SessionReleasingRoute
 from .service import BookService
-from .schemas import Book, BookCreateModel, BookUpdateModel, BookDetailModel
-from auth.dependencies import access_token_bearer, RoleChecker, AccessTokenBearer
+from .autocomplete import autocomplete_index, MAX_SUGGESTIONS
+from .views import view_counter
+from .schemas import Book, BookCreateModel, BookUpdateModel, BookDetailModel, BookFilterModel, FacetValueModel, SimilarBookModel, RankedBookModel, BookSuggestionModel, BookImportResultModel
+from config import Config
+from fieldsets import select_fields, serialize, FieldSelection
+from reviews.schemas import ReviewModel
+from reviews.stream import review_broadcaster, review_events
+import leaderboards
+from auth.dependencies import access_token_bearer, RoleChecker, AccessTokenBearer, record_user_write
 
-book_router = APIRouter()
+# Sessions go back to the pool when the route returns, before the response is serialized
+book_router = APIRouter(route_class=SessionReleasingRoute)
 book_service = BookService()
 role_checker = RoleChecker(["admin", "user"])
 admin_role_checker = RoleChecker(["admin"])
@@ -16,12 +25,55 @@ admin_role_checker = RoleChecker(["admin"])
 error_404 = {404: {"description": "Book not found"}}
 error_401 = {401: {"description": "Not authenticated"}}
 error_403 = {403: {"description": "Not authorized"}}
+error_409 = {409: {"description": "Near-duplicate of an existing book (when DUPLICATE_BOOKS_ACTION=reject)"}}
+
+# ?fields=uid,title (and ?include=reviews on the detail route)
+book_fields = select_fields(Book)
+book_detail_fields = select_fields(BookDetailModel, includes={"reviews": ReviewModel, "similar_books": SimilarBookModel})
 
 @book_router.get("/", response_model=List[Book])
-def get_all_books(session: Session = Depends(get_session)):
-    return book_service.get_all_books(session)
+def get_all_books(
+    filters: Annotated[BookFilterModel, Query()],
+    selection: FieldSelection = Depends(book_fields),
+    session: Session = Depends(get_read_session)
+):
+    if selection.is_sparse:
+        rows = book_service.get_all_books_fields(selection, session, filters)
+        return JSONResponse([serialize(Book, row, selection.fields) for row in rows])
+    return book_service.get_all_books(session, filters)
+
+# Declared before "/{book_uid}" so "facets", "autocomplete", "top" and "trending" aren't parsed as a uid
+@book_router.get("/facets", response_model=Dict[str, List[FacetValueModel]])
+def get_book_facets(session: Session = Depends(get_read_session)):
+    # Catalogue-wide counts for the filter sidebar, e.g. {"language": [{"value": "English", "count": 42}]}
+    return book_service.get_facets(session, Config.FACET_VALUE_LIMIT)
+
+@book_router.get("/autocomplete", response_model=List[BookSuggestionModel])
+async def autocomplete_books(
+    prefix: str = Query(min_length=1, max_length=100),
+    limit: int = Query(default=10, ge=1, le=MAX_SUGGESTIONS)
+):
+    # Answered from this worker's in-memory index: no database round-trip per keystroke
+    return autocomplete_index.search(prefix, limit)
 
-@book_router.post("/", status_code=status.HTTP_201_CREATED, response_model=Book, dependencies=[Depends(role_checker)], responses={**error_401, **error_403})
+@book_router.get("/top", response_model=List[RankedBookModel])
+def get_top_rated_books(
+    limit: int = Query(default=10, ge=1, le=100),
+    session: Session = Depends(get_read_session)
+):
+    # score = Bayesian average rating, kept up to date in Redis on every review write
+    return book_service.get_ranked_books(leaderboards.top_rated(limit), session)
+
+@book_router.get("/trending", response_model=List[RankedBookModel])
+def get_trending_books(
+    window: Literal["24h", "7d"] = "24h",
+    limit: int = Query(default=10, ge=1, le=100),
+    session: Session = Depends(get_read_session)
+):
+    # score = number of reviews written in the window
+    return book_service.get_ranked_books(leaderboards.trending(window, limit), session)
+
+@book_router.post("/", status_code=status.HTTP_201_CREATED, response_model=Book, dependencies=[Depends(role_checker), Depends(record_user_write)], responses={**error_401, **error_403, **error_409})
 def create_book(
     book_data: BookCreateModel, 
     session: Session = Depends(get_session),
@@ -30,11 +82,56 @@ def create_book(
     user_uid = user_details['user']['user_uid']
     return book_service.create_book(book_data, user_uid, session)
 
+@book_router.post("/import", response_model=BookImportResultModel, dependencies=[Depends(admin_role_checker), Depends(record_user_write)], responses={**error_401, **error_403})
+def import_books(
+    books: List[BookCreateModel] = Body(max_length=Config.BOOK_IMPORT_MAX_BATCH),
+    session: Session = Depends(get_session),
+    user_details = Depends(access_token_bearer)
+):
+    # Near-duplicates (of the catalogue or of each other) are merged instead of created
+    user_uid = user_details['user']['user_uid']
+    return book_service.import_books(books, user_uid, session)
+
 @book_router.get("/{book_uid}", response_model=BookDetailModel, responses=error_404)
-def get_book(book_uid: uuid.UUID, session: Session = Depends(get_session)):
-    return book_service.get_book(str(book_uid), session)
+def get_book(
+    book_uid: uuid.UUID,
+    selection: FieldSelection = Depends(book_detail_fields),
+    session: Session = Depends(get_read_session)
+):
+    # One primary-key read of the precomputed document (book, recent reviews, similar books)
+    detail = book_service.get_book_detail(str(book_uid), session)
+    # Counted in memory and written behind in batches, so this read stays a read
+    view_counter.record(str(book_uid))
 
-@book_router.patch("/{book_uid}", response_model=Book, dependencies=[Depends(role_checker)], responses={**error_404, **error_401, **error_403})
+    if selection.is_sparse:
+        # The document is already loaded, so ?fields= only trims the payload
+        return JSONResponse(detail.model_dump(mode="json", include=selection.model_include()))
+    return detail
+
+@book_router.get("/{book_uid}/similar", response_model=List[SimilarBookModel], responses=error_404)
+def get_similar_books(
+    book_uid: uuid.UUID,
+    limit: int = Query(default=10, ge=1, le=Config.SIMILAR_BOOKS_TOP_K),
+    session: Session = Depends(get_read_session)
+):
+    # "Readers who reviewed this also reviewed", refreshed in the background by Celery
+    return book_service.get_similar_books(str(book_uid), session, limit=limit)
+
+@book_router.get(
+    "/{book_uid}/reviews/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}, "description": "One `review` event per new review"}, 503: {"description": "Too many open streams"}}
+)
+async def stream_book_reviews(book_uid: uuid.UUID):
+    # Fed by Redis pub/sub: no session, so an open page never touches the database
+    review_broadcaster.check_capacity()
+    return StreamingResponse(
+        review_events(str(book_uid)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@book_router.patch("/{book_uid}", response_model=Book, dependencies=[Depends(role_checker), Depends(record_user_write)], responses={**error_404, **error_401, **error_403})
 def update_book(
     book_uid: uuid.UUID, 
     update_data: BookUpdateModel, 
@@ -43,7 +140,7 @@ def update_book(
 ):
     return book_service.update_book(str(book_uid), update_data, session)
 
-@book_router.delete("/{book_uid}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(admin_role_checker)], responses={**error_404, **error_401, **error_403})
+@book_router.delete("/{book_uid}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(admin_role_checker), Depends(record_user_write)], responses={**error_404, **error_401, **error_403})
 def delete_book(
     book_uid: uuid.UUID, 
     session: Session = Depends(get_session),
@@ -55,7 +152,13 @@ def delete_book(
 @book_router.get("/user/{user_uid}", response_model=List[Book], responses={**error_401})
 def get_books_by_user_uid(
     user_uid: uuid.UUID, 
-    session: Session = Depends(get_session),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    selection: FieldSelection = Depends(book_fields),
+    session: Session = Depends(get_read_session),
     user_details = Depends(access_token_bearer)
 ):
-    return book_service.get_user_books(str(user_uid), session)
\ No newline at end of file
+    if selection.is_sparse:
+        rows = book_service.get_user_books_fields(str(user_uid), selection, session, offset=offset, limit=limit)
+        return JSONResponse([serialize(Book, row, selection.fields) for row in rows])
+    return book_service.get_user_books(str(user_uid), session, offset=offset, limit=limit)
\ No newline at end of file
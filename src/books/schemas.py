@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict, field_serializer
+from pydantic import BaseModel, ConfigDict, Field, field_serializer, model_validator
 from typing import Optional, List
 from datetime import datetime, date
 import uuid
@@ -41,5 +41,53 @@ class BookUpdateModel(BaseModel):
     page_count: Optional[int] = None
     language: Optional[str] = None
 
+class BookFilterModel(BaseModel):
+    # Repeat a parameter to match any of several values: ?language=English&language=French
+    language: List[str] = []
+    publisher: List[str] = []
+    author: List[str] = []
+    published_from: Optional[date] = None
+    published_to: Optional[date] = None
+    min_pages: Optional[int] = Field(default=None, ge=0)
+    max_pages: Optional[int] = Field(default=None, ge=0)
+
+    @model_validator(mode="after")
+    def check_ranges(self):
+        if self.published_from and self.published_to and self.published_from > self.published_to:
+            raise ValueError("published_from must not be after published_to")
+        if self.min_pages is not None and self.max_pages is not None and self.min_pages > self.max_pages:
+            raise ValueError("min_pages must not be greater than max_pages")
+        return self
+
+class FacetValueModel(BaseModel):
+    value: str
+    count: int
+
+class BookSuggestionModel(BaseModel):
+    uid: uuid.UUID
+    title: str
+    author: str
+
+class RankedBookModel(BaseModel):
+    uid: uuid.UUID
+    title: str
+    author: str
+    score: float
+
+class SimilarBookModel(RankedBookModel):
+    score: float  # cosine similarity of the two books' readers, 0..1
+
+class MergedBookModel(BaseModel):
+    index: int             # position in the imported list
+    duplicate_of: uuid.UUID
+    similarity: float      # Jaccard similarity of title/author/publisher, 0..1
+
+class BookImportResultModel(BaseModel):
+    created: List[Book]
+    merged: List[MergedBookModel]
+
 class BookDetailModel(Book):
-    reviews: List[ReviewModel]
\ No newline at end of file
+    reviews: List[ReviewModel]  # the most recent ones, newest first
+    review_count: int = 0
+    average_rating: Optional[float] = None
+    similar_books: List[SimilarBookModel] = []
\ No newline at end of file
@@ -1,52 +1,241 @@
-from sqlmodel import Session, select, desc
+from sqlmodel import Session, select, desc, update, delete
+from sqlalchemy import lambda_stmt
+from sqlalchemy.orm import noload
 from datetime import datetime
-from db.models import Book
-from .schemas import BookCreateModel, BookUpdateModel
+from types import SimpleNamespace
+from db.models import Book, BookSimilarity, BookDetail
+from .schemas import BookCreateModel, BookUpdateModel, BookFilterModel, BookDetailModel, SimilarBookModel, RankedBookModel
+from .filters import apply_book_filters
+from .facets import FACET_COLUMNS, facet_changes, apply_facet_changes, get_facet_counts
 # 1. CRITICAL: Ensure this matches the class in src/errors.py
-from errors import BookNotFound 
+from errors import BookNotFound, DuplicateBook
+from . import autocomplete
+from .read_model import book_changed
+from config import Config
+from outbox import enqueue_task
+from tracing import traced
+import leaderboards
 import uuid
 
+# Hot lookup as a lambda statement. SQLAlchemy caches it by the lambda's code location,
+# so after the first call it skips building the select() and computing its cache key
+# and goes straight to the compiled SQL; `book_uid` is picked up as a bound parameter.
+def book_by_uid(book_uid: uuid.UUID):
+    return lambda_stmt(lambda: select(Book).where(Book.uid == book_uid, Book.deleted_at.is_(None)))
+
+@traced
 class BookService:
-    def get_all_books(self, session: Session):
-        statement = select(Book).order_by(desc(Book.created_at))
+    def get_all_books(self, session: Session, filters: BookFilterModel = None):
+        statement = apply_book_filters(select(Book), filters).order_by(desc(Book.created_at))
         return session.exec(statement).all()
 
-    def get_user_books(self, user_uid: str, session: Session):
-        statement = select(Book).where(Book.user_uid == uuid.UUID(user_uid))
+    def get_facets(self, session: Session, limit: int):
+        # Precomputed counts (see books/facets.py), no GROUP BY over books
+        return get_facet_counts(session, limit)
+
+    def get_user_books(self, user_uid: str, session: Session, offset: int = 0, limit: int = None):
+        # The Book schema has no reviews, so don't let the selectin loader fetch them
+        statement = (
+            select(Book)
+            .where(Book.user_uid == uuid.UUID(user_uid), Book.deleted_at.is_(None))
+            .options(noload(Book.reviews))
+            .order_by(desc(Book.created_at))
+            .offset(offset)
+            .limit(limit)
+        )
         return session.exec(statement).all()
 
     def create_book(self, book_data: BookCreateModel, user_uid: str, session: Session):
-        book_data_dict = book_data.model_dump()
-        new_book = Book(**book_data_dict)
-        new_book.user_uid = uuid.UUID(user_uid)
-        
-        session.add(new_book)
+        # Near-duplicates of an existing book are flagged or refused (see books/dedup.py).
+        # Imported here, like every use of it, so NumPy only loads once a book is written.
+        from .dedup import Fingerprint, find_duplicate
+        fingerprint = Fingerprint.of(book_data.title, book_data.author, book_data.publisher)
+        match = find_duplicate(session, fingerprint)
+        if match and Config.DUPLICATE_BOOKS_ACTION == "reject":
+            raise DuplicateBook(match.book_uid, match.similarity)
+
+        new_book = self._add_book(book_data, user_uid, fingerprint, match, session)
         session.commit()
         session.refresh(new_book)
+        autocomplete.book_saved(str(new_book.uid), new_book.title, new_book.author)
+        return new_book
+
+    def import_books(self, books: list, user_uid: str, session: Session):
+        """
+        Bulk create in one transaction. A near-duplicate of an existing book (or of one
+        earlier in the same batch) is merged: nothing is created and the existing book
+        is reported in its place.
+        """
+        from .dedup import Fingerprint, find_duplicate
+        fingerprints = Fingerprint.many([(book.title, book.author, book.publisher) for book in books])
+        created, merged = [], []
+        for index, (book_data, fingerprint) in enumerate(zip(books, fingerprints)):
+            # Earlier books of the batch are flushed with their fingerprints, so they count too
+            match = find_duplicate(session, fingerprint)
+            if match:
+                merged.append({"index": index, "duplicate_of": match.book_uid, "similarity": match.similarity})
+                continue
+            created.append(self._add_book(book_data, user_uid, fingerprint, None, session))
+
+        session.commit()
+        for book in created:
+            autocomplete.book_saved(str(book.uid), book.title, book.author)
+        return {"created": created, "merged": merged}
+
+    def _add_book(self, book_data: BookCreateModel, user_uid: str, fingerprint, match, session: Session):
+        from .dedup import book_fingerprinted
+        new_book = Book(**book_data.model_dump())
+        new_book.user_uid = uuid.UUID(user_uid)
+
+        session.add(new_book)
+        apply_facet_changes(session, facet_changes(new=new_book))
+        session.flush()  # assigns the uid
+        book_fingerprinted(session, new_book.uid, fingerprint, match)
+        book_changed(session, new_book.uid)
         return new_book
 
     def get_book(self, book_uid: str, session: Session):
-        statement = select(Book).where(Book.uid == uuid.UUID(book_uid))
-        book = session.exec(statement).first()
+        book = session.exec(book_by_uid(uuid.UUID(book_uid))).scalars().first()
         
         if not book:
             raise BookNotFound()
         return book
 
-    def update_book(self, book_uid: str, update_data: BookUpdateModel, session: Session):
+    def get_book_detail(self, book_uid: str, session: Session):
+        # The detail page is one precomputed document (see books/read_model.py)
+        detail = session.get(BookDetail, uuid.UUID(book_uid))
+        if detail:
+            return BookDetailModel.model_validate(detail.document)
+
+        # No document yet (e.g. a replica that hasn't caught up): build it the slow way
         book = self.get_book(book_uid, session)
-        
+        reviews = sorted(book.reviews, key=lambda review: review.created_at, reverse=True)
+        ratings = [review.rating for review in reviews]
+        return BookDetailModel.model_validate({
+            **book.model_dump(),
+            "reviews": [review.model_dump() for review in reviews[:Config.BOOK_DETAIL_RECENT_REVIEWS]],
+            "review_count": len(ratings),
+            "average_rating": round(sum(ratings) / len(ratings), 2) if ratings else None,
+            "similar_books": self.get_similar_books(book_uid, session, limit=Config.BOOK_DETAIL_SIMILAR_BOOKS),
+        })
+
+    # ==========================================
+    # Sparse fieldsets (?fields=...): only the requested columns are selected
+    # ==========================================
+    def get_all_books_fields(self, selection, session: Session, filters: BookFilterModel = None):
+        statement = apply_book_filters(selection.select(Book), filters).order_by(desc(Book.created_at))
+        return session.exec(statement).all()
+
+    def get_user_books_fields(self, user_uid: str, selection, session: Session, offset: int = 0, limit: int = None):
+        statement = (
+            selection.select(Book)
+            .where(Book.user_uid == uuid.UUID(user_uid), Book.deleted_at.is_(None))
+            .order_by(desc(Book.created_at))
+            .offset(offset)
+            .limit(limit)
+        )
+        return session.exec(statement).all()
+
+    def get_similar_books(self, book_uid: str, session: Session, limit: int = None):
+        # Precomputed by the similarity job: one primary-key lookup, then the books themselves.
+        # A deleted or unknown book is a 404 like in get_book, checked on the uid alone
+        # (book_by_uid would load every review through the selectin loader).
+        book_uid_obj = uuid.UUID(book_uid)
+        book = session.exec(select(Book.uid).where(Book.uid == book_uid_obj, Book.deleted_at.is_(None))).first()
+        if not book:
+            raise BookNotFound()
+
+        similarity = session.get(BookSimilarity, book_uid_obj)
+        if not similarity:
+            return []
+
+        neighbours = [(n["uid"], n["score"]) for n in similarity.similar[:limit]]
+        return self.get_ranked_books(neighbours, session, model=SimilarBookModel)
+
+    def get_ranked_books(self, ranking: list, session: Session, model=RankedBookModel):
+        """Turns [(book_uid, score), ...] into ranked books in one query, keeping the order."""
+        if not ranking:
+            return []
+        statement = select(Book.uid, Book.title, Book.author).where(
+            Book.uid.in_([uuid.UUID(book_uid) for book_uid, _ in ranking]),
+            Book.deleted_at.is_(None)
+        )
+        books = {str(row.uid): row for row in session.exec(statement)}
+        # Skip books deleted since the ranking was computed
+        return [
+            model(uid=book_uid, title=books[book_uid].title, author=books[book_uid].author, score=score)
+            for book_uid, score in ranking if book_uid in books
+        ]
+
+    def update_book(self, book_uid: str, update_data: BookUpdateModel, session: Session):
+        # One round-trip: UPDATE ... RETURNING gives us the new row (or nothing if it doesn't exist)
         book_data = update_data.model_dump(exclude_unset=True)
-        for key, value in book_data.items():
-            setattr(book, key, value)
-            
-        session.add(book)
+        book_uid_obj = uuid.UUID(book_uid)
+
+        if not any(name in book_data for name in FACET_COLUMNS):
+            statement = (
+                update(Book)
+                .where(Book.uid == book_uid_obj, Book.deleted_at.is_(None))
+                .values(**book_data, updated_at=datetime.now())
+                .returning(Book)
+                .options(noload(Book.reviews))
+            )
+            book = session.exec(statement).scalars().first()
+            if not book:
+                raise BookNotFound()
+        else:
+            # The facet counts need the values being replaced. Updating FROM a locked
+            # snapshot of the row returns old and new side by side, still in one statement.
+            old = (
+                select(Book.uid, *(getattr(Book, name) for name in FACET_COLUMNS))
+                .where(Book.uid == book_uid_obj, Book.deleted_at.is_(None))
+                .with_for_update()
+                .subquery("old")
+            )
+            statement = (
+                update(Book)
+                .where(Book.uid == old.c.uid)
+                .values(**book_data, updated_at=datetime.now())
+                .returning(Book, *(old.c[name].label(f"old_{name}") for name in FACET_COLUMNS))
+                .options(noload(Book.reviews))
+            )
+            row = session.exec(statement).first()
+            if not row:
+                raise BookNotFound()
+            book = row[0]
+            previous = SimpleNamespace(**{name: row._mapping[f"old_{name}"] for name in FACET_COLUMNS})
+            apply_facet_changes(session, facet_changes(old=previous, new=book))
+
+        if {"title", "author", "publisher"} & book_data.keys():
+            from .dedup import Fingerprint, find_duplicate, book_fingerprinted
+            fingerprint = Fingerprint.of(book.title, book.author, book.publisher)
+            book_fingerprinted(session, book.uid, fingerprint, find_duplicate(session, fingerprint, exclude=book.uid))
+        book_changed(session, book.uid)
         session.commit()
-        session.refresh(book)
+        autocomplete.book_saved(str(book.uid), book.title, book.author)
         return book
 
     def delete_book(self, book_uid: str, session: Session):
-        book = self.get_book(book_uid, session)
-        session.delete(book)
+        # Only marks the book deleted, which hides it from every read straight away.
+        # Its reviews and the book row are removed by a Celery job in small batches
+        # (see books/purge.py), so a book with thousands of reviews deletes as fast
+        # as one with none.
+        book_uid_obj = uuid.UUID(book_uid)
+        statement = (
+            update(Book)
+            .where(Book.uid == book_uid_obj, Book.deleted_at.is_(None))
+            .values(deleted_at=datetime.now())
+            .returning(Book.uid, *(getattr(Book, name) for name in FACET_COLUMNS))
+        )
+        deleted = session.exec(statement).first()
+
+        if not deleted:
+            raise BookNotFound()
+        apply_facet_changes(session, facet_changes(old=deleted))
+        session.exec(delete(BookDetail).where(BookDetail.book_uid == book_uid_obj))
+        # Same transaction: the purge is queued if and only if the delete commits
+        enqueue_task(session, "purge_book", {"book_uid": book_uid}, dedup_key=f"purge-book:{book_uid}")
         session.commit()
+        autocomplete.book_deleted(book_uid)
+        leaderboards.book_removed(book_uid)
         return True
\ No newline at end of file
@@ -0,0 +1,182 @@
+"""
+"Readers who reviewed this also reviewed" recommendations.
+
+Runs in the Celery worker, never in a request. Every review is one entry in a sparse
+user x book matrix; the similarity of two books is the cosine of their columns, i.e.
+how many readers they share relative to how many readers each has. The top-K
+neighbours of each book are written to `book_similarities`, so the API only has to
+read one row.
+"""
+from sqlmodel import Session, select, delete
+from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime
+import logging
+import numpy as np
+import scipy.sparse as sp
+from config import Config
+from db.main import engine
+from db.models import Review, BookSimilarity
+from .read_model import refresh_book_details
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_KEY = "similar_books:watermark"
+LOCK_KEY = "similar_books:lock"
+
+# ==========================================
+# 1. Matrix Maths (pure NumPy / SciPy)
+# ==========================================
+def build_matrix(pairs):
+    """
+    Turns (user_uid, book_uid) pairs into a binary CSC matrix (users x books).
+    Returns the matrix and the book uid of every column.
+    """
+    user_index, book_index = {}, {}
+    rows, cols = [], []
+    for user_uid, book_uid in pairs:
+        rows.append(user_index.setdefault(user_uid, len(user_index)))
+        cols.append(book_index.setdefault(book_uid, len(book_index)))
+
+    data = np.ones(len(rows), dtype=np.float32)
+    matrix = sp.csc_matrix(
+        (data, (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64))),
+        shape=(len(user_index), len(book_index))
+    )
+    # Duplicate pairs were summed on construction; a reader counts once per book
+    matrix.data[:] = 1.0
+    return matrix, list(book_index)
+
+def normalize_columns(matrix):
+    """Scales every column to unit length so a dot product is the cosine similarity."""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    norms[norms == 0] = 1.0
+    return (matrix @ sp.diags(1.0 / norms)).tocsc()
+
+def top_k_similar(normalized, targets, k: int, batch_size: int):
+    """
+    Yields (column, [(other_column, score), ...]) for every target column, best first.
+    Scores are computed `batch_size` columns at a time: one sparse product gives a
+    whole block of similarity rows, so memory stays bounded by the batch.
+    """
+    targets = np.asarray(targets, dtype=np.int64)
+    transposed = normalized.T.tocsr()
+    for start in range(0, len(targets), batch_size):
+        batch = targets[start:start + batch_size]
+        scores = (transposed[batch] @ normalized).tocsr()
+
+        for row, column in enumerate(batch):
+            begin, end = scores.indptr[row], scores.indptr[row + 1]
+            others = scores.indices[begin:end]
+            values = scores.data[begin:end]
+
+            keep = others != column  # a book is not its own recommendation
+            others, values = others[keep], values[keep]
+            if len(values) > k:
+                best = np.argpartition(values, -k)[-k:]
+                others, values = others[best], values[best]
+            order = np.argsort(-values, kind="stable")
+            yield int(column), [(int(others[i]), float(values[i])) for i in order]
+
+def affected_columns(matrix, changed_columns):
+    """
+    Columns whose top-K can change when `changed_columns` change: the changed books
+    themselves plus every book that shares at least one reader with them.
+    """
+    if len(changed_columns) == 0:
+        return np.array([], dtype=np.int64)
+    readers = np.unique(matrix[:, changed_columns].tocoo().row)
+    neighbours = np.unique(matrix.tocsr()[readers].tocoo().col)
+    return np.union1d(neighbours, changed_columns)
+
+# ==========================================
+# 2. The Job
+# ==========================================
+def load_review_pairs(session: Session):
+    statement = (
+        select(Review.user_uid, Review.book_uid)
+        .where(Review.user_uid.is_not(None), Review.book_uid.is_not(None))
+        .execution_options(yield_per=10000)
+    )
+    return ((str(user_uid), str(book_uid)) for user_uid, book_uid in session.exec(statement))
+
+def changed_books(session: Session, since: datetime) -> set:
+    statement = (
+        select(Review.book_uid)
+        .where(Review.updated_at > since, Review.book_uid.is_not(None))
+        .distinct()
+    )
+    return {str(book_uid) for book_uid in session.exec(statement)}
+
+def save_similarities(session: Session, results, book_uids: list, computed_at: datetime):
+    rows = [
+        {
+            "book_uid": book_uids[column],
+            "similar": [{"uid": book_uids[other], "score": round(score, 6)} for other, score in neighbours],
+            "computed_at": computed_at,
+        }
+        for column, neighbours in results
+    ]
+    for start in range(0, len(rows), 1000):
+        statement = insert(BookSimilarity).values(rows[start:start + 1000])
+        statement = statement.on_conflict_do_update(
+            index_elements=["book_uid"],
+            set_={"similar": statement.excluded.similar, "computed_at": statement.excluded.computed_at}
+        )
+        session.exec(statement)
+    # The detail documents embed the neighbours, so they go stale with them
+    refresh_book_details(session, [row["book_uid"] for row in rows])
+    return len(rows)
+
+def refresh_similar_books(full: bool = False) -> int:
+    """
+    Recomputes stored neighbours and returns how many books were written.
+
+    Incremental runs only rescore books touched by reviews created or edited since
+    the last run (plus the books sharing readers with them). Deleted reviews leave
+    no trace to detect, so the nightly full rebuild picks those up.
+    """
+    from db.redis import get_sync_redis
+    redis = get_sync_redis()
+
+    # Two overlapping runs would only waste the worker's time
+    lock = redis.lock(LOCK_KEY, timeout=3600, blocking=False)
+    if not lock.acquire():
+        logger.info("Similar books refresh already running, skipping")
+        return 0
+
+    try:
+        # Taken before reading, so reviews written while we compute land in the next run
+        started_at = datetime.now()
+        watermark = None if full else redis.get(WATERMARK_KEY)
+
+        with Session(engine) as session:
+            matrix, book_uids = build_matrix(load_review_pairs(session))
+            if watermark is None:
+                targets = np.arange(len(book_uids))
+            else:
+                changed = changed_books(session, datetime.fromisoformat(watermark))
+                column_of = {uid: i for i, uid in enumerate(book_uids)}
+                targets = affected_columns(matrix, [column_of[uid] for uid in changed if uid in column_of])
+
+            results = top_k_similar(
+                normalize_columns(matrix),
+                targets,
+                k=Config.SIMILAR_BOOKS_TOP_K,
+                batch_size=Config.SIMILAR_BOOKS_BATCH_SIZE
+            )
+            written = save_similarities(session, results, book_uids, started_at)
+            if watermark is None:
+                # Books that no longer have any reviews keep no neighbours
+                dropped = session.exec(
+                    delete(BookSimilarity)
+                    .where(BookSimilarity.computed_at < started_at)
+                    .returning(BookSimilarity.book_uid)
+                ).scalars().all()
+                refresh_book_details(session, dropped)
+            session.commit()
+
+        redis.set(WATERMARK_KEY, started_at.isoformat())
+        logger.info(f"Similar books: {written} of {len(book_uids)} books refreshed (full={watermark is None})")
+        return written
+    finally:
+        lock.release()
@@ -0,0 +1,150 @@
+"""
+Write-behind counters for book detail views.
+
+A view never writes to the database. Each worker adds it to an in-process dict;
+every VIEW_COUNTS_FLUSH_SECONDS the dict is pushed to a Redis hash in one HINCRBY
+pipeline, and a Celery beat job periodically moves that hash into `book_stats`
+with a single bulk upsert.
+
+What a crash can lose (tune with the settings below):
+- A worker crash loses the views it counted since its last flush: at most
+  VIEW_COUNTS_FLUSH_SECONDS worth, or VIEW_COUNTS_MAX_BUFFERED books if that fills first.
+  Graceful shutdowns flush before exiting.
+- If Redis is unreachable the counts are kept and retried, up to
+  VIEW_COUNTS_MAX_BUFFERED books; past that new views are dropped.
+- Redis itself only keeps what its persistence settings (RDB / AOF) keep.
+- The Redis -> Postgres move is at-least-once: a job that dies after committing but
+  before deleting its batch will count that batch again on the next run.
+"""
+from sqlmodel import Session, select
+from sqlalchemy import values, column, literal, Integer, TIMESTAMP
+from sqlalchemy.dialects.postgresql import insert, UUID
+from datetime import datetime
+import asyncio
+import logging
+import threading
+from config import Config
+from db.models import Book, BookStat
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "book_views:pending"
+SYNCING_KEY = "book_views:syncing"
+
+# ==========================================
+# 1. In-Process Counter (per worker)
+# ==========================================
+class ViewCounter:
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()  # sync routes record from the thread pool
+        self._wakeup = None
+        self._task = None
+        self._loop = None
+
+    def record(self, book_uid: str):
+        with self._lock:
+            if book_uid not in self._counts and len(self._counts) >= Config.VIEW_COUNTS_MAX_BUFFERED:
+                return  # the buffer is full (Redis down?), see the module docstring
+            self._counts[book_uid] = self._counts.get(book_uid, 0) + 1
+            full = len(self._counts) >= Config.VIEW_COUNTS_MAX_BUFFERED
+        if full and self._loop is not None:
+            # Flush early rather than drop anything
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def drain(self) -> dict:
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        return counts
+
+    def restore(self, counts: dict):
+        """Puts back counts a failed flush couldn't deliver."""
+        with self._lock:
+            for book_uid, count in counts.items():
+                if book_uid in self._counts or len(self._counts) < Config.VIEW_COUNTS_MAX_BUFFERED:
+                    self._counts[book_uid] = self._counts.get(book_uid, 0) + count
+
+    async def flush(self) -> int:
+        counts = self.drain()
+        if not counts:
+            return 0
+
+        from db.redis import get_redis
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for book_uid, count in counts.items():
+                    pipe.hincrby(PENDING_KEY, book_uid, count)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"View count flush failed, retrying later: {e}")
+            self.restore(counts)
+            return 0
+        return len(counts)
+
+    # Lifespan hooks
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._loop = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=Config.VIEW_COUNTS_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+view_counter = ViewCounter()
+
+# ==========================================
+# 2. Redis -> Postgres (Celery beat job)
+# ==========================================
+def upsert_view_counts(session: Session, counts: dict):
+    """
+    One INSERT ... SELECT for the whole batch. Joining on books skips views of books
+    deleted since they were counted instead of failing the batch on the foreign key.
+    """
+    batch = values(column("book_uid", UUID(as_uuid=False)), column("views", Integer), name="batch").data(
+        [(book_uid, count) for book_uid, count in counts.items()]
+    )
+    source = select(Book.uid, batch.c.views, literal(datetime.now(), TIMESTAMP)).join(batch, Book.uid == batch.c.book_uid)
+    statement = insert(BookStat).from_select(["book_uid", "view_count", "updated_at"], source)
+    statement = statement.on_conflict_do_update(
+        index_elements=["book_uid"],
+        set_={
+            "view_count": BookStat.view_count + statement.excluded.view_count,
+            "updated_at": statement.excluded.updated_at,
+        }
+    )
+    session.exec(statement)
+
+def sync_view_counts() -> int:
+    """Moves the pending Redis counts into book_stats and returns how many books were updated."""
+    from db.main import engine
+    from db.redis import get_sync_redis
+    redis = get_sync_redis()
+
+    # A batch left behind by a run that died is finished first. Otherwise take the
+    # pending hash atomically: views counted from here on go into a fresh one.
+    if not redis.exists(SYNCING_KEY):
+        if not redis.exists(PENDING_KEY):
+            return 0
+        redis.rename(PENDING_KEY, SYNCING_KEY)
+
+    counts = {book_uid: int(count) for book_uid, count in redis.hgetall(SYNCING_KEY).items()}
+    if counts:
+        with Session(engine) as session:
+            upsert_view_counts(session, counts)
+            session.commit()
+    redis.delete(SYNCING_KEY)
+    return len(counts)
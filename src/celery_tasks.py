@@ -1,5 +1,13 @@
 from celery import Celery
+from celery.schedules import crontab
+from celery.signals import worker_process_init, task_prerun, task_postrun
 from config import Config
+from db.redis import get_sync_redis
+from task_metrics import EMAIL_QUEUE, BATCH_QUEUE, record_task
+import logging
+import time
+
+logger = logging.getLogger(__name__)
 
 # 1. Initialize Celery
 # "c_worker" is just a name we give this worker instance
@@ -9,14 +17,77 @@ c_celery = Celery(
     backend=Config.REDIS_URL
 )
 
+c_celery.conf.update(
+    # Each task goes to its queue; workers are started per queue (see docker-compose.yml)
+    task_default_queue=BATCH_QUEUE,
+    task_routes={
+        "send_email_task": {"queue": EMAIL_QUEUE},
+        "refresh_similar_books": {"queue": BATCH_QUEUE},
+        "sync_book_views": {"queue": BATCH_QUEUE},
+        "ensure_review_partitions": {"queue": BATCH_QUEUE},
+        "purge_book": {"queue": BATCH_QUEUE},
+    },
+    # Every task is fire-and-forget (nothing calls .get()), so don't write results to Redis.
+    # A task that needs its result can still opt back in with ignore_result=False.
+    task_ignore_result=True,
+    # Acknowledge after the task finishes: a worker killed mid-task gives the message back
+    # instead of losing it. All tasks are safe to run twice (processed-id check, locks, upserts).
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    # One message at a time per process: a long batch job doesn't sit on queued work
+    # that an idle process could take. Email workers raise it with --prefetch-multiplier.
+    worker_prefetch_multiplier=Config.CELERY_PREFETCH_MULTIPLIER,
+    # Unacked messages are redelivered after this long, so it must outlast any task
+    broker_transport_options={"visibility_timeout": Config.CELERY_VISIBILITY_TIMEOUT},
+)
+
+# Each pool process sets up its own tracing (no-op unless TRACING_ENABLED)
+@worker_process_init.connect
+def init_worker_tracing(**kwargs):
+    from tracing import setup_tracing
+    setup_tracing()
+
+# Duration and outcome of every run, for GET /health/tasks (see task_metrics.py)
+_started = {}
+
+@task_prerun.connect
+def start_task_timer(task_id=None, **kwargs):
+    _started[task_id] = time.perf_counter()
+
+@task_postrun.connect
+def record_task_run(task_id=None, task=None, state=None, **kwargs):
+    started = _started.pop(task_id, None)
+    if started is None or task is None:
+        return
+    queue = (task.request.delivery_info or {}).get("routing_key")
+    try:
+        record_task(get_sync_redis(), task.name, queue, time.perf_counter() - started, failed=state != "SUCCESS")
+    except Exception as e:
+        # Telemetry must never fail the task
+        logger.warning(f"Could not record metrics for {task.name}: {e}")
+
+# Jobs arrive through the outbox (see outbox.py), which may deliver the same
+# message twice if it crashes between publishing and marking the row dispatched.
+# The outbox uid is used as the task id, so we remember finished ids for a day.
+def already_processed(task_id: str) -> bool:
+    return task_id is not None and get_sync_redis().exists(f"task-done:{task_id}") > 0
+
+def mark_processed(task_id: str):
+    if task_id is not None:
+        get_sync_redis().set(f"task-done:{task_id}", "1", ex=86400)
+
 # 2. Define the Task
 # @c_celery.task() tells Celery "This is a job you can accept"
-@c_celery.task()
-def send_email_task(email: str, link: str):
+# An explicit name keeps it stable whether the worker imports "celery_tasks" or "src.celery_tasks"
+@c_celery.task(name="send_email_task", bind=True)
+def send_email_task(self, email: str, link: str):
     """
     This runs in the Background Worker process.
     It receives the email and link, and prints them.
     """
+    if already_processed(self.request.id):
+        return
+
     # Simulate sending email by printing to the worker console
     print(f"--------------------------------")
     print(f"CELERY WORKER: VERIFICATION LINK FOR {email}:")
@@ -26,4 +97,60 @@ def send_email_task(email: str, link: str):
     # FUTURE: When you want to send real emails, you will use asgiref here
     # from asgiref.sync import async_to_sync
     # from mail import send_verification_email
-    # async_to_sync(send_verification_email)(email, link)
\ No newline at end of file
+    # async_to_sync(send_verification_email)(email, link)
+
+    mark_processed(self.request.id)
+
+# 3. Similar Books ("readers who reviewed this also reviewed")
+# NumPy/SciPy are imported inside the task so the email worker path stays light.
+@c_celery.task(name="refresh_similar_books")
+def refresh_similar_books_task(full: bool = False):
+    from books.similarity import refresh_similar_books
+    return refresh_similar_books(full=full)
+
+# 4. Book View Counts (Redis -> book_stats, see books/views.py)
+@c_celery.task(name="sync_book_views")
+def sync_book_views_task():
+    from books.views import sync_view_counts
+    return sync_view_counts()
+
+# 5. Review Partitions (next months' tables must exist before the first insert)
+@c_celery.task(name="ensure_review_partitions")
+def ensure_review_partitions_task():
+    from sqlmodel import Session
+    from db.main import engine
+    from db.partitions import ensure_monthly_partitions
+    with Session(engine) as session:
+        return ensure_monthly_partitions(session, "reviews", Config.REVIEW_PARTITION_MONTHS_AHEAD)
+
+# 6. Deleted Books (queued through the outbox by BookService.delete_book)
+@c_celery.task(name="purge_book", bind=True)
+def purge_book_task(self, book_uid: str):
+    if already_processed(self.request.id):
+        return
+    from books.purge import purge_book
+    purge_book(book_uid)
+    mark_processed(self.request.id)
+
+# 7. Periodic Jobs (run `celery beat` alongside the worker)
+c_celery.conf.beat_schedule = {
+    # Only books touched by new or edited reviews
+    "refresh-similar-books": {
+        "task": "refresh_similar_books",
+        "schedule": Config.SIMILAR_BOOKS_REFRESH_MINUTES * 60,
+    },
+    # Everything, which also drops pairs left behind by deleted reviews
+    "rebuild-similar-books": {
+        "task": "refresh_similar_books",
+        "schedule": crontab(hour=3, minute=0),
+        "kwargs": {"full": True},
+    },
+    "sync-book-views": {
+        "task": "sync_book_views",
+        "schedule": Config.VIEW_STATS_SYNC_SECONDS,
+    },
+    "ensure-review-partitions": {
+        "task": "ensure_review_partitions",
+        "schedule": crontab(hour=2, minute=30),
+    },
+}
@@ -0,0 +1,250 @@
+from fastapi import Request
+import logging
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# Brotli and Zstandard are optional: without them we simply don't offer those encodings
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# ==========================================
+# 1. Codecs
+# ==========================================
+# Above these levels per-request compression burns far more CPU than it saves in bytes
+LEVEL_CAPS = {"zstd": 9, "br": 6, "gzip": 6}
+
+class GzipCodec:
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+class BrotliCodec:
+    def __init__(self, level: int):
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+class ZstdCodec:
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+# Server preference when the client rates several encodings equally
+CODECS = {}
+if zstandard is not None:
+    CODECS["zstd"] = ZstdCodec
+if brotli is not None:
+    CODECS["br"] = BrotliCodec
+CODECS["gzip"] = GzipCodec
+
+def negotiate_encoding(accept_encoding: str):
+    """Picks the best encoding we support from an Accept-Encoding header, or None."""
+    weights = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding:
+            weights[coding] = q
+
+    best, best_q = None, 0.0
+    for coding in CODECS:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+# ==========================================
+# 2. Content Awareness
+# ==========================================
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+# Each event must reach the browser immediately, so never buffer or compress SSE
+INCOMPRESSIBLE_TYPES = ("text/event-stream",)
+
+def is_compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    if content_type.startswith(INCOMPRESSIBLE_TYPES):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+# ==========================================
+# 3. Per-Route Opt-Out
+# ==========================================
+def no_compression(request: Request):
+    """Add as `dependencies=[Depends(no_compression)]` on routes that must not be compressed."""
+    request.state.no_compression = True
+
+# ==========================================
+# 4. Middleware
+# ==========================================
+class CompressionMiddleware:
+    """
+    Negotiated zstd / brotli / gzip compression.
+
+    - Responses smaller than `minimum_size` are sent as-is (compression wouldn't pay off).
+    - Only text-like content types are compressed; images, archives and SSE are left alone.
+    - Streamed responses are compressed chunk by chunk and flushed as they go.
+    - Every compressible response carries `Vary: Accept-Encoding`, compressed or not, so
+      a shared cache never hands one client's encoding to another.
+    """
+    def __init__(self, app, minimum_size: int = 1024, levels: dict = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {}
+        for coding, level in (levels or {}).items():
+            if level > LEVEL_CAPS[coding]:
+                logger.warning(f"{coding} level {level} capped at {LEVEL_CAPS[coding]}")
+            self.levels[coding] = min(level, LEVEL_CAPS[coding])
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+
+        # Even without an encoding to use, the responder still marks the response as varying
+        coding = negotiate_encoding(accept_encoding) if accept_encoding else None
+        level = self.levels.get(coding, LEVEL_CAPS[coding]) if coding else None
+        responder = CompressionResponder(scope, send, coding, level, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+class CompressionResponder:
+    def __init__(self, scope, send, coding, level, minimum_size: int):
+        self.scope = scope
+        self.downstream = send
+        self.coding = coding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.buffer = []
+        self.buffered_size = 0
+        self.mode = None  # None (deciding) -> "identity" | "compress"
+        self.codec = None
+
+    def _varies(self) -> bool:
+        """Whether this response is (or would be) compressed for clients that ask."""
+        if self.scope.get("state", {}).get("no_compression"):
+            return False
+        headers = {k.lower(): v for k, v in self.start_message["headers"]}
+        if b"content-encoding" in headers:
+            return False
+        return is_compressible(headers.get(b"content-type", b"").decode("latin-1"))
+
+    def _add_vary(self):
+        vary = [v for k, v in self.start_message["headers"] if k.lower() == b"vary"]
+        if any(b"accept-encoding" in v.lower() for v in vary):
+            return
+        headers = [(k, v) for k, v in self.start_message["headers"] if k.lower() != b"vary"]
+        headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+        self.start_message["headers"] = headers
+
+    def _set_headers(self, content_length: int = None):
+        self._add_vary()
+        headers = [(k, v) for k, v in self.start_message["headers"] if k.lower() != b"content-length"]
+        headers.append((b"content-encoding", self.coding.encode()))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode()))
+        self.start_message["headers"] = headers
+
+    async def send(self, message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            self.start_message = message
+            self.start_message["headers"] = list(message.get("headers", []))
+            varies = self._varies()
+            if not varies or self.coding is None:
+                self.mode = "identity"
+                if varies:
+                    self._add_vary()
+                await self.downstream(self.start_message)
+            return
+
+        if message_type != "http.response.body" or self.mode == "identity":
+            return await self.downstream(message)
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.mode == "compress":
+            return await self._send_compressed(body, more_body)
+
+        # Still deciding: hold chunks back until we know the response is big enough
+        self.buffer.append(body)
+        self.buffered_size += len(body)
+        if more_body and self.buffered_size < self.minimum_size:
+            return
+
+        pending = b"".join(self.buffer)
+        self.buffer = []
+        if self.buffered_size < self.minimum_size:
+            self.mode = "identity"
+            self._add_vary()
+            await self.downstream(self.start_message)
+            return await self.downstream({"type": "http.response.body", "body": pending, "more_body": False})
+
+        self.mode = "compress"
+        self.codec = CODECS[self.coding](self.level)
+        if not more_body:
+            compressed = self.codec.compress(pending) + self.codec.finish()
+            self._set_headers(content_length=len(compressed))
+            await self.downstream(self.start_message)
+            return await self.downstream({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        # Streaming: the final length is unknown, so drop Content-Length
+        self._set_headers()
+        await self.downstream(self.start_message)
+        await self._send_compressed(pending, more_body)
+
+    async def _send_compressed(self, body: bytes, more_body: bool):
+        if more_body:
+            chunk = self.codec.compress(body) + self.codec.flush()
+        else:
+            chunk = self.codec.compress(body) + self.codec.finish()
+        await self.downstream({"type": "http.response.body", "body": chunk, "more_body": more_body})
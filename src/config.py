@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Optional
 import os
 
 class Settings(BaseSettings):
@@ -24,6 +25,111 @@ class Settings(BaseSettings):
 
     REDIS_URL: str = "redis://localhost:6379/0"
 
+    # --- Logging ---
+    DB_ECHO: bool = False                  # log every SQL statement (debugging only: it's synchronous and loud)
+    ACCESS_LOG_SAMPLE_RATE: float = 0.1    # share of fast, successful requests that get logged
+    ACCESS_LOG_SLOW_MS: int = 500          # requests at least this slow are always logged (as are 4xx/5xx)
+    ACCESS_LOG_QUEUE_SIZE: int = 10000     # records waiting for the writer thread; extra ones are dropped
+
+    # --- Statement Caching ---
+    DB_COMPILED_CACHE_SIZE: int = 1200            # SQLAlchemy compiled-SQL cache entries per engine
+    DB_PREPARE_THRESHOLD: Optional[int] = 5       # psycopg 3 only: runs before a query is prepared server-side (None = never, e.g. behind PgBouncer in transaction mode)
+
+    # --- Tracing (OpenTelemetry, optional: see tracing.py) ---
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATE: float = 0.1       # share of traces kept, decided once at the root span
+    TRACING_EXPORTER: str = "file"         # "file" (JSON lines), "otlp" (HTTP collector) or "console"
+    TRACING_FILE_PATH: str = "traces.jsonl"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_SERVICE_NAME: str = "bookly"
+
+    # --- Read Replicas ---
+    # Comma-separated list of replica URLs. Leave empty to send everything to DATABASE_URL.
+    DATABASE_REPLICA_URLS: str = ""
+    # Seconds a replica that failed a health check is skipped before we probe it again
+    REPLICA_HEALTH_CHECK_INTERVAL: int = 30
+    # Seconds after a write during which that user's reads go to the primary
+    READ_YOUR_WRITES_WINDOW: int = 5
+
+    # --- Lifecycle (warm-up & graceful shutdown) ---
+    WARMUP_DB_CONNECTIONS: int = 5      # matches SQLAlchemy's default pool_size
+    READINESS_RECHECK_SECONDS: float = 5  # min gap between dependency checks while not ready
+    SHUTDOWN_READINESS_DELAY: float = 0 # seconds to report "draining" before we stop accepting
+    SHUTDOWN_DRAIN_TIMEOUT: float = 25  # max seconds to wait for in-flight requests
+
+    # --- Admission Control (load shedding, see admission.py) ---
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_INITIAL_LIMIT: int = 40         # global concurrent requests per worker to start from
+    ADMISSION_ROUTE_INITIAL_LIMIT: int = 20   # same, per route
+    ADMISSION_MIN_LIMIT: int = 2              # the adaptive limits never go below / above these
+    ADMISSION_MAX_LIMIT: int = 500
+    ADMISSION_QUEUE_SIZE: int = 50            # requests allowed to wait for a slot, per limiter
+    ADMISSION_QUEUE_TIMEOUT_MS: int = 250     # longest wait before a 503
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+    ADMISSION_EXEMPT_ROUTES: list = ["/api/v1/books/{book_uid}/reviews/stream"]  # long-lived, capped separately
+
+    # --- Response Compression ---
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # bytes; smaller responses are sent uncompressed
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    # --- Celery Workers (queues and pool sizes are per worker, see docker-compose.yml) ---
+    CELERY_PREFETCH_MULTIPLIER: int = 1       # default for batch workers; email workers pass their own
+    CELERY_VISIBILITY_TIMEOUT: int = 7200     # seconds; must exceed the longest task (acks are late)
+    TASK_METRICS_WINDOW: int = 1000           # durations kept per task for /health/tasks
+
+    # --- Outbox (background jobs) ---
+    OUTBOX_POLL_INTERVAL: float = 1.0   # seconds between dispatcher sweeps
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_MAX_ATTEMPTS: int = 10       # then the row is marked 'failed' for inspection
+    OUTBOX_RETENTION_DAYS: int = 7      # dispatched rows older than this are purged
+
+    # --- Similar Books (co-review recommendations) ---
+    SIMILAR_BOOKS_TOP_K: int = 20            # neighbours stored per book
+    SIMILAR_BOOKS_BATCH_SIZE: int = 512      # books scored per matrix multiplication
+    SIMILAR_BOOKS_REFRESH_MINUTES: int = 15  # incremental refresh; a full rebuild runs nightly
+
+    # --- Leaderboards ---
+    LEADERBOARD_PRIOR_MEAN: float = 3.5           # rating a book is assumed to have before any reviews
+    LEADERBOARD_PRIOR_WEIGHT: int = 10            # how many reviews that assumption is worth
+    LEADERBOARD_TRENDING_CACHE_SECONDS: int = 60  # how long a merged 24h/7d trending set is reused
+
+    # --- Autocomplete (in-memory, per worker) ---
+    AUTOCOMPLETE_MAX_MEMORY_MB: int = 64      # least popular books are left out beyond this
+    AUTOCOMPLETE_REBUILD_SECONDS: int = 600   # full reload from Postgres (refreshes popularity)
+    AUTOCOMPLETE_SCAN_LIMIT: int = 2000       # max index entries examined per lookup (prefixes over 3 characters)
+
+    # --- Browse Facets ---
+    FACET_VALUE_LIMIT: int = 50  # values returned per facet, most common first
+
+    # --- Book View Counters (write-behind, see books/views.py for what a crash can lose) ---
+    VIEW_COUNTS_FLUSH_SECONDS: float = 5   # worker -> Redis; also the most a worker crash can lose
+    VIEW_COUNTS_MAX_BUFFERED: int = 10000  # distinct books held per worker before an early flush
+    VIEW_STATS_SYNC_SECONDS: int = 60      # Redis -> book_stats
+
+    # --- Duplicate Books (MinHash/LSH, see books/dedup.py) ---
+    DUPLICATE_BOOKS_ACTION: str = "flag"     # "flag": create it and record duplicate_of; "reject": 409
+    DUPLICATE_BOOKS_THRESHOLD: float = 0.8   # Jaccard similarity of title/author/publisher trigrams
+    BOOK_IMPORT_MAX_BATCH: int = 1000
+
+    # --- Book Deletion (soft delete now, purge in the background, see books/purge.py) ---
+    BOOK_PURGE_BATCH_SIZE: int = 1000       # reviews deleted per transaction
+    BOOK_PURGE_PAUSE_SECONDS: float = 0.05  # between batches
+
+    # --- Review Partitions (monthly, see db/partitions.py) ---
+    REVIEW_PARTITION_MONTHS_AHEAD: int = 3  # created in advance by a daily Celery job
+
+    # --- Book Detail Read Model (see books/read_model.py) ---
+    BOOK_DETAIL_RECENT_REVIEWS: int = 20  # newest reviews kept in each book's document
+    BOOK_DETAIL_SIMILAR_BOOKS: int = 5
+
+    # --- Live Review Streams (SSE, see reviews/stream.py) ---
+    REVIEW_STREAM_QUEUE_SIZE: int = 100         # events a client may fall behind before it is dropped
+    REVIEW_STREAM_MAX_CLIENTS: int = 5000       # open streams per worker
+    REVIEW_STREAM_HEARTBEAT_SECONDS: int = 15   # keep-alive comment on idle streams
+    REVIEW_STREAM_RETRY_MS: int = 3000          # reconnect delay suggested to EventSource
+
     
     model_config = SettingsConfigDict(
         # Your existing environment file logic
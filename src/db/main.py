@@ -1,17 +1,193 @@
+from fastapi import Request, Depends
+from fastapi.routing import APIRoute
 from sqlmodel import Session, create_engine, SQLModel
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql.dml import UpdateBase
+import functools
+import inspect
+import itertools
+import logging
+import time
 from config import Config
+from .pool_metrics import PoolMetrics
+
+logger = logging.getLogger(__name__)
+
+def driver_connect_args(url: str) -> dict:
+    """
+    Server-side prepared statements where the driver can cache them. psycopg 3
+    (postgresql+psycopg://) prepares a query once it has run DB_PREPARE_THRESHOLD
+    times on a connection; psycopg2 has no such cache, so it gets nothing.
+    """
+    if make_url(url).get_driver_name() == "psycopg":
+        return {"prepare_threshold": Config.DB_PREPARE_THRESHOLD}
+    return {}
+
+def engine_options(url: str) -> dict:
+    return {
+        # Compiled SQL per statement shape; the app has more shapes than the default 500
+        "query_cache_size": Config.DB_COMPILED_CACHE_SIZE,
+        "connect_args": driver_connect_args(url),
+    }
 
 # Standard Synchronous Engine
 engine = create_engine(
     url=Config.DATABASE_URL,
-    echo=True
+    echo=Config.DB_ECHO,
+    **engine_options(Config.DATABASE_URL)
 )
 
 def init_db():
-    from db.models import Book 
+    from db.models import Book
     SQLModel.metadata.create_all(bind=engine)
 
 # ADD THIS: The session provider for your routes
+# Creating a Session is free: it checks a connection out on its first query, so requests
+# that fail auth or never query don't take one. Routes give it back early, see below.
 def get_session():
-    with Session(engine) as session:
-        yield session # This "loans" the session to the route
\ No newline at end of file
+    # expire_on_commit=False: objects returned by a write (e.g. UPDATE ... RETURNING)
+    # are serialized as-is instead of being reloaded with another SELECT after commit
+    with Session(engine, expire_on_commit=False) as session:
+        yield session # This "loans" the session to the route
+
+# ==========================================
+# Read Replicas
+# ==========================================
+class ReplicaRouter:
+    """
+    Hands out replica engines round-robin, skipping any replica that failed
+    recently until REPLICA_HEALTH_CHECK_INTERVAL has passed and a probe succeeds.
+    """
+    def __init__(self, urls: list, check_interval: int):
+        self.engines = [create_engine(url=url, pool_pre_ping=True, **engine_options(url)) for url in urls]
+        self.check_interval = check_interval
+        self._retry_at = {}  # engine -> monotonic time when we may probe it again
+        self._counter = itertools.count()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.engines)
+
+    def mark_down(self, replica):
+        logger.warning(f"Replica {replica.url.host} marked unhealthy")
+        self._retry_at[replica] = time.monotonic() + self.check_interval
+
+    def probe(self, replica) -> bool:
+        try:
+            with replica.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return True
+        except OperationalError:
+            return False
+
+    def next_engine(self):
+        """Returns the next healthy replica, or None if every replica is down."""
+        for _ in range(len(self.engines)):
+            replica = self.engines[next(self._counter) % len(self.engines)]
+            retry_at = self._retry_at.get(replica)
+            if retry_at is None:
+                return replica
+            if time.monotonic() >= retry_at:
+                if self.probe(replica):
+                    self._retry_at.pop(replica, None)
+                    return replica
+                self.mark_down(replica)
+        return None
+
+replica_router = ReplicaRouter(
+    urls=[url.strip() for url in Config.DATABASE_REPLICA_URLS.split(",") if url.strip()],
+    check_interval=Config.REPLICA_HEALTH_CHECK_INTERVAL
+)
+
+# Connection hold times per pool (GET /health/pool)
+pool_metrics = [PoolMetrics("primary").attach(engine)] + [
+    PoolMetrics(f"replica-{i}").attach(replica) for i, replica in enumerate(replica_router.engines)
+]
+
+class RoutingSession(Session):
+    """
+    A Session that sends reads to a replica and anything that writes to the primary.
+    The replica is only picked on the first query, and once the session has written
+    it stays on the primary so it can read its own changes.
+    """
+    def __init__(self, allow_replica: bool = True, **kwargs):
+        super().__init__(**kwargs)
+        self.allow_replica = allow_replica and replica_router.enabled
+        self.replica = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.allow_replica = False
+        if not self.allow_replica:
+            return engine
+        if self.replica is None:
+            self.replica = replica_router.next_engine()
+            if self.replica is None:
+                self.allow_replica = False
+                return engine
+        return self.replica
+
+async def needs_primary(request: Request) -> bool:
+    """True if the caller wrote something within the read-your-writes window."""
+    if not replica_router.enabled:
+        return False
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+
+    from auth.utils import decode_token
+    from db.redis import user_wrote_recently
+    token_data = decode_token(token)
+    if not token_data:
+        return False
+    return await user_wrote_recently(token_data['user']['user_uid'])
+
+# The session provider for GET routes
+def get_read_session(use_primary: bool = Depends(needs_primary)):
+    with RoutingSession(bind=engine, allow_replica=not use_primary) as session:
+        try:
+            yield session
+        except OperationalError:
+            if session.replica is not None:
+                replica_router.mark_down(session.replica)
+            raise
+
+# ==========================================
+# Early Connection Release
+# ==========================================
+def release_sessions(endpoint):
+    """
+    Closes every Session the route received as soon as the route function returns.
+    The dependency itself only closes after the response is serialized and sent, which
+    for a big list is most of the request. Returned objects are already loaded, so
+    they serialize fine from a closed session.
+    """
+    def close_all(kwargs: dict):
+        for value in kwargs.values():
+            if isinstance(value, Session):
+                value.close()
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                close_all(kwargs)
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            close_all(kwargs)
+    return wrapper
+
+class SessionReleasingRoute(APIRoute):
+    """Route class for APIRouter(route_class=...): applies release_sessions to each endpoint."""
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, release_sessions(endpoint), **kwargs)
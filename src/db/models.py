@@ -1,5 +1,5 @@
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import Column
+from sqlalchemy import Column, ForeignKey, Index
 import sqlalchemy.dialects.postgresql as pg
 from datetime import datetime, date
 import uuid
@@ -29,8 +29,10 @@ class User(SQLModel, table=True):
     updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
 
     # Relationships
-    books: List["Book"] = Relationship(back_populates="user", sa_relationship_kwargs={"lazy": "selectin"})
-    reviews: List["Review"] = Relationship(back_populates="user", sa_relationship_kwargs={"lazy": "selectin"})
+    # lazy="raise": loading a user must never pull in their whole library (and every
+    # review of every book through Book.reviews). Query books/reviews explicitly instead.
+    books: List["Book"] = Relationship(back_populates="user", sa_relationship_kwargs={"lazy": "raise"})
+    reviews: List["Review"] = Relationship(back_populates="user", sa_relationship_kwargs={"lazy": "raise"})
 
     def __repr__(self):
         return f"<User {self.username}>"
@@ -55,11 +57,24 @@ class Book(SQLModel, table=True):
     
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
     updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    # Set by delete: the book is hidden at once, its rows are removed later (see books/purge.py)
+    deleted_at: Optional[datetime] = Field(default=None, sa_column=Column(pg.TIMESTAMP, nullable=True))
 
     # Relationships
     user: Optional[User] = Relationship(back_populates="books")
     reviews: List["Review"] = Relationship(back_populates="book", sa_relationship_kwargs={"lazy": "selectin"})
 
+    # Matched to the browse filters (see books/filters.py): equality filters are
+    # paired with created_at so the newest-first ordering comes straight off the index
+    __table_args__ = (
+        Index("ix_books_created_at", "created_at"),
+        Index("ix_books_language_created_at", "language", "created_at"),
+        Index("ix_books_publisher_created_at", "publisher", "created_at"),
+        Index("ix_books_author_created_at", "author", "created_at"),
+        Index("ix_books_published_date", "published_date"),
+        Index("ix_books_page_count", "page_count"),
+    )
+
     def __repr__(self):
         return f"<Book {self.title}>"
 
@@ -68,6 +83,9 @@ class Book(SQLModel, table=True):
 # ==========================================
 class Review(SQLModel, table=True):
     __tablename__ = "reviews"
+    # One partition per month (see db/partitions.py). Postgres wants the partition
+    # key in the primary key, which also lets deletes by identity touch one partition.
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
     
     uid: uuid.UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
@@ -79,7 +97,7 @@ class Review(SQLModel, table=True):
     user_uid: Optional[uuid.UUID] = Field(default=None, foreign_key="users.uid")
     book_uid: Optional[uuid.UUID] = Field(default=None, foreign_key="books.uid")
     
-    created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, nullable=False, primary_key=True, default=datetime.now))
     updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
 
     # Relationships
@@ -87,4 +105,125 @@ class Review(SQLModel, table=True):
     book: Optional[Book] = Relationship(back_populates="reviews")
 
     def __repr__(self):
-        return f"<Review {self.rating}>"
\ No newline at end of file
+        return f"<Review {self.rating}>"
+
+# ==========================================
+# 4. OUTBOX MODEL
+# ==========================================
+# Background jobs are written here in the same transaction as the change that
+# triggers them, then pushed to Celery by the outbox dispatcher (see outbox.py).
+class OutboxMessage(SQLModel, table=True):
+    __tablename__ = "outbox"
+
+    uid: uuid.UUID = Field(
+        sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
+    )
+    task_name: str
+    payload: dict = Field(sa_column=Column(pg.JSONB, nullable=False))
+    # Enqueueing the same key twice is a no-op
+    dedup_key: str = Field(unique=True, nullable=False)
+    # W3C trace headers of the request that queued it, so the task joins that trace
+    trace_context: Optional[dict] = Field(default=None, sa_column=Column(pg.JSONB, nullable=True))
+
+    status: str = Field(
+        sa_column=Column(pg.VARCHAR, nullable=False, server_default="pending")
+    )  # pending -> dispatched | failed
+    attempts: int = Field(default=0)
+    last_error: Optional[str] = None
+
+    available_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.now))
+    created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    dispatched_at: Optional[datetime] = Field(default=None, sa_column=Column(pg.TIMESTAMP, nullable=True))
+
+    def __repr__(self):
+        return f"<OutboxMessage {self.task_name} {self.status}>"
+
+# ==========================================
+# 5. SIMILAR BOOKS (precomputed)
+# ==========================================
+# "Readers who reviewed this also reviewed": one row per book holding its top-K
+# neighbours, written by the similarity job (see books/similarity.py).
+class BookSimilarity(SQLModel, table=True):
+    __tablename__ = "book_similarities"
+
+    book_uid: uuid.UUID = Field(
+        sa_column=Column(pg.UUID, ForeignKey("books.uid", ondelete="CASCADE"), primary_key=True)
+    )
+    # [{"uid": "...", "score": 0.42}, ...] ordered by score, highest first
+    similar: list = Field(sa_column=Column(pg.JSONB, nullable=False))
+    computed_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.now))
+
+    def __repr__(self):
+        return f"<BookSimilarity {self.book_uid}>"
+
+# ==========================================
+# 6. BOOK FACETS (precomputed counts)
+# ==========================================
+# Number of books per filter value, kept up to date by BookService (see books/facets.py)
+class BookFacet(SQLModel, table=True):
+    __tablename__ = "book_facets"
+
+    facet: str = Field(primary_key=True)   # e.g. "language"
+    value: str = Field(primary_key=True)   # e.g. "English"
+    book_count: int = Field(default=0)
+
+    def __repr__(self):
+        return f"<BookFacet {self.facet}={self.value}: {self.book_count}>"
+
+# ==========================================
+# 7. BOOK STATS (write-behind view counts)
+# ==========================================
+# Filled in batches from Redis by a Celery job (see books/views.py), never per request
+class BookStat(SQLModel, table=True):
+    __tablename__ = "book_stats"
+
+    book_uid: uuid.UUID = Field(
+        sa_column=Column(pg.UUID, ForeignKey("books.uid", ondelete="CASCADE"), primary_key=True)
+    )
+    view_count: int = Field(sa_column=Column(pg.BIGINT, nullable=False, server_default="0"))
+    updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.now))
+
+    def __repr__(self):
+        return f"<BookStat {self.book_uid}: {self.view_count} views>"
+
+# ==========================================
+# 8. BOOK DETAILS (denormalized read model)
+# ==========================================
+# The whole detail page as one document, rebuilt on every write (see books/read_model.py)
+class BookDetail(SQLModel, table=True):
+    __tablename__ = "book_details"
+
+    book_uid: uuid.UUID = Field(
+        sa_column=Column(pg.UUID, ForeignKey("books.uid", ondelete="CASCADE"), primary_key=True)
+    )
+    document: dict = Field(sa_column=Column(pg.JSONB, nullable=False))
+    updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.now))
+
+    def __repr__(self):
+        return f"<BookDetail {self.book_uid}>"
+
+# ==========================================
+# 9. BOOK FINGERPRINTS (near-duplicate detection)
+# ==========================================
+# MinHash/LSH bucket keys per book (see books/dedup.py). A book sharing any bucket
+# with another is a candidate duplicate; the GIN index finds them in one lookup.
+class BookFingerprint(SQLModel, table=True):
+    __tablename__ = "book_fingerprints"
+
+    book_uid: uuid.UUID = Field(
+        sa_column=Column(pg.UUID, ForeignKey("books.uid", ondelete="CASCADE"), primary_key=True)
+    )
+    buckets: list = Field(sa_column=Column(pg.ARRAY(pg.BIGINT), nullable=False))
+    # Set when the book was flagged as a near-duplicate of an earlier one
+    duplicate_of: Optional[uuid.UUID] = Field(
+        default=None, sa_column=Column(pg.UUID, ForeignKey("books.uid", ondelete="SET NULL"), nullable=True)
+    )
+    similarity: Optional[float] = Field(default=None)
+    updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.now))
+
+    __table_args__ = (
+        Index("ix_book_fingerprints_buckets", "buckets", postgresql_using="gin"),
+    )
+
+    def __repr__(self):
+        return f"<BookFingerprint {self.book_uid}>"
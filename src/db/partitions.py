@@ -0,0 +1,45 @@
+"""
+Monthly range partitions.
+
+`reviews` is partitioned by `created_at`, one partition per calendar month
+(`reviews_y2026m10` holds October 2026). Postgres can't create partitions on
+demand, and an insert with no partition to land in fails, so a daily Celery job
+keeps REVIEW_PARTITION_MONTHS_AHEAD months ready in advance.
+
+Indexes declared on the parent (see the migration) are created on every new
+partition automatically.
+"""
+from datetime import date, datetime
+from sqlmodel import Session
+from sqlalchemy import text
+import logging
+
+logger = logging.getLogger(__name__)
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+def partition_ddl(table: str, month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+def ensure_monthly_partitions(session: Session, table: str, months_ahead: int, today: date = None) -> list:
+    """Creates any missing partitions from this month to `months_ahead` months out. Returns the new ones."""
+    this_month = (today or datetime.now().date()).replace(day=1)
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(this_month, offset)
+        name = partition_name(table, month)
+        if session.exec(text("SELECT to_regclass(:name)"), params={"name": name}).scalar() is None:
+            session.exec(text(partition_ddl(table, month)))
+            created.append(name)
+    session.commit()
+    if created:
+        logger.info(f"Created partitions: {', '.join(created)}")
+    return created
@@ -0,0 +1,55 @@
+"""
+Connection pool metrics: how long requests hold a pooled connection.
+
+A connection is held from checkout (the session's first query) to checkin (the
+session closing). Routes close their session when the route function returns
+(SessionReleasingRoute in db/main.py), so the hold time no longer includes
+response serialization or the time spent sending the response.
+"""
+from sqlalchemy import event
+from collections import deque
+import time
+
+class PoolMetrics:
+    """Per-engine counters plus the last WINDOW hold times, served by GET /health/pool."""
+    WINDOW = 1000
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkouts = 0
+        self.checked_out = 0
+        self.hold_times = deque(maxlen=self.WINDOW)
+
+    def attach(self, engine):
+        event.listen(engine, "checkout", self.on_checkout)
+        event.listen(engine, "checkin", self.on_checkin)
+        self.pool = engine.pool
+        return self
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        self.checkouts += 1
+        self.checked_out += 1
+
+    def on_checkin(self, dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is None:
+            return  # never checked out (e.g. a connection discarded on connect)
+        self.checked_out -= 1
+        self.hold_times.append(time.perf_counter() - started)
+
+    def snapshot(self) -> dict:
+        holds = sorted(self.hold_times)
+
+        def percentile(p: float):
+            if not holds:
+                return None
+            return round(holds[min(len(holds) - 1, int(p * len(holds)))] * 1000, 2)
+
+        return {
+            "engine": self.name,
+            "pool_size": self.pool.size() if callable(getattr(self.pool, "size", None)) else None,
+            "checked_out": self.checked_out,
+            "checkouts": self.checkouts,
+            "hold_ms": {"p50": percentile(0.50), "p95": percentile(0.95), "p99": percentile(0.99), "max": percentile(1.0)},
+        }
@@ -1,16 +1,53 @@
-import redis.asyncio as aioredis
-from .main import get_session # Just in case, though not strictly needed for this file alone
+from functools import lru_cache
+import logging
+from config import Config
+
+logger = logging.getLogger(__name__)
 
 # 1. Connect to Redis (Ensure Redis is running!)
+# The client is created on first use so importing the app doesn't load redis.asyncio.
 # decode_responses=True gives us Strings instead of Bytes
-token_blocklist = aioredis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+@lru_cache(maxsize=None)
+def get_redis():
+    import redis.asyncio as aioredis
+    return aioredis.from_url(Config.REDIS_URL, decode_responses=True)
+
+# Same server, blocking client: for sync service code and Celery workers
+@lru_cache(maxsize=None)
+def get_sync_redis():
+    import redis
+    return redis.Redis.from_url(Config.REDIS_URL, decode_responses=True)
+
+def __getattr__(name: str):
+    # Keeps `from db.redis import token_blocklist` working without an import-time client
+    if name == "token_blocklist":
+        return get_redis()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # 2. Add Token to Blocklist (JTI = JWT ID)
 async def add_jti_to_blocklist(jti: str) -> None:
     # Save token ID for 3600 seconds (1 hour)
-    await token_blocklist.set(name=jti, value="", ex=3600)
+    await get_redis().set(name=jti, value="", ex=3600)
 
 # 3. Check if Token is Blocked
 async def token_in_blocklist(jti: str) -> bool:
-    jti = await token_blocklist.get(jti)
-    return jti is not None
\ No newline at end of file
+    jti = await get_redis().get(jti)
+    return jti is not None
+
+# 4. Read-Your-Writes Markers
+# After a user writes, their reads stick to the primary for READ_YOUR_WRITES_WINDOW
+# seconds so they never see a replica that hasn't caught up with their own change.
+async def mark_user_write(user_uid: str) -> None:
+    from redis.exceptions import RedisError
+    try:
+        await get_redis().set(name=f"recent_write:{user_uid}", value="1", ex=Config.READ_YOUR_WRITES_WINDOW)
+    except RedisError as e:
+        logger.warning(f"Could not record write marker for {user_uid}: {e}")
+
+async def user_wrote_recently(user_uid: str) -> bool:
+    from redis.exceptions import RedisError
+    try:
+        return await get_redis().exists(f"recent_write:{user_uid}") > 0
+    except RedisError:
+        # If we can't tell, the primary is always the safe answer
+        return True
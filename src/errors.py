@@ -41,6 +41,20 @@ class RefreshTokenRequired(BooklyException):
 class InsufficientPermission(BooklyException):
     pass
 
+class LeaderboardUnavailable(BooklyException):
+    pass
+
+class InvalidFieldSelection(BooklyException):
+    # args: (invalid names, allowed fields, allowed includes)
+    pass
+
+class StreamCapacityReached(BooklyException):
+    pass
+
+class DuplicateBook(BooklyException):
+    # args: (uid of the existing book, similarity)
+    pass
+
 
 # ==========================================
 # 3. Exception Handlers
@@ -105,6 +119,44 @@ async def insufficient_permission_handler(request: Request, exc: InsufficientPer
         content={"error_code": "INSUFFICIENT_PERMISSIONS", "message": "You do not have the required role."}
     )
 
+async def leaderboard_unavailable_handler(request: Request, exc: LeaderboardUnavailable):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"error_code": "LEADERBOARD_UNAVAILABLE", "message": "Leaderboards are temporarily unavailable."},
+        headers={"Retry-After": "5"}
+    )
+
+async def stream_capacity_reached_handler(request: Request, exc: StreamCapacityReached):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"error_code": "STREAM_CAPACITY_REACHED", "message": "Too many live streams open, please retry."},
+        headers={"Retry-After": "10"}
+    )
+
+async def duplicate_book_handler(request: Request, exc: DuplicateBook):
+    duplicate_of, similarity = exc.args
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={
+            "error_code": "DUPLICATE_BOOK",
+            "message": "A book with a near-identical title, author and publisher already exists.",
+            "duplicate_of": duplicate_of,
+            "similarity": similarity
+        }
+    )
+
+async def invalid_field_selection_handler(request: Request, exc: InvalidFieldSelection):
+    invalid, allowed_fields, allowed_includes = exc.args
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={
+            "error_code": "INVALID_FIELDS",
+            "message": f"Unknown field or include: {', '.join(invalid)}",
+            "allowed_fields": allowed_fields,
+            "allowed_includes": allowed_includes
+        }
+    )
+
 async def internal_server_error_handler(request: Request, exc: Exception):
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -125,6 +177,10 @@ def register_all_errors(app: FastAPI):
     app.add_exception_handler(InvalidToken, invalid_token_handler)
     app.add_exception_handler(RefreshTokenRequired, refresh_token_required_handler)
     app.add_exception_handler(InsufficientPermission, insufficient_permission_handler)
+    app.add_exception_handler(LeaderboardUnavailable, leaderboard_unavailable_handler)
+    app.add_exception_handler(InvalidFieldSelection, invalid_field_selection_handler)
+    app.add_exception_handler(StreamCapacityReached, stream_capacity_reached_handler)
+    app.add_exception_handler(DuplicateBook, duplicate_book_handler)
     
     # Catch-alls
     app.add_exception_handler(SQLAlchemyError, internal_server_error_handler)
@@ -0,0 +1,227 @@
+"""
+Book leaderboards kept in Redis sorted sets.
+
+Every review write adjusts the boards in one atomic Lua call, so reading a
+leaderboard is a single ZREVRANGE instead of aggregating the reviews table.
+
+    lb:top_rated           book -> Bayesian average rating
+    lb:review_count        book -> number of reviews
+    lb:rating_sum          hash  book -> sum of ratings
+    lb:hour:<YYYYMMDDHH>   book -> reviews written that hour   (last 24h)
+    lb:day:<YYYYMMDD>      book -> reviews written that day    (last 7d)
+
+If Redis loses data (or a write is missed while it was down), rebuild everything
+from Postgres with `python manage.py rebuild-leaderboards`.
+"""
+from sqlmodel import Session, select, func
+from datetime import datetime, timedelta
+import logging
+from config import Config
+from db.redis import get_sync_redis
+from db.models import Review, Book
+from errors import LeaderboardUnavailable
+
+logger = logging.getLogger(__name__)
+
+TOP_RATED = "lb:top_rated"
+REVIEW_COUNT = "lb:review_count"
+RATING_SUM = "lb:rating_sum"
+
+# Bucket size and how many buckets make up each trending window
+TRENDING_WINDOWS = {
+    "24h": ("hour", 24),
+    "7d": ("day", 7),
+}
+BUCKET_FORMATS = {"hour": "%Y%m%d%H", "day": "%Y%m%d"}
+BUCKET_STEPS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+# Buckets outlive their window a little so a late delete can still find them
+BUCKET_TTL = {"hour": 2 * 86400, "day": 8 * 86400}
+
+# ==========================================
+# 1. Scoring
+# ==========================================
+def bayesian_average(rating_sum: float, count: int, prior_mean: float, prior_weight: int) -> float:
+    """
+    The book's mean rating pulled towards `prior_mean` by `prior_weight` imaginary
+    reviews, so one 5-star review doesn't put a book above one with 500 4.8-star ones.
+    The prior is a fixed setting rather than the live site-wide mean: that way a
+    review only ever changes its own book's score.
+    """
+    return (prior_weight * prior_mean + rating_sum) / (prior_weight + count)
+
+def bucket_key(granularity: str, when: datetime) -> str:
+    return f"lb:{granularity}:{when.strftime(BUCKET_FORMATS[granularity])}"
+
+# ==========================================
+# 2. Updates (one atomic script per review write)
+# ==========================================
+# KEYS: top_rated, review_count, rating_sum, hour bucket, day bucket
+# ARGV: book, rating delta, count delta (+1 / -1), prior mean, prior weight, hour ttl, day ttl
+REVIEW_CHANGED = """
+local book = ARGV[1]
+local rating = tonumber(ARGV[2])
+local delta = tonumber(ARGV[3])
+local prior_mean = tonumber(ARGV[4])
+local prior_weight = tonumber(ARGV[5])
+
+local count = tonumber(redis.call('ZINCRBY', KEYS[2], delta, book))
+local sum = tonumber(redis.call('HINCRBYFLOAT', KEYS[3], book, rating))
+
+if count <= 0 then
+    redis.call('ZREM', KEYS[1], book)
+    redis.call('ZREM', KEYS[2], book)
+    redis.call('HDEL', KEYS[3], book)
+else
+    redis.call('ZADD', KEYS[1], (prior_weight * prior_mean + sum) / (prior_weight + count), book)
+end
+
+-- A delete only counts against a bucket that still exists
+for i, ttl in ipairs({ARGV[6], ARGV[7]}) do
+    local key = KEYS[3 + i]
+    if delta > 0 or redis.call('EXISTS', key) == 1 then
+        if tonumber(redis.call('ZINCRBY', key, delta, book)) <= 0 then
+            redis.call('ZREM', key, book)
+        end
+        if delta > 0 then redis.call('EXPIRE', key, ttl) end
+    end
+end
+"""
+
+def _record(book_uid: str, rating: int, delta: int, written_at: datetime):
+    from redis.exceptions import RedisError
+    redis = get_sync_redis()
+    try:
+        script = redis.register_script(REVIEW_CHANGED)
+        script(
+            keys=[TOP_RATED, REVIEW_COUNT, RATING_SUM,
+                  bucket_key("hour", written_at), bucket_key("day", written_at)],
+            args=[book_uid, rating * delta, delta, Config.LEADERBOARD_PRIOR_MEAN,
+                  Config.LEADERBOARD_PRIOR_WEIGHT, BUCKET_TTL["hour"], BUCKET_TTL["day"]]
+        )
+    except RedisError as e:
+        # The review itself is saved; the boards catch up on the next rebuild
+        logger.warning(f"Leaderboard update failed for book {book_uid}: {e}")
+
+def review_added(book_uid: str, rating: int, created_at: datetime):
+    _record(book_uid, rating, 1, created_at)
+
+def review_removed(book_uid: str, rating: int, created_at: datetime):
+    _record(book_uid, rating, -1, created_at)
+
+def book_removed(book_uid: str):
+    """Drops a deleted book from every board at once, rather than review by review."""
+    from redis.exceptions import RedisError
+    redis = get_sync_redis()
+    now = datetime.now()
+    try:
+        with redis.pipeline() as pipe:
+            pipe.zrem(TOP_RATED, book_uid)
+            pipe.zrem(REVIEW_COUNT, book_uid)
+            pipe.hdel(RATING_SUM, book_uid)
+            for window, (granularity, buckets) in TRENDING_WINDOWS.items():
+                for i in range(buckets):
+                    pipe.zrem(bucket_key(granularity, now - i * BUCKET_STEPS[granularity]), book_uid)
+                pipe.zrem(f"lb:trending:{window}", book_uid)
+            pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Leaderboard cleanup failed for book {book_uid}: {e}")
+
+# ==========================================
+# 3. Reads
+# ==========================================
+def top_rated(limit: int):
+    """[(book_uid, score), ...] best first."""
+    from redis.exceptions import RedisError
+    try:
+        return get_sync_redis().zrevrange(TOP_RATED, 0, limit - 1, withscores=True)
+    except RedisError as e:
+        raise LeaderboardUnavailable() from e
+
+def trending(window: str, limit: int):
+    """
+    [(book_uid, review_count), ...] for the last 24h or 7d. The window's buckets are
+    merged into a cached set that lives LEADERBOARD_TRENDING_CACHE_SECONDS, so most calls are
+    a plain ZREVRANGE.
+    """
+    from redis.exceptions import RedisError
+    redis = get_sync_redis()
+    cache_key = f"lb:trending:{window}"
+    try:
+        if not redis.exists(cache_key):
+            granularity, buckets = TRENDING_WINDOWS[window]
+            now = datetime.now()
+            keys = [bucket_key(granularity, now - i * BUCKET_STEPS[granularity]) for i in range(buckets)]
+            with redis.pipeline() as pipe:
+                pipe.zunionstore(cache_key, keys)
+                pipe.expire(cache_key, Config.LEADERBOARD_TRENDING_CACHE_SECONDS)
+                pipe.execute()
+        return redis.zrevrange(cache_key, 0, limit - 1, withscores=True)
+    except RedisError as e:
+        raise LeaderboardUnavailable() from e
+
+# ==========================================
+# 4. Rebuild From Postgres
+# ==========================================
+def rebuild_leaderboards(session: Session) -> int:
+    """
+    Recomputes every board from the reviews table. Each board is written to a
+    temporary key and RENAMEd over the live one, so readers never see it half-built.
+    Returns the number of books ranked.
+    """
+    redis = get_sync_redis()
+    now = datetime.now()
+
+    # Reviews of deleted books linger until the book's purge job removes them
+    per_book = session.exec(
+        select(Review.book_uid, func.count(), func.sum(Review.rating))
+        .join(Book, Book.uid == Review.book_uid)
+        .where(Book.deleted_at.is_(None))
+        .group_by(Review.book_uid)
+    ).all()
+
+    buckets = {}
+    for granularity, size in TRENDING_WINDOWS.values():
+        bucket = func.date_trunc(granularity, Review.created_at).label("bucket")
+        rows = session.exec(
+            select(bucket, Review.book_uid, func.count())
+            .join(Book, Book.uid == Review.book_uid)
+            .where(Book.deleted_at.is_(None), Review.created_at >= now - size * BUCKET_STEPS[granularity])
+            .group_by(bucket, Review.book_uid)
+        ).all()
+        for started, book_uid, count in rows:
+            buckets.setdefault((granularity, bucket_key(granularity, started)), {})[str(book_uid)] = count
+
+    with redis.pipeline() as pipe:
+        staged = {}
+        def stage(key, write):
+            staged[key] = f"{key}:rebuild"
+            pipe.delete(staged[key])
+            write(staged[key])
+
+        if per_book:
+            stage(TOP_RATED, lambda k: pipe.zadd(k, {
+                str(uid): bayesian_average(s, c, Config.LEADERBOARD_PRIOR_MEAN, Config.LEADERBOARD_PRIOR_WEIGHT)
+                for uid, c, s in per_book
+            }))
+            stage(REVIEW_COUNT, lambda k: pipe.zadd(k, {str(uid): c for uid, c, _ in per_book}))
+            stage(RATING_SUM, lambda k: pipe.hset(k, mapping={str(uid): s for uid, _, s in per_book}))
+        else:
+            pipe.delete(TOP_RATED, REVIEW_COUNT, RATING_SUM)
+
+        # Buckets that no longer match any review would otherwise linger until they expire
+        rebuilt = {key for _, key in buckets}
+        stale = [key for g in BUCKET_FORMATS for key in redis.scan_iter(f"lb:{g}:*") if key not in rebuilt]
+        if stale:
+            pipe.delete(*stale)
+
+        for (granularity, key), members in buckets.items():
+            stage(key, lambda k, members=members: pipe.zadd(k, members))
+
+        for key, temporary in staged.items():
+            pipe.rename(temporary, key)
+        for granularity, key in buckets:
+            pipe.expire(key, BUCKET_TTL[granularity])
+        pipe.delete(*(f"lb:trending:{window}" for window in TRENDING_WINDOWS))
+        pipe.execute()
+
+    return len(per_book)
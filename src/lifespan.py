@@ -0,0 +1,266 @@
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, FastAPI, status
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlmodel import Session
+import asyncio
+import logging
+import signal
+import time
+import uuid
+from config import Config
+from db.main import engine, replica_router, pool_metrics
+from db.redis import get_redis, get_sync_redis
+from outbox import outbox_dispatcher
+from books.autocomplete import autocomplete_sync, rebuild_index
+from books.views import view_counter
+from reviews.stream import review_broadcaster
+from access_log import access_log
+from task_metrics import task_snapshot
+from tracing import setup_tracing
+from books.service import BookService
+from reviews.service import ReviewService
+from auth.service import UserService
+from errors import BookNotFound
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# 1. Lifecycle State
+# ==========================================
+class LifecycleState:
+    def __init__(self):
+        self.ready = False        # warm-up finished and dependencies answered
+        self.draining = False     # SIGTERM received, stop taking new work
+        self.in_flight = 0
+        self.checks = {}
+        self.primed = False       # the slow half of warm-up has been started
+        self.checking = False     # a readiness probe is running the checks
+        self.last_check = float("-inf")  # time.monotonic() of the last probe-triggered check
+        self.priming = None       # background priming started by a probe
+
+lifecycle = LifecycleState()
+
+# ==========================================
+# 2. Warm-up
+# ==========================================
+def warm_db_pool():
+    """Opens WARMUP_DB_CONNECTIONS connections at once so the pool is full before traffic arrives."""
+    for target in [engine, *replica_router.engines]:
+        connections = []
+        try:
+            for _ in range(Config.WARMUP_DB_CONNECTIONS):
+                conn = target.connect()
+                connections.append(conn)
+                conn.execute(text("SELECT 1"))
+        finally:
+            for conn in connections:
+                conn.close()
+
+def prime_compiled_queries():
+    """
+    Runs each hot lookup once with a key that matches nothing, so SQLAlchemy's
+    compiled-statement cache already holds them when the first real request comes in.
+    """
+    missing_uid = str(uuid.uuid4())
+    with Session(engine) as session:
+        try:
+            BookService().get_book(missing_uid, session)
+        except BookNotFound:
+            pass
+        ReviewService().get_review(missing_uid, session)
+        UserService(session).get_user_by_email("warmup@bookly.invalid")
+
+async def check_database() -> bool:
+    try:
+        await run_in_threadpool(warm_db_pool)
+        return True
+    except Exception as e:
+        logger.warning(f"Database warm-up failed: {e}")
+        return False
+
+async def check_redis() -> bool:
+    try:
+        await get_redis().ping()
+        return True
+    except Exception as e:
+        logger.warning(f"Redis warm-up failed: {e}")
+        return False
+
+async def run_checks() -> bool:
+    database, redis = await asyncio.gather(check_database(), check_redis())
+    lifecycle.checks = {"database": database, "redis": redis}
+    lifecycle.ready = database and redis
+    return lifecycle.ready
+
+async def prime():
+    """The slow half of warm-up, once the dependencies answer."""
+    try:
+        await run_in_threadpool(prime_compiled_queries)
+    except Exception as e:
+        logger.warning(f"Query priming failed: {e}")
+    try:
+        await run_in_threadpool(rebuild_index)
+    except Exception as e:
+        logger.warning(f"Autocomplete index build failed: {e}")
+
+async def warm_up():
+    start = time.perf_counter()
+    if await run_checks():
+        lifecycle.primed = True
+        await prime()
+    logger.info(f"Warm-up finished in {time.perf_counter() - start:.3f}s (ready={lifecycle.ready})")
+
+async def recheck():
+    """
+    Dependencies were down at startup: the readiness probe retries the checks alone,
+    one probe at a time and at most every READINESS_RECHECK_SECONDS however often it
+    comes. Priming runs once, in the background, after the checks first pass.
+    """
+    now = time.monotonic()
+    if lifecycle.checking or now - lifecycle.last_check < Config.READINESS_RECHECK_SECONDS:
+        return
+    lifecycle.checking, lifecycle.last_check = True, now
+    try:
+        if await run_checks() and not lifecycle.primed:
+            lifecycle.primed = True
+            lifecycle.priming = asyncio.create_task(prime())
+    finally:
+        lifecycle.checking = False
+
+# ==========================================
+# 3. Graceful Shutdown
+# ==========================================
+def install_sigterm_hook():
+    """
+    Flip readiness to 'draining' the moment SIGTERM arrives, then hand the signal
+    to the server (uvicorn/gunicorn) after SHUTDOWN_READINESS_DELAY seconds so the
+    load balancer has time to notice before connections stop being accepted.
+    """
+    previous = signal.getsignal(signal.SIGTERM)
+    loop = asyncio.get_running_loop()
+
+    def handle_sigterm(signum, frame):
+        lifecycle.draining = True
+        # Live streams never finish on their own, so end them now or they'd hold the server open
+        loop.call_soon_threadsafe(review_broadcaster.close_all)
+        if callable(previous):
+            loop.call_later(Config.SHUTDOWN_READINESS_DELAY, previous, signum, frame)
+
+    try:
+        signal.signal(signal.SIGTERM, handle_sigterm)
+    except ValueError:
+        # Signals can only be handled from the main thread (not the case under TestClient)
+        pass
+
+async def drain_in_flight():
+    deadline = time.monotonic() + Config.SHUTDOWN_DRAIN_TIMEOUT
+    while lifecycle.in_flight and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    if lifecycle.in_flight:
+        logger.warning(f"Shutting down with {lifecycle.in_flight} requests still in flight")
+
+async def close_clients():
+    if get_redis.cache_info().currsize:
+        await get_redis().aclose()
+    if get_sync_redis.cache_info().currsize:
+        get_sync_redis().close()
+    engine.dispose()
+    for replica in replica_router.engines:
+        replica.dispose()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    lifecycle.ready = False
+    lifecycle.draining = False
+    lifecycle.primed = False
+    lifecycle.last_check = float("-inf")
+    # Here rather than at import time: no-op unless TRACING_ENABLED
+    setup_tracing(app)
+    access_log.start()
+    install_sigterm_hook()
+    await warm_up()
+    outbox_dispatcher.start()
+    autocomplete_sync.start()
+    view_counter.start()
+    review_broadcaster.start()
+
+    yield
+
+    lifecycle.draining = True
+    lifecycle.ready = False
+    await review_broadcaster.stop()
+    await drain_in_flight()
+    # Stopped after the drain so jobs queued by the last requests are still pushed out
+    await outbox_dispatcher.stop()
+    await autocomplete_sync.stop()
+    # Final flush so a graceful shutdown loses no views
+    await view_counter.stop()
+    await close_clients()
+    access_log.stop()
+
+# ==========================================
+# 4. In-Flight Tracking Middleware
+# ==========================================
+class InFlightMiddleware:
+    """Counts running requests and turns new ones away once we are draining."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/health"):
+            return await self.app(scope, receive, send)
+
+        if lifecycle.draining:
+            response = JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"error_code": "SHUTTING_DOWN", "message": "Server is shutting down, please retry."},
+                headers={"Connection": "close", "Retry-After": "1"}
+            )
+            return await response(scope, receive, send)
+
+        lifecycle.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lifecycle.in_flight -= 1
+
+# ==========================================
+# 5. Health Endpoints
+# ==========================================
+health_router = APIRouter()
+
+@health_router.get("/live")
+async def liveness():
+    # The process is up and the event loop is answering
+    return {"status": "alive"}
+
+@health_router.get("/ready")
+async def readiness():
+    if not lifecycle.ready and not lifecycle.draining:
+        # Dependencies were down at startup; try again so we can recover without a restart
+        await recheck()
+
+    is_ready = lifecycle.ready and not lifecycle.draining
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if is_ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "status": "ready" if is_ready else ("draining" if lifecycle.draining else "starting"),
+            "checks": lifecycle.checks
+        }
+    )
+
+@health_router.get("/pool")
+async def pool_status():
+    # Per worker: how many connections are out and how long requests hold them
+    return {"pools": [metrics.snapshot() for metrics in pool_metrics]}
+
+@health_router.get("/tasks")
+async def task_status():
+    # Celery queue depth (from the broker) and per-task run counts and durations (from the workers)
+    from redis.exceptions import RedisError
+    try:
+        return await task_snapshot(get_redis())
+    except RedisError as e:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"status": "unavailable", "error": str(e)})
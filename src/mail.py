@@ -1,22 +1,28 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
 from pydantic import EmailStr, BaseModel
 from typing import List
+from functools import lru_cache
 from itsdangerous import URLSafeTimedSerializer
 from config import Config
 from pathlib import Path
 
 # 1. Email Configuration
-conf = ConnectionConfig(
-    MAIL_USERNAME=Config.MAIL_USERNAME,
-    MAIL_PASSWORD=Config.MAIL_PASSWORD,
-    MAIL_FROM=Config.MAIL_FROM,
-    MAIL_PORT=Config.MAIL_PORT,
-    MAIL_SERVER=Config.MAIL_SERVER,
-    MAIL_STARTTLS=Config.MAIL_STARTTLS,
-    MAIL_SSL_TLS=Config.MAIL_SSL_TLS,
-    USE_CREDENTIALS=Config.USE_CREDENTIALS,
-    VALIDATE_CERTS=Config.VALIDATE_CERTS
-)
+# fastapi_mail is heavy to import, so the client is only built the first time we send.
+@lru_cache(maxsize=None)
+def get_mail():
+    from fastapi_mail import FastMail, ConnectionConfig
+
+    conf = ConnectionConfig(
+        MAIL_USERNAME=Config.MAIL_USERNAME,
+        MAIL_PASSWORD=Config.MAIL_PASSWORD,
+        MAIL_FROM=Config.MAIL_FROM,
+        MAIL_PORT=Config.MAIL_PORT,
+        MAIL_SERVER=Config.MAIL_SERVER,
+        MAIL_STARTTLS=Config.MAIL_STARTTLS,
+        MAIL_SSL_TLS=Config.MAIL_SSL_TLS,
+        USE_CREDENTIALS=Config.USE_CREDENTIALS,
+        VALIDATE_CERTS=Config.VALIDATE_CERTS
+    )
+    return FastMail(conf)
 
 # 2. Token Logic (ItsDangerous)
 serializer = URLSafeTimedSerializer(
@@ -47,12 +53,12 @@ def decode_url_safe_token(token: str):
 class EmailSchema(BaseModel):
     emails: List[EmailStr]
 
-mail = FastMail(conf)
-
 async def send_verification_email(emails: List[str], link: str):
     """
     Constructs and sends the verification email.
     """
+    from fastapi_mail import MessageSchema, MessageType
+
     html = f"""
     <h1>Verify your Bookly Account</h1>
     <p>Please click this <a href="{link}">link</a> to verify your email address.</p>
@@ -66,4 +72,4 @@ async def send_verification_email(emails: List[str], link: str):
         subtype=MessageType.html
     )
 
-    await mail.send_message(message)
\ No newline at end of file
+    await get_mail().send_message(message)
\ No newline at end of file
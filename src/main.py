@@ -3,13 +3,15 @@ from books.routes import book_router
 from auth.routes import router as auth_router
 from reviews.routes import review_router
 from errors import register_all_errors
+from lifespan import lifespan, health_router
 # 1. IMPORT MIDDLEWARE FUNCTION
 from middleware import register_middleware 
 
 app = FastAPI(
     title="Bookly",
     description="A REST API for a Book Review Service",
-    version="v1"
+    version="v1",
+    lifespan=lifespan
 )
 
 # 2. REGISTER MIDDLEWARE (Execute this before routes!)
@@ -21,4 +23,5 @@ register_all_errors(app)
 # 4. Register Routes
 app.include_router(book_router, prefix="/api/v1/books", tags=['books'])
 app.include_router(auth_router, prefix="/api/v1/auth", tags=['auth'])
-app.include_router(review_router, prefix="/api/v1/reviews", tags=['reviews'])
\ No newline at end of file
+app.include_router(review_router, prefix="/api/v1/reviews", tags=['reviews'])
+app.include_router(health_router, prefix="/health", tags=['health'])
\ No newline at end of file
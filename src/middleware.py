@@ -1,43 +1,23 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-import time
-import logging
-
-# 1. Configure the Logger
-# We specificially use 'uvicorn.access' so our logs look like the standard server logs
-logger = logging.getLogger("uvicorn.access")
-# Ensure it's not disabled
-logger.disabled = False 
-
-async def log_request_time(request: Request, call_next):
-    """
-    Middleware to log the method, URL, and execution time of every request.
-    """
-    start_time = time.time()
-    
-    # Process the request
-    response = await call_next(request)
-    
-    # Calculate duration
-    process_time = time.time() - start_time
-    
-    # Log using the standard Python logging module
-    message = f"{request.client.host}:{request.client.port} - {request.method} - {request.url.path} - completed in {process_time:.4f}s"
-    logger.info(message)
-    
-    # Add custom header to response (visible in Postman)
-    response.headers["X-Process-Time"] = str(process_time)
-    
-    return response
+from lifespan import InFlightMiddleware
+from compression import CompressionMiddleware
+from access_log import AccessLogMiddleware
+from admission import AdmissionMiddleware
+from config import Config
 
 def register_middleware(app: FastAPI):
     """
     Central function to register all middleware.
     """
-    # A. Register Custom Logging
-    # We use 'http' middleware for intercepting requests
-    app.middleware("http")(log_request_time)
+    # A. Register Access Logging
+    # Structured JSON, sampled, written by a background thread (see access_log.py)
+    app.add_middleware(
+        AccessLogMiddleware,
+        sample_rate=Config.ACCESS_LOG_SAMPLE_RATE,
+        slow_ms=Config.ACCESS_LOG_SLOW_MS
+    )
     
     # B. Register CORS (Cross-Origin Resource Sharing)
     # This allows your API to be called from a web browser on a different domain/port
@@ -54,4 +34,24 @@ def register_middleware(app: FastAPI):
     app.add_middleware(
         TrustedHostMiddleware,
         allowed_hosts=["localhost", "127.0.0.1", "0.0.0.0"] # Add your domain.com here later
-    )
\ No newline at end of file
+    )
+
+    # D. Register Response Compression (zstd / brotli / gzip, negotiated per request)
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=Config.COMPRESSION_MINIMUM_SIZE,
+        levels={
+            "gzip": Config.COMPRESSION_GZIP_LEVEL,
+            "br": Config.COMPRESSION_BROTLI_QUALITY,
+            "zstd": Config.COMPRESSION_ZSTD_LEVEL,
+        }
+    )
+
+    # E. Register Admission Control (adaptive concurrency limits, fast 503 when overloaded)
+    # Sits right inside the in-flight tracker so shed requests cost as little as possible
+    if Config.ADMISSION_ENABLED:
+        app.add_middleware(AdmissionMiddleware)
+
+    # F. Track In-Flight Requests (registered last so it wraps everything else)
+    # Lets shutdown wait for running requests and reject new ones while draining
+    app.add_middleware(InFlightMiddleware)
\ No newline at end of file
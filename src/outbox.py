@@ -0,0 +1,173 @@
+"""
+Transactional outbox.
+
+Request handlers never talk to the Celery broker. They call `enqueue_task()` on
+the same session as their own writes, so the job row commits (or rolls back)
+together with the data it is about. `OutboxDispatcher` then publishes pending
+rows to Celery in batches, retrying with backoff until the broker accepts them.
+"""
+from sqlmodel import Session, select, delete
+from sqlalchemy.dialects.postgresql import insert
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import time
+from config import Config
+from db.main import engine
+from db.models import OutboxMessage
+import tracing
+
+logger = logging.getLogger(__name__)
+
+# ==========================================
+# 1. Enqueue (inside the caller's transaction)
+# ==========================================
+def enqueue_task(session: Session, task_name: str, payload: dict, dedup_key: str):
+    """Adds a job to the outbox. Does NOT commit: it rides on the caller's transaction."""
+    statement = (
+        insert(OutboxMessage)
+        .values(task_name=task_name, payload=payload, dedup_key=dedup_key, trace_context=tracing.current_context())
+        .on_conflict_do_nothing(index_elements=["dedup_key"])
+    )
+    session.exec(statement)
+
+# ==========================================
+# 2. Dispatch (outside any request)
+# ==========================================
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(2 ** attempts, 300))
+
+def record_failure(message: OutboxMessage, error: Exception, now: datetime):
+    message.attempts += 1
+    message.last_error = str(error)[:500]
+    if message.attempts >= Config.OUTBOX_MAX_ATTEMPTS:
+        message.status = "failed"
+        logger.error(f"Outbox message {message.uid} ({message.task_name}) failed permanently: {error}")
+    else:
+        message.available_at = now + retry_delay(message.attempts)
+
+def dispatch_pending(batch_size: int = None) -> int:
+    """
+    Publishes one batch of due messages to Celery and returns how many were handled.
+    FOR UPDATE SKIP LOCKED lets every worker process run a dispatcher without
+    two of them ever picking the same row.
+    """
+    now = datetime.now()
+    with Session(engine) as session:
+        statement = (
+            select(OutboxMessage)
+            .where(OutboxMessage.status == "pending", OutboxMessage.available_at <= now)
+            .order_by(OutboxMessage.available_at)
+            .limit(batch_size or Config.OUTBOX_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        messages = session.exec(statement).all()
+        if not messages:
+            return 0
+
+        # Imported here so idle web workers never load Celery
+        from celery_tasks import c_celery
+
+        handled = set()
+        try:
+            # One broker connection for the whole batch
+            with c_celery.producer_or_acquire() as producer:
+                for message in messages:
+                    try:
+                        # retry=False: the outbox does its own retries, never block here.
+                        # Published inside the queuing request's trace, so the task joins it.
+                        with tracing.attached(message.trace_context):
+                            c_celery.send_task(
+                                message.task_name,
+                                kwargs=message.payload,
+                                task_id=str(message.uid),
+                                producer=producer,
+                                retry=False
+                            )
+                        message.status = "dispatched"
+                        message.dispatched_at = now
+                    except Exception as e:
+                        record_failure(message, e, now)
+                    handled.add(message.uid)
+                    session.add(message)
+        except Exception as e:
+            # No broker connection at all (or it broke mid-batch): every message not yet
+            # handled backs off like a single failed send, so the rows never stay stuck
+            logger.warning(f"Outbox batch could not reach the broker: {e}")
+            for message in messages:
+                if message.uid not in handled:
+                    record_failure(message, e, now)
+                    session.add(message)
+
+        session.commit()
+        return len(messages)
+
+def purge_dispatched():
+    cutoff = datetime.now() - timedelta(days=Config.OUTBOX_RETENTION_DAYS)
+    with Session(engine) as session:
+        session.exec(
+            delete(OutboxMessage).where(
+                OutboxMessage.status == "dispatched",
+                OutboxMessage.dispatched_at < cutoff
+            )
+        )
+        session.commit()
+
+class OutboxDispatcher:
+    """
+    Background loop run by the app's lifespan. It sweeps the outbox every
+    OUTBOX_POLL_INTERVAL seconds, or right away when `notify()` is called.
+    """
+    PURGE_EVERY = 3600  # seconds
+
+    def __init__(self):
+        self._wakeup = None
+        self._loop = None
+        self._task = None
+        self._last_purge = 0.0
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        # Last sweep on the way out. Anything left stays 'pending' for the next dispatcher.
+        try:
+            await run_in_threadpool(dispatch_pending)
+        except Exception as e:
+            logger.warning(f"Final outbox sweep failed: {e}")
+
+    def notify(self):
+        """Thread-safe: ask for a sweep now instead of at the next tick."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self):
+        while True:
+            try:
+                # Keep going while full batches come back, there may be more waiting
+                while await run_in_threadpool(dispatch_pending) >= Config.OUTBOX_BATCH_SIZE:
+                    pass
+                if time.monotonic() - self._last_purge > self.PURGE_EVERY:
+                    await run_in_threadpool(purge_dispatched)
+                    self._last_purge = time.monotonic()
+            except Exception as e:
+                logger.warning(f"Outbox dispatch failed: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=Config.OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+outbox_dispatcher = OutboxDispatcher()
@@ -1,33 +1,53 @@
 from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse
 from sqlmodel import Session
 from typing import List
 import uuid # <--- Ensure this is imported
-from db.main import get_session
+from db.main import get_session, get_read_session, SessionReleasingRoute
 from .service import ReviewService
 from .schemas import ReviewModel, ReviewCreateModel
-from auth.dependencies import AccessTokenBearer
+from auth.dependencies import access_token_bearer, record_user_write
 from errors import ReviewNotFound, BookNotFound
+from fieldsets import select_fields, serialize, FieldSelection
 
-review_router = APIRouter()
+review_router = APIRouter(route_class=SessionReleasingRoute)
 review_service = ReviewService()
-access_token_bearer = AccessTokenBearer()
 
 error_404 = {404: {"description": "Not found"}}
 error_401 = {401: {"description": "Not authenticated"}}
 
+# ?fields=uid,rating
+review_fields = select_fields(ReviewModel)
+
 @review_router.get("/", response_model=List[ReviewModel])
-def get_all_reviews(session: Session = Depends(get_session)):
+def get_all_reviews(
+    selection: FieldSelection = Depends(review_fields),
+    session: Session = Depends(get_read_session)
+):
+    if selection.is_sparse:
+        rows = review_service.get_all_reviews_fields(selection, session)
+        return JSONResponse([serialize(ReviewModel, row, selection.fields) for row in rows])
     return review_service.get_all_reviews(session)
 
 # ✅ THE FIX: Change 'str' to 'uuid.UUID' to catch garbage IDs
 @review_router.get("/{review_uid}", response_model=ReviewModel, responses=error_404)
-def get_review(review_uid: uuid.UUID, session: Session = Depends(get_session)):
+def get_review(
+    review_uid: uuid.UUID,
+    selection: FieldSelection = Depends(review_fields),
+    session: Session = Depends(get_read_session)
+):
+    if selection.is_sparse:
+        row = review_service.get_review_fields(str(review_uid), selection, session)
+        if not row:
+            raise ReviewNotFound()
+        return JSONResponse(serialize(ReviewModel, row, selection.fields))
+
     review = review_service.get_review(str(review_uid), session)
     if not review:
         raise ReviewNotFound()
     return review
 
-@review_router.post("/book/{book_uid}", response_model=ReviewModel, responses={**error_404, **error_401})
+@review_router.post("/book/{book_uid}", response_model=ReviewModel, dependencies=[Depends(record_user_write)], responses={**error_404, **error_401})
 def add_review_to_book(
     book_uid: uuid.UUID, # ✅ UUID here too
     review_data: ReviewCreateModel, 
@@ -42,7 +62,7 @@ def add_review_to_book(
         session=session
     )
 
-@review_router.delete("/{review_uid}", status_code=status.HTTP_204_NO_CONTENT, responses={**error_404, **error_401})
+@review_router.delete("/{review_uid}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(record_user_write)], responses={**error_404, **error_401})
 def delete_review(
     review_uid: uuid.UUID, # ✅ UUID here too
     session: Session = Depends(get_session),
@@ -1,14 +1,48 @@
-from sqlmodel import Session, select, desc
+from sqlmodel import Session, select, desc, insert
+from sqlalchemy import lambda_stmt, literal, exists
+from sqlalchemy.exc import IntegrityError
 from db.models import Review, Book
 from .schemas import ReviewCreateModel
 from errors import ReviewNotFound, BookNotFound
+from .stream import publish_review
+from books.read_model import book_changed
+from tracing import traced
+import leaderboards
 import uuid
 
+# Postgres SQLSTATE for foreign_key_violation
+FOREIGN_KEY_VIOLATION = "23503"
+
+# Reviews of a soft-deleted book stay in the table until purge_book removes them, hidden
+# like the book. NOT EXISTS rather than NOT IN: reviews can have no book at all.
+ON_LIVE_BOOK = ~exists().where(Book.uid == Review.book_uid, Book.deleted_at.is_not(None))
+
+# Hot lookup as a cached lambda statement (see book_by_uid in books/service.py)
+def review_by_uid(review_uid: uuid.UUID):
+    return lambda_stmt(lambda: select(Review).where(Review.uid == review_uid, ON_LIVE_BOOK))
+
+def is_foreign_key_violation(error: IntegrityError, column: str) -> bool:
+    orig = error.orig
+    if getattr(orig, "pgcode", None) != FOREIGN_KEY_VIOLATION:
+        return False
+    # e.g. 'Key (book_uid)=(...) is not present in table "books".'
+    return f"({column})" in (getattr(orig.diag, "message_detail", None) or str(orig))
+
+@traced
 class ReviewService:
     def get_all_reviews(self, session: Session):
-        statement = select(Review).order_by(desc(Review.created_at))
+        statement = select(Review).where(ON_LIVE_BOOK).order_by(desc(Review.created_at))
         return session.exec(statement).all()
 
+    def get_all_reviews_fields(self, selection, session: Session):
+        # Sparse fieldsets (?fields=...): only the requested columns are selected
+        statement = selection.select(Review).where(ON_LIVE_BOOK).order_by(desc(Review.created_at))
+        return session.exec(statement).all()
+
+    def get_review_fields(self, review_uid: str, selection, session: Session):
+        statement = selection.select(Review).where(Review.uid == uuid.UUID(review_uid), ON_LIVE_BOOK)
+        return session.exec(statement).first()
+
     # ✅ ADDED THIS (Fixes the crash)
     def get_review(self, review_uid: str, session: Session):
         try:
@@ -16,8 +50,7 @@ class ReviewService:
         except ValueError:
             return None
             
-        statement = select(Review).where(Review.uid == uid_obj)
-        return session.exec(statement).first()
+        return session.exec(review_by_uid(uid_obj)).scalars().first()
 
     def add_review_to_book(self, user_uid: str, book_uid: str, review_data: ReviewCreateModel, session: Session):
         try:
@@ -26,20 +59,30 @@ class ReviewService:
         except ValueError:
             raise BookNotFound()
 
-        book_statement = select(Book).where(Book.uid == book_uid_obj)
-        book = session.exec(book_statement).first()
-        
-        if not book:
+        # One round-trip: INSERT ... SELECT from the book, so an unknown or soft-deleted
+        # book inserts nothing (a deleted book still satisfies the FK)
+        values = {**review_data.model_dump(), "user_uid": user_uid_obj}
+        book = (
+            select(*[literal(value, Review.__table__.c[name].type) for name, value in values.items()], Book.uid)
+            .where(Book.uid == book_uid_obj, Book.deleted_at.is_(None))
+        )
+        statement = insert(Review).from_select([*values, "book_uid"], book).returning(Review)
+        try:
+            new_review = session.exec(statement).scalars().first()
+        except IntegrityError as e:
+            session.rollback()
+            # The book was purged between the SELECT and the FK check
+            if is_foreign_key_violation(e, "book_uid"):
+                raise BookNotFound()
+            raise
+        if new_review is None:
+            session.rollback()
             raise BookNotFound()
-            
-        review_data_dict = review_data.model_dump()
-        new_review = Review(**review_data_dict)
-        new_review.user_uid = user_uid_obj
-        new_review.book_uid = book_uid_obj
-        
-        session.add(new_review)
+
+        book_changed(session, new_review.book_uid)
         session.commit()
-        session.refresh(new_review)
+        leaderboards.review_added(str(new_review.book_uid), new_review.rating, new_review.created_at)
+        publish_review(new_review)
         return new_review
 
     # ✅ ADDED THIS
@@ -50,5 +93,9 @@ class ReviewService:
             raise ReviewNotFound()
             
         session.delete(review)
+        if review.book_uid:
+            book_changed(session, review.book_uid)
         session.commit()
+        if review.book_uid:
+            leaderboards.review_removed(str(review.book_uid), review.rating, review.created_at)
         return None
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+Live feed of new reviews per book, as Server-Sent Events.
+
+`add_review_to_book` publishes each new review on `reviews:book:<book_uid>`. Every
+worker holds ONE pattern subscription to those channels and fans each message out
+to the local clients watching that book, so an open book page costs a queue in
+memory and no database queries.
+
+Backpressure: each client gets a queue of REVIEW_STREAM_QUEUE_SIZE events. A client
+that falls that far behind is disconnected rather than allowed to grow memory; the
+browser's EventSource reconnects by itself. Each worker takes at most
+REVIEW_STREAM_MAX_CLIENTS streams and answers 503 beyond that.
+"""
+import asyncio
+import logging
+from config import Config
+from errors import StreamCapacityReached
+from .schemas import ReviewModel
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "reviews:book:"
+
+# ==========================================
+# 1. Publishing (called after the review is committed)
+# ==========================================
+def publish_review(review):
+    from redis.exceptions import RedisError
+    from db.redis import get_sync_redis
+    payload = ReviewModel.model_validate(review).model_dump_json()
+    try:
+        get_sync_redis().publish(f"{CHANNEL_PREFIX}{review.book_uid}", payload)
+    except RedisError as e:
+        # Open pages just miss this one live update; the review itself is saved
+        logger.warning(f"Could not publish review {review.uid}: {e}")
+
+# ==========================================
+# 2. Per-Worker Fan-Out
+# ==========================================
+class Subscriber:
+    def __init__(self, book_uid: str):
+        self.book_uid = book_uid
+        self.queue = asyncio.Queue(maxsize=Config.REVIEW_STREAM_QUEUE_SIZE)
+        self.closed = False
+
+    def close(self):
+        """Ends the stream: drops whatever is queued and wakes the reader with None."""
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+class ReviewBroadcaster:
+    def __init__(self):
+        self.subscribers = {}  # book_uid -> set of Subscriber
+        self.count = 0
+        self._task = None
+
+    def check_capacity(self):
+        if self.count >= Config.REVIEW_STREAM_MAX_CLIENTS:
+            raise StreamCapacityReached()
+
+    def subscribe(self, book_uid: str) -> Subscriber:
+        subscriber = Subscriber(book_uid)
+        self.subscribers.setdefault(book_uid, set()).add(subscriber)
+        self.count += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        watchers = self.subscribers.get(subscriber.book_uid)
+        if watchers is None or subscriber not in watchers:
+            return
+        watchers.discard(subscriber)
+        if not watchers:
+            del self.subscribers[subscriber.book_uid]
+        self.count -= 1
+
+    def dispatch(self, book_uid: str, payload: str):
+        for subscriber in list(self.subscribers.get(book_uid, ())):
+            if subscriber.closed:
+                continue
+            try:
+                subscriber.queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                logger.info(f"Dropping a review stream for {book_uid}: client fell {subscriber.queue.maxsize} events behind")
+                subscriber.close()
+
+    def close_all(self):
+        """Ends every open stream (shutdown), so connections don't hold the server open."""
+        for watchers in self.subscribers.values():
+            for subscriber in watchers:
+                if not subscriber.closed:
+                    subscriber.close()
+
+    # Lifespan hooks
+    def start(self):
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        self.close_all()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _listen(self):
+        from db.redis import get_redis
+        while True:
+            try:
+                async with get_redis().pubsub() as pubsub:
+                    await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                    async for message in pubsub.listen():
+                        if message["type"] != "pmessage":
+                            continue
+                        self.dispatch(message["channel"][len(CHANNEL_PREFIX):], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Review stream subscription lost: {e}")
+                await asyncio.sleep(5)
+
+review_broadcaster = ReviewBroadcaster()
+
+# ==========================================
+# 3. SSE Formatting
+# ==========================================
+def format_event(payload: str, event: str = "review") -> str:
+    lines = [f"event: {event}"]
+    lines.extend(f"data: {line}" for line in payload.splitlines())
+    return "\n".join(lines) + "\n\n"
+
+async def review_events(book_uid: str):
+    """
+    The response body: reviews as they arrive, with a comment line as keep-alive.
+    Subscribes here rather than in the route so the `finally` always pairs with it.
+    """
+    subscriber = review_broadcaster.subscribe(book_uid)
+    try:
+        # Tell EventSource how long to wait before reconnecting
+        yield f"retry: {Config.REVIEW_STREAM_RETRY_MS}\n\n"
+        while True:
+            try:
+                payload = await asyncio.wait_for(subscriber.queue.get(), timeout=Config.REVIEW_STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Keeps proxies from timing the idle connection out
+                yield ": ping\n\n"
+                continue
+            if payload is None:
+                return
+            yield format_event(payload)
+    finally:
+        review_broadcaster.unsubscribe(subscriber)
@@ -0,0 +1,67 @@
+"""
+Startup (import-time) report.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter and shows
+what each module costs before the app can serve its first request.
+
+Usage (from the project root):
+    python src/startup_report.py            # top 25 modules by cumulative time
+    python src/startup_report.py --top 50
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import List, NamedTuple
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class ImportTiming(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+def parse_importtime(output: str) -> List[ImportTiming]:
+    """
+    Parses the stderr of `python -X importtime`. Lines look like:
+        import time:       454 |      13576 |           psycopg2
+    """
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # the header row
+        # One space after the "|", then two more per level of nesting
+        name = parts[2].rstrip()[1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        timings.append(ImportTiming(name.strip(), int(parts[0]), int(parts[1]), depth))
+    return timings
+
+def measure_imports(module: str = "main") -> List[ImportTiming]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return parse_importtime(result.stderr)
+
+def print_report(timings: List[ImportTiming], top: int = 25):
+    total = next((t.cumulative_us for t in timings if t.module == "main" and t.depth == 0), None)
+    if total is not None:
+        print(f"Total import time for 'main': {total / 1000:.1f} ms\n")
+
+    print(f"{'cumulative (ms)':>16} {'self (ms)':>10}  module")
+    for t in sorted(timings, key=lambda t: t.cumulative_us, reverse=True)[:top]:
+        print(f"{t.cumulative_us / 1000:>16.1f} {t.self_us / 1000:>10.1f}  {t.module}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show what each module costs at startup.")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+    print_report(measure_imports(args.module), args.top)
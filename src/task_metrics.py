@@ -0,0 +1,83 @@
+"""
+Celery task telemetry, served by GET /health/tasks.
+
+Workers record every run in Redis (see the signal handlers in celery_tasks.py):
+a run/failure counter per task and its last TASK_METRICS_WINDOW durations. Queue
+depth is read straight from the broker, which is the same Redis: each queue is a
+list, plus one list per non-default priority level.
+
+Nothing here imports Celery, so the web app can serve the numbers without loading it.
+"""
+from config import Config
+
+# Transactional work (a user is waiting for it) never queues behind batch jobs
+EMAIL_QUEUE = "email"
+BATCH_QUEUE = "batch"
+QUEUES = [EMAIL_QUEUE, BATCH_QUEUE]
+
+TASKS_KEY = "task-metrics:tasks"
+# kombu's Redis transport keeps priorities 3, 6 and 9 in separate lists next to the queue
+PRIORITY_SUFFIXES = ["", "\x06\x163", "\x06\x166", "\x06\x169"]
+
+def stats_key(task_name: str) -> str:
+    return f"task-metrics:{task_name}"
+
+def durations_key(task_name: str) -> str:
+    return f"task-metrics:{task_name}:durations"
+
+# ==========================================
+# 1. Recording (worker side, sync Redis)
+# ==========================================
+def record_task(redis, task_name: str, queue: str, seconds: float, failed: bool):
+    pipe = redis.pipeline(transaction=False)
+    pipe.sadd(TASKS_KEY, task_name)
+    pipe.hincrby(stats_key(task_name), "runs", 1)
+    if failed:
+        pipe.hincrby(stats_key(task_name), "failures", 1)
+    if queue:
+        pipe.hset(stats_key(task_name), "queue", queue)
+    pipe.lpush(durations_key(task_name), round(seconds * 1000, 2))
+    pipe.ltrim(durations_key(task_name), 0, Config.TASK_METRICS_WINDOW - 1)
+    pipe.execute()
+
+# ==========================================
+# 2. Reading (web side, async Redis)
+# ==========================================
+def summarize(stats: dict, durations: list) -> dict:
+    values = sorted(float(ms) for ms in durations)
+
+    def percentile(p: float):
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(p * len(values)))]
+
+    return {
+        "queue": stats.get("queue"),
+        "runs": int(stats.get("runs", 0)),
+        "failures": int(stats.get("failures", 0)),
+        "duration_ms": {"p50": percentile(0.50), "p95": percentile(0.95), "max": percentile(1.0)},
+    }
+
+async def task_snapshot(redis, queues: list = QUEUES) -> dict:
+    names = sorted(await redis.smembers(TASKS_KEY))
+
+    pipe = redis.pipeline(transaction=False)
+    for queue in queues:
+        for suffix in PRIORITY_SUFFIXES:
+            pipe.llen(queue + suffix)
+    for name in names:
+        pipe.hgetall(stats_key(name))
+        pipe.lrange(durations_key(name), 0, -1)
+    results = await pipe.execute()
+
+    depths = results[:len(queues) * len(PRIORITY_SUFFIXES)]
+    per_task = results[len(depths):]
+    return {
+        "queues": {
+            queue: sum(depths[i * len(PRIORITY_SUFFIXES):(i + 1) * len(PRIORITY_SUFFIXES)])
+            for i, queue in enumerate(queues)
+        },
+        "tasks": {
+            name: summarize(per_task[2 * i], per_task[2 * i + 1]) for i, name in enumerate(names)
+        },
+    }
@@ -2,7 +2,7 @@ from unittest.mock import Mock
 import pytest
 from fastapi.testclient import TestClient
 from main import app
-from db.main import get_session
+from db.main import get_session, get_read_session
 from auth.service import UserService
 # 1. UPDATE IMPORT: Get the INSTANCE 'access_token_bearer'
 from auth.dependencies import access_token_bearer, get_current_user
@@ -50,6 +50,7 @@ def mock_user_service(mock_session):
 @pytest.fixture
 def client(mock_session):
     app.dependency_overrides[get_session] = lambda: mock_session
+    app.dependency_overrides[get_read_session] = lambda: mock_session
     
     # 2. CRITICAL FIX: Override the INSTANCE
     app.dependency_overrides[access_token_bearer] = mock_get_token_payload
@@ -0,0 +1,81 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import asyncio
+from admission import (
+    AdmissionMiddleware, GradientLimit, Limiter,
+    PRIORITY_WRITE, PRIORITY_ANONYMOUS, request_priority
+)
+
+def test_limit_grows_while_latency_holds_and_shrinks_when_it_climbs():
+    limit = GradientLimit(initial=20, min_limit=2, max_limit=500)
+    for _ in range(200):
+        limit.on_sample(0.010, in_flight=int(limit.limit))
+    grown = limit.limit
+    assert grown > 20
+
+    for _ in range(50):
+        limit.on_sample(0.100, in_flight=int(limit.limit))
+    assert limit.limit < grown
+
+def test_limit_ignores_latency_when_not_under_load():
+    limit = GradientLimit(initial=20, min_limit=2, max_limit=500)
+    for _ in range(100):
+        limit.on_sample(0.010, in_flight=1)
+    assert limit.limit == 20
+
+def test_queued_writes_go_before_anonymous_reads():
+    async def scenario():
+        limiter = Limiter(GradientLimit(1, 1, 1), queue_size=10)
+        assert await limiter.acquire(PRIORITY_ANONYMOUS, timeout=1)
+        order = []
+
+        async def wait(name, priority):
+            if await limiter.acquire(priority, timeout=1):
+                order.append(name)
+                limiter.release()
+
+        waiters = [asyncio.create_task(wait("read", PRIORITY_ANONYMOUS)), asyncio.create_task(wait("write", PRIORITY_WRITE))]
+        await asyncio.sleep(0)
+        limiter.release()
+        await asyncio.gather(*waiters)
+        return order, limiter.in_flight
+
+    assert asyncio.run(scenario()) == (["write", "read"], 0)
+
+def test_full_queue_and_deadline_reject():
+    async def scenario():
+        limiter = Limiter(GradientLimit(1, 1, 1), queue_size=1)
+        await limiter.acquire(PRIORITY_ANONYMOUS, timeout=1)
+        timed_out = await limiter.acquire(PRIORITY_ANONYMOUS, timeout=0.01)
+
+        queued = asyncio.create_task(limiter.acquire(PRIORITY_ANONYMOUS, timeout=1))
+        await asyncio.sleep(0)
+        # Same priority can't displace it, a write can
+        refused = await limiter.acquire(PRIORITY_ANONYMOUS, timeout=1)
+        writer = asyncio.create_task(limiter.acquire(PRIORITY_WRITE, timeout=1))
+        await asyncio.sleep(0)
+        displaced = await queued
+        limiter.release()
+        return timed_out, refused, displaced, await writer
+
+    assert asyncio.run(scenario()) == (False, False, False, True)
+
+def test_request_priority():
+    assert request_priority({"method": "POST", "headers": [(b"authorization", b"Bearer x")]}) == PRIORITY_WRITE
+    assert request_priority({"method": "GET", "headers": []}) == PRIORITY_ANONYMOUS
+
+def test_overloaded_route_gets_fast_503(monkeypatch):
+    monkeypatch.setattr("admission.Config.ADMISSION_ROUTE_INITIAL_LIMIT", 0)
+    monkeypatch.setattr("admission.Config.ADMISSION_MIN_LIMIT", 0)
+    monkeypatch.setattr("admission.Config.ADMISSION_QUEUE_SIZE", 0)
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware)
+
+    @app.get("/books")
+    def books():
+        return []
+
+    response = TestClient(app).get("/books")
+    assert response.status_code == 503
+    assert response.json()["error_code"] == "OVERLOADED"
+    assert response.headers["retry-after"] == "1"
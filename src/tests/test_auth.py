@@ -0,0 +1,57 @@
+from fastapi import status
+from datetime import datetime
+import uuid
+from main import app
+from auth.dependencies import get_current_user
+from db.models import User
+
+def make_user():
+    return User(
+        uid=uuid.uuid4(),
+        username="reader",
+        email="reader@example.com",
+        first_name="Avid",
+        last_name="Reader",
+        password_hash="hashed",
+        is_verified=True,
+        role="user",
+        created_at=datetime.now(),
+        updated_at=datetime.now()
+    )
+
+def test_me_returns_profile_with_counts_not_books(client, mock_session):
+    app.dependency_overrides[get_current_user] = make_user
+    mock_session.exec.return_value.one.return_value = (12, 34)
+
+    response = client.get("/api/v1/auth/me")
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["username"] == "reader"
+    assert data["book_count"] == 12
+    assert data["review_count"] == 34
+    assert "books" not in data
+    assert "password_hash" not in data
+
+def test_me_books_is_paginated(client, mock_session):
+    app.dependency_overrides[get_current_user] = make_user
+    mock_session.exec.return_value.all.return_value = []
+
+    response = client.get("/api/v1/auth/me/books?offset=20&limit=10")
+
+    assert response.status_code == status.HTTP_200_OK
+    statement = mock_session.exec.call_args.args[0]
+    assert statement._limit == 10 and statement._offset == 20
+
+    assert client.get("/api/v1/auth/me/books?limit=1000").status_code == 422
+
+def test_me_books_sparse_fields_are_paginated_too(client, mock_session):
+    app.dependency_overrides[get_current_user] = make_user
+    mock_session.exec.return_value.all.return_value = []
+
+    response = client.get("/api/v1/auth/me/books?fields=uid,title&offset=20&limit=10")
+
+    assert response.status_code == status.HTTP_200_OK
+    statement = mock_session.exec.call_args.args[0]
+    assert [column.name for column in statement.selected_columns] == ["uid", "title"]
+    assert statement._limit == 10 and statement._offset == 20
@@ -0,0 +1,78 @@
+import pytest
+from books.autocomplete import AutocompleteIndex, MAX_SUGGESTIONS
+from books import routes as book_routes
+from config import Config
+
+BOOKS = [
+    ("1", "The Lord of the Rings", "J. R. R. Tolkien", 50),
+    ("2", "The Hobbit", "J. R. R. Tolkien", 80),
+    ("3", "Cien años de soledad", "Gabriel García Márquez", 10),
+    ("4", "The Road", "Cormac McCarthy", 5),
+]
+
+def titles(results):
+    return [r["title"] for r in results]
+
+def test_prefix_matches_any_word_ranked_by_popularity():
+    index = AutocompleteIndex(max_bytes=10**6)
+    index.build(BOOKS)
+
+    assert titles(index.search("tolk")) == ["The Hobbit", "The Lord of the Rings"]
+    assert titles(index.search("the r")) == ["The Lord of the Rings", "The Road"]
+    # Case and accents don't matter
+    assert titles(index.search("GARCIA mar")) == ["Cien años de soledad"]
+    assert index.search("xyz") == []
+
+def test_incremental_updates():
+    index = AutocompleteIndex(max_bytes=10**6)
+    index.build(BOOKS)
+
+    index.add("2", "There and Back Again", "J. R. R. Tolkien")
+    assert titles(index.search("hob")) == []
+    assert titles(index.search("there")) == ["There and Back Again"]
+
+    index.remove("1")
+    assert titles(index.search("tolkien")) == ["There and Back Again"]
+
+def test_memory_budget_drops_least_popular_books():
+    budget = AutocompleteIndex(max_bytes=10**6)
+    budget.build(BOOKS[1:2])
+    index = AutocompleteIndex(max_bytes=budget.size_bytes)
+    index.build(BOOKS)
+
+    assert list(index.books) == ["2"]
+    assert index.skipped == 3
+    assert index.size_bytes <= index.max_bytes
+
+def test_short_prefixes_rank_the_whole_catalogue(monkeypatch):
+    monkeypatch.setattr(Config, "AUTOCOMPLETE_SCAN_LIMIT", 2)
+    # Alphabetically last, so a capped scan of "a" entries would never reach it
+    rows = [(str(i), f"Aardvark {i}", "Anon", 1) for i in range(MAX_SUGGESTIONS + 5)] + [("top", "Azure", "Zed", 100)]
+    index = AutocompleteIndex(max_bytes=10**6)
+    index.build(rows)
+
+    assert titles(index.search("a", 2)) == ["Azure", "Aardvark 0"]
+
+    index.add("new", "Ant", "Zed", popularity=50)
+    assert titles(index.search("a", 2)) == ["Azure", "Ant"]
+
+    # Dropping books from a full list rescans the prefix instead of leaving a gap
+    index.remove("top")
+    index.remove("new")
+    assert len(index.search("a", MAX_SUGGESTIONS)) == MAX_SUGGESTIONS
+    assert titles(index.search("a", 1)) == ["Aardvark 0"]
+
+@pytest.fixture
+def fresh_index(monkeypatch):
+    index = AutocompleteIndex(max_bytes=10**6)
+    monkeypatch.setattr(book_routes, "autocomplete_index", index)
+    return index
+
+def test_autocomplete_endpoint(client, fresh_index):
+    fresh_index.build([("7c9e6679-7425-40de-944b-e07fc1f90ae7", "Dune", "Frank Herbert", 1)])
+
+    response = client.get("/api/v1/books/autocomplete", params={"prefix": "du"})
+
+    assert response.status_code == 200
+    assert response.json() == [{"uid": "7c9e6679-7425-40de-944b-e07fc1f90ae7", "title": "Dune", "author": "Frank Herbert"}]
+    assert client.get("/api/v1/books/autocomplete", params={"prefix": ""}).status_code == 422
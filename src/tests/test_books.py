@@ -1,6 +1,9 @@
+from unittest.mock import Mock
 from fastapi import status
 from datetime import datetime, date
 import uuid
+from books.facets import facet_changes
+from books.read_model import refresh_statement
 
 def test_get_all_books(client, mock_session):
     # 1. Arrange: Create valid book data (Matches your Book Schema)
@@ -38,6 +41,7 @@ def test_create_book(client, mock_session):
         "page_count": 100,
         "language": "English"
     }
+    mock_session.exec.return_value.all.return_value = []  # no near-duplicates
 
     # 2. Act
     response = client.post("/api/v1/books/", json=book_data)
@@ -45,4 +49,77 @@ def test_create_book(client, mock_session):
     # 3. Assert
     assert response.status_code == status.HTTP_201_CREATED
     data = response.json()
-    assert data["title"] == "Unit Testing 101"
\ No newline at end of file
+    assert data["title"] == "Unit Testing 101"
+    # The book's detail document is written in the same transaction
+    assert any(call.args[0] is refresh_statement for call in mock_session.exec.call_args_list)
+
+def test_get_all_books_with_sparse_fields(client, mock_session):
+    # 1. Arrange: the DB only returns the requested columns
+    book_uid = uuid.uuid4()
+    row = Mock(_mapping={"uid": book_uid, "title": "Mock Book 1"})
+    mock_session.exec.return_value.all.return_value = [row]
+
+    # 2. Act
+    response = client.get("/api/v1/books/", params={"fields": "uid,title"})
+
+    # 3. Assert: the SELECT and the payload are both narrowed
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [{"uid": str(book_uid), "title": "Mock Book 1"}]
+    statement = mock_session.exec.call_args.args[0]
+    assert [column.name for column in statement.selected_columns] == ["uid", "title"]
+
+def test_get_book_reads_the_detail_document(client, mock_session):
+    # 1. Arrange: the precomputed document, as stored in book_details
+    book_uid = uuid.uuid4()
+    review = {
+        "uid": str(uuid.uuid4()), "rating": 5, "review_text": "Great", "user_uid": str(uuid.uuid4()),
+        "book_uid": str(book_uid), "created_at": "2025-01-02T10:00:00", "updated_at": "2025-01-02T10:00:00"
+    }
+    mock_session.get.return_value = Mock(document={
+        "uid": str(book_uid), "title": "Mock Book 1", "author": "Author One", "publisher": "Publisher One",
+        "published_date": "2020-01-01", "page_count": 200, "language": "English",
+        "created_at": "2025-01-01T10:00:00", "updated_at": "2025-01-01T10:00:00",
+        "reviews": [review], "review_count": 1, "average_rating": 5.0, "similar_books": []
+    })
+
+    # 2. Act
+    full = client.get(f"/api/v1/books/{book_uid}")
+    sparse = client.get(f"/api/v1/books/{book_uid}", params={"fields": "title,reviews.rating"})
+
+    # 3. Assert: one primary-key read, no query over books or reviews
+    assert full.status_code == status.HTTP_200_OK
+    assert full.json()["review_count"] == 1
+    assert full.json()["reviews"][0]["created_at"] == "2025-01-02T10:00:00Z"
+    assert sparse.json() == {"title": "Mock Book 1", "reviews": [{"rating": 5}]}
+    mock_session.exec.assert_not_called()
+
+def test_unknown_field_is_rejected(client):
+    response = client.get("/api/v1/books/", params={"fields": "title,password_hash"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["error_code"] == "INVALID_FIELDS"
+
+def test_filters_narrow_the_query(client, mock_session):
+    mock_session.exec.return_value.all.return_value = []
+
+    response = client.get("/api/v1/books/", params={"language": ["English", "French"], "min_pages": 100})
+
+    assert response.status_code == status.HTTP_200_OK
+    where = str(mock_session.exec.call_args.args[0].whereclause)
+    assert "books.language IN" in where and "books.page_count >=" in where
+
+def test_invalid_filter_range_is_rejected(client):
+    response = client.get("/api/v1/books/", params={"min_pages": 500, "max_pages": 100})
+
+    assert response.status_code == 422
+
+def test_facet_changes_only_touch_changed_values():
+    old = Mock(language="English", publisher="Penguin", author="A", published_date=date(1999, 5, 1), page_count=120)
+    new = Mock(language="French", publisher="Penguin", author="A", published_date=date(1999, 5, 1), page_count=520)
+
+    assert facet_changes(old=old, new=new) == {
+        ("language", "English"): -1,
+        ("language", "French"): 1,
+        ("page_range", "100-299"): -1,
+        ("page_range", "500+"): 1,
+    }
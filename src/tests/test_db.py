@@ -0,0 +1,97 @@
+from sqlalchemy import create_engine, text
+from db.main import ReplicaRouter, SessionReleasingRoute
+from db.pool_metrics import PoolMetrics
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from sqlmodel import Session
+from typing import List
+
+def test_replica_router_round_robin():
+    router = ReplicaRouter(
+        urls=["postgresql://u:p@replica-1/db", "postgresql://u:p@replica-2/db"],
+        check_interval=30
+    )
+
+    picks = [router.next_engine().url.host for _ in range(4)]
+
+    assert picks == ["replica-1", "replica-2", "replica-1", "replica-2"]
+
+def test_replica_router_skips_unhealthy_replica():
+    router = ReplicaRouter(
+        urls=["postgresql://u:p@replica-1/db", "postgresql://u:p@replica-2/db"],
+        check_interval=30
+    )
+    router.mark_down(router.engines[0])
+
+    picks = {router.next_engine().url.host for _ in range(4)}
+
+    # Replica 1 is not probed again until the check interval has passed
+    assert picks == {"replica-2"}
+
+def test_replica_router_falls_back_when_all_down():
+    router = ReplicaRouter(urls=["postgresql://u:p@replica-1/db"], check_interval=30)
+    router.mark_down(router.engines[0])
+
+    assert router.next_engine() is None
+
+def test_pool_metrics_record_hold_time():
+    engine = create_engine("sqlite://")
+    metrics = PoolMetrics("test").attach(engine)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        assert metrics.checked_out == 1
+    snapshot = metrics.snapshot()
+    assert snapshot["checked_out"] == 0
+    assert snapshot["checkouts"] == 1
+    assert snapshot["hold_ms"]["max"] is not None
+
+def test_session_released_before_response_is_serialized():
+    engine = create_engine("sqlite://")
+    metrics = PoolMetrics("test").attach(engine)
+    connections_out = []
+
+    class Item(BaseModel):
+        name: str
+
+    class TrackedItem:
+        @property
+        def name(self):
+            # Runs during response serialization
+            connections_out.append(metrics.checked_out)
+            return "x"
+
+    def session_dependency():
+        with Session(engine) as session:
+            yield session
+
+    router = APIRouter(route_class=SessionReleasingRoute)
+
+    @router.get("/items", response_model=List[Item])
+    def items(session: Session = Depends(session_dependency)):
+        session.exec(text("SELECT 1"))
+        return [TrackedItem()]
+
+    test_app = FastAPI()
+    test_app.include_router(router)
+    assert TestClient(test_app).get("/items").json() == [{"name": "x"}]
+    assert connections_out == [0]
+
+def test_monthly_partitions_are_created_ahead():
+    from datetime import date
+    from unittest.mock import Mock
+    from db.partitions import ensure_monthly_partitions
+
+    session = Mock()
+    # reviews_y2026m11 already exists, the rest don't
+    session.exec.return_value.scalar.side_effect = [None, "reviews_y2026m11", None, None]
+
+    created = ensure_monthly_partitions(session, "reviews", months_ahead=3, today=date(2026, 10, 19))
+
+    assert created == ["reviews_y2026m10", "reviews_y2026m12", "reviews_y2027m01"]
+    ddl = [str(call.args[0]) for call in session.exec.call_args_list if "CREATE" in str(call.args[0])]
+    assert ddl[-1] == (
+        "CREATE TABLE IF NOT EXISTS reviews_y2027m01 PARTITION OF reviews "
+        "FOR VALUES FROM ('2027-01-01') TO ('2027-02-01')"
+    )
+    session.commit.assert_called_once()
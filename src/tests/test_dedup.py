@@ -0,0 +1,42 @@
+from unittest.mock import Mock
+import numpy as np
+import uuid
+from books.dedup import Fingerprint, jaccard
+from config import Config
+
+HOBBIT = ("The Hobbit", "J. R. R. Tolkien", "George Allen & Unwin")
+
+def test_near_duplicates_share_a_bucket():
+    original = Fingerprint.of(*HOBBIT)
+    variant = Fingerprint.of("The Hobbit.", "J.R.R. Tolkien", "George Allen and Unwin")
+    other = Fingerprint.of("Dune", "Frank Herbert", "Chilton Books")
+
+    assert jaccard(original.shingles, variant.shingles) >= Config.DUPLICATE_BOOKS_THRESHOLD
+    assert set(original.buckets) & set(variant.buckets)
+    assert not set(original.buckets) & set(other.buckets)
+    # Casing and accents are normalised away before hashing
+    assert Fingerprint.of("THE HOBBIT", "J. R. R. Tolkién", "George Allen & Unwin").buckets == original.buckets
+
+def test_batch_hashing_matches_one_at_a_time():
+    books = [HOBBIT, ("Dune", "Frank Herbert", "Chilton Books"), ("It", "S. King", "Viking")]
+
+    batch = Fingerprint.many(books)
+
+    for book, fingerprint in zip(books, batch):
+        assert np.array_equal(fingerprint.signature, Fingerprint.of(*book).signature)
+
+def test_duplicate_is_rejected_when_configured(client, mock_session, monkeypatch):
+    existing_uid = uuid.uuid4()
+    mock_session.exec.return_value.all.return_value = [
+        Mock(uid=existing_uid, title=HOBBIT[0], author=HOBBIT[1], publisher=HOBBIT[2])
+    ]
+    monkeypatch.setattr(Config, "DUPLICATE_BOOKS_ACTION", "reject")
+
+    response = client.post("/api/v1/books/", json={
+        "title": "The Hobbit", "author": "J.R.R. Tolkien", "publisher": "George Allen & Unwin",
+        "published_date": "1937-09-21", "page_count": 310, "language": "English"
+    })
+
+    assert response.status_code == 409
+    assert response.json()["duplicate_of"] == str(existing_uid)
+    mock_session.add.assert_not_called()
@@ -0,0 +1,51 @@
+from unittest.mock import Mock
+from datetime import datetime
+import uuid
+import fakeredis
+import pytest
+import leaderboards
+
+@pytest.fixture
+def redis(monkeypatch):
+    server = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(leaderboards, "get_sync_redis", lambda: server)
+    monkeypatch.setattr(leaderboards.Config, "LEADERBOARD_PRIOR_WEIGHT", 2)
+    return server
+
+def test_top_rated_uses_bayesian_average(redis):
+    now = datetime.now()
+    # One perfect review must not beat a long run of good ones
+    leaderboards.review_added("lucky", 5, now)
+    for _ in range(20):
+        leaderboards.review_added("solid", 5, now)
+        leaderboards.review_added("meh", 2, now)
+
+    ranking = [book for book, _ in leaderboards.top_rated(10)]
+    assert ranking == ["solid", "lucky", "meh"]
+
+def test_removed_reviews_leave_the_boards(redis):
+    now = datetime.now()
+    leaderboards.review_added("gone", 4, now)
+    leaderboards.review_added("kept", 3, now)
+    leaderboards.review_removed("gone", 4, now)
+
+    assert [book for book, _ in leaderboards.top_rated(10)] == ["kept"]
+    assert leaderboards.trending("24h", 10) == [("kept", 1.0)]
+
+def test_trending_counts_recent_reviews(redis):
+    now = datetime.now()
+    for _ in range(3):
+        leaderboards.review_added("hot", 4, now)
+    leaderboards.review_added("warm", 4, now)
+
+    assert leaderboards.trending("7d", 10) == [("hot", 3.0), ("warm", 1.0)]
+
+def test_top_endpoint_returns_ranked_books(client, mock_session, monkeypatch):
+    book_uid = uuid.uuid4()
+    monkeypatch.setattr(leaderboards, "top_rated", lambda limit: [(str(book_uid), 4.5)])
+    mock_session.exec.return_value = [Mock(uid=book_uid, title="Dune", author="Frank Herbert")]
+
+    response = client.get("/api/v1/books/top")
+
+    assert response.status_code == 200
+    assert response.json() == [{"uid": str(book_uid), "title": "Dune", "author": "Frank Herbert", "score": 4.5}]
@@ -0,0 +1,55 @@
+from fastapi import status
+import lifespan
+from lifespan import lifecycle
+from config import Config
+
+async def healthy():
+    return True
+
+async def unhealthy():
+    return False
+
+def test_readiness_follows_dependency_checks(client, monkeypatch):
+    monkeypatch.setattr(lifespan, "check_database", healthy)
+    monkeypatch.setattr(lifespan, "check_redis", unhealthy)
+    monkeypatch.setattr(lifespan, "prime_compiled_queries", lambda: None)
+    monkeypatch.setattr(lifespan, "rebuild_index", lambda: None)
+    monkeypatch.setattr(Config, "READINESS_RECHECK_SECONDS", 0)
+    lifecycle.ready = False
+
+    response = client.get("/health/ready")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json()["checks"] == {"database": True, "redis": False}
+
+    monkeypatch.setattr(lifespan, "check_redis", healthy)
+    response = client.get("/health/ready")
+    assert response.status_code == status.HTTP_200_OK
+
+def test_readiness_rechecks_are_throttled(client, monkeypatch):
+    calls = []
+    async def counting():
+        calls.append(1)
+        return False
+    monkeypatch.setattr(lifespan, "check_database", counting)
+    monkeypatch.setattr(lifespan, "check_redis", unhealthy)
+    monkeypatch.setattr(Config, "READINESS_RECHECK_SECONDS", 60)
+    lifecycle.ready = False
+    lifecycle.last_check = float("-inf")
+
+    for _ in range(5):
+        assert client.get("/health/ready").status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    # Only the first probe in the interval ran the checks
+    assert len(calls) == 1
+
+def test_draining_rejects_new_requests_but_stays_alive(client, mock_session):
+    mock_session.exec.return_value.all.return_value = []
+    lifecycle.draining = True
+    try:
+        response = client.get("/api/v1/books/")
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.json()["error_code"] == "SHUTTING_DOWN"
+
+        assert client.get("/health/live").status_code == status.HTTP_200_OK
+        assert client.get("/health/ready").status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    finally:
+        lifecycle.draining = False
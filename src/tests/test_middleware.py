@@ -0,0 +1,112 @@
+from fastapi import FastAPI, Depends
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from datetime import datetime, date
+import gzip
+import uuid
+from compression import CompressionMiddleware, negotiate_encoding, no_compression
+from access_log import AccessLogMiddleware, JsonFormatter, access_log, should_log
+import json
+
+def make_books(count: int):
+    return [
+        {
+            "uid": uuid.uuid4(),
+            "title": f"Mock Book {i}",
+            "author": "Author One",
+            "publisher": "Publisher One",
+            "published_date": date.today(),
+            "page_count": 200,
+            "language": "English",
+            "created_at": datetime.now(),
+            "updated_at": datetime.now()
+        }
+        for i in range(count)
+    ]
+
+def test_negotiate_encoding():
+    assert negotiate_encoding("gzip") == "gzip"
+    assert negotiate_encoding("gzip, br, zstd") == "zstd"
+    assert negotiate_encoding("gzip;q=1.0, br;q=0.5") == "gzip"
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip;q=0") is None
+
+def test_large_book_list_is_compressed(client, mock_session):
+    mock_session.exec.return_value.all.return_value = make_books(50)
+
+    response = client.get("/api/v1/books/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert len(response.json()) == 50
+
+def test_small_response_is_not_compressed(client, mock_session):
+    mock_session.exec.return_value.all.return_value = make_books(1)
+
+    response = client.get("/api/v1/books/", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    # A larger list would be compressed, so caches must still key on Accept-Encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+
+    response = client.get("/api/v1/books/")
+    assert response.headers["vary"] == "Accept-Encoding"
+
+def test_streamed_response_compressed_and_route_opt_out():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    def chunks():
+        for i in range(20):
+            yield f'{{"row": {i}, "text": "{"x" * 50}"}}\n'.encode()
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    @app.get("/raw", dependencies=[Depends(no_compression)])
+    def raw():
+        return {"data": "x" * 5000}
+
+    client = TestClient(app)
+    headers = {"Accept-Encoding": "gzip"}
+
+    with client.stream("GET", "/stream", headers=headers) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        body = gzip.decompress(b"".join(response.iter_raw()))
+    assert body == b"".join(chunks())
+
+    response = client.get("/raw", headers=headers)
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
+
+def test_access_log_sampling():
+    # Errors and slow requests are always kept, fast successes only at the sample rate
+    assert should_log(500, 5, sample_rate=0.0, slow_ms=500)
+    assert should_log(404, 5, sample_rate=0.0, slow_ms=500)
+    assert should_log(200, 800, sample_rate=0.0, slow_ms=500)
+    assert not should_log(200, 5, sample_rate=0.0, slow_ms=500)
+    assert should_log(200, 5, sample_rate=1.0, slow_ms=500)
+
+def test_access_log_records_route_template_and_request_id():
+    app = FastAPI()
+    app.add_middleware(AccessLogMiddleware, sample_rate=1.0)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        return {"item_id": item_id}
+
+    while not access_log.queue.empty():
+        access_log.queue.get_nowait()
+
+    response = TestClient(app).get("/items/7", headers={"X-Request-ID": "abc123"})
+    assert response.headers["x-request-id"] == "abc123"
+    assert "x-process-time" in response.headers
+
+    entry = json.loads(JsonFormatter().format(access_log.queue.get_nowait()))
+    assert entry["request_id"] == "abc123"
+    assert entry["route"] == "/items/{item_id}"
+    assert entry["path"] == "/items/7"
+    assert entry["status"] == 200
@@ -0,0 +1,93 @@
+from unittest.mock import MagicMock
+from datetime import datetime
+import uuid
+import outbox
+import celery_tasks
+from db.models import OutboxMessage
+
+def make_message(attempts: int = 0):
+    return OutboxMessage(
+        uid=uuid.uuid4(),
+        task_name="send_email_task",
+        payload={"email": "a@b.com", "link": "http://x"},
+        dedup_key=f"verify-email:{uuid.uuid4()}",
+        status="pending",
+        attempts=attempts,
+        available_at=datetime.now()
+    )
+
+def run_dispatch(monkeypatch, messages, send_task, producer_or_acquire=None):
+    session = MagicMock()
+    session.__enter__.return_value = session
+    session.exec.return_value.all.return_value = messages
+    monkeypatch.setattr(outbox, "Session", lambda engine: session)
+    monkeypatch.setattr(celery_tasks.c_celery, "producer_or_acquire", producer_or_acquire or MagicMock())
+    monkeypatch.setattr(celery_tasks.c_celery, "send_task", send_task)
+    return outbox.dispatch_pending(), session
+
+def test_dispatch_marks_published_messages(monkeypatch):
+    message = make_message()
+    send_task = MagicMock()
+
+    handled, session = run_dispatch(monkeypatch, [message], send_task)
+
+    assert handled == 1
+    assert message.status == "dispatched"
+    # The outbox uid doubles as the Celery task id so the worker can drop duplicates
+    assert send_task.call_args.kwargs["task_id"] == str(message.uid)
+    assert session.commit.called
+
+def test_dispatch_failure_keeps_message_for_retry(monkeypatch):
+    message = make_message()
+    before = message.available_at
+
+    run_dispatch(monkeypatch, [message], MagicMock(side_effect=ConnectionError("broker down")))
+
+    assert message.status == "pending"
+    assert message.attempts == 1
+    assert message.available_at > before
+    assert "broker down" in message.last_error
+
+def test_dispatch_gives_up_after_max_attempts(monkeypatch):
+    message = make_message(attempts=outbox.Config.OUTBOX_MAX_ATTEMPTS - 1)
+
+    run_dispatch(monkeypatch, [message], MagicMock(side_effect=ConnectionError("broker down")))
+
+    assert message.status == "failed"
+
+def test_dispatch_backs_off_the_whole_batch_without_a_broker_connection(monkeypatch):
+    messages = [make_message(), make_message(attempts=outbox.Config.OUTBOX_MAX_ATTEMPTS - 1)]
+    before = messages[0].available_at
+    send_task = MagicMock()
+
+    handled, session = run_dispatch(
+        monkeypatch, messages, send_task, producer_or_acquire=MagicMock(side_effect=ConnectionError("broker down"))
+    )
+
+    assert handled == 2
+    send_task.assert_not_called()
+    assert messages[0].status == "pending" and messages[0].attempts == 1
+    assert messages[0].available_at > before
+    assert messages[1].status == "failed"
+    assert session.commit.called
+
+def test_tasks_are_routed_to_their_queues():
+    router = celery_tasks.c_celery.amqp.router
+
+    assert router.route({}, "send_email_task")["queue"].name == "email"
+    assert router.route({}, "refresh_similar_books")["queue"].name == "batch"
+    assert celery_tasks.c_celery.conf.task_ignore_result
+
+def test_task_runs_are_recorded(monkeypatch):
+    from task_metrics import summarize
+    recorded = MagicMock()
+    monkeypatch.setattr(celery_tasks, "record_task", recorded)
+    task = MagicMock(request=MagicMock(delivery_info={"routing_key": "email"}))
+    task.name = "send_email_task"
+
+    celery_tasks.start_task_timer(task_id="t1")
+    celery_tasks.record_task_run(task_id="t1", task=task, state="FAILURE")
+
+    _, name, queue, seconds = recorded.call_args.args
+    assert (name, queue, recorded.call_args.kwargs["failed"]) == ("send_email_task", "email", True)
+    assert summarize({"runs": "3", "failures": "1"}, ["5.0", "1.0", "3.0"])["duration_ms"] == {"p50": 3.0, "p95": 5.0, "max": 5.0}
@@ -0,0 +1,46 @@
+import asyncio
+import uuid
+from reviews.stream import ReviewBroadcaster, review_broadcaster, review_events, format_event
+
+def test_dispatch_reaches_only_that_books_watchers():
+    async def scenario():
+        broadcaster = ReviewBroadcaster()
+        first, second = broadcaster.subscribe("book-a"), broadcaster.subscribe("book-a")
+        other = broadcaster.subscribe("book-b")
+        broadcaster.dispatch("book-a", '{"rating": 5}')
+        return first.queue.qsize(), second.queue.qsize(), other.queue.qsize()
+
+    assert asyncio.run(scenario()) == (1, 1, 0)
+
+def test_slow_client_is_dropped(monkeypatch):
+    monkeypatch.setattr("reviews.stream.Config.REVIEW_STREAM_QUEUE_SIZE", 2)
+
+    async def scenario():
+        broadcaster = ReviewBroadcaster()
+        slow = broadcaster.subscribe("book-a")
+        for i in range(3):
+            broadcaster.dispatch("book-a", str(i))
+        # The backlog is thrown away and the stream told to end
+        return slow.closed, await slow.queue.get()
+
+    assert asyncio.run(scenario()) == (True, None)
+
+def test_stream_yields_sse_events_and_unsubscribes():
+    async def scenario():
+        events = review_events("book-a")
+        retry = await events.__anext__()
+        review_broadcaster.dispatch("book-a", '{"rating": 4}')
+        event = await events.__anext__()
+        await events.aclose()
+        return retry, event, review_broadcaster.count
+
+    retry, event, open_streams = asyncio.run(scenario())
+    assert retry.startswith("retry: ")
+    assert event == format_event('{"rating": 4}') == 'event: review\ndata: {"rating": 4}\n\n'
+    assert open_streams == 0
+
+def test_stream_refused_when_worker_is_full(client, monkeypatch):
+    monkeypatch.setattr("reviews.stream.Config.REVIEW_STREAM_MAX_CLIENTS", 0)
+    response = client.get(f"/api/v1/books/{uuid.uuid4()}/reviews/stream")
+    assert response.status_code == 503
+    assert response.json()["error_code"] == "STREAM_CAPACITY_REACHED"
@@ -0,0 +1,31 @@
+import importlib.util
+from pathlib import Path
+
+CONF_PATH = Path(__file__).resolve().parents[2] / "gunicorn.conf.py"
+
+def load_conf():
+    spec = importlib.util.spec_from_file_location("gunicorn_conf", CONF_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def test_workers_follow_cpus_and_profile(monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    conf = load_conf()
+
+    assert conf.worker_count(conf.PROFILES["production"], cpus=8) == 8
+    assert conf.worker_count(conf.PROFILES["production"], cpus=1) == 2
+    assert conf.worker_count(conf.PROFILES["development"], cpus=8) == 1
+
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    assert conf.worker_count(conf.PROFILES["production"], cpus=8) == 3
+
+def test_production_profile_preloads_and_recycles(monkeypatch):
+    monkeypatch.setenv("APP_ENV", "production")
+    monkeypatch.delenv("MAX_REQUESTS", raising=False)
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    conf = load_conf()
+
+    assert conf.preload_app is True
+    assert conf.max_requests > 0 and conf.max_requests_jitter > 0
+    assert conf.workers == conf.worker_count(conf.PROFILES["production"], conf.available_cpus())
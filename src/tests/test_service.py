@@ -1,33 +1,125 @@
 from auth.schemas import UserCreate
+from errors import UserAlreadyExists, BookNotFound
+from auth.service import user_by_email
+from books.service import BookService
+from books import service as book_service_module
+from books import purge
+from reviews.service import ReviewService
+from reviews.schemas import ReviewCreateModel
+from reviews import service as review_service_module
+from db.models import User
+from config import Config
+from sqlalchemy import create_engine
+from sqlmodel import Session
 from unittest.mock import Mock
+from datetime import date
+import pytest
+import uuid
 
-def test_create_user_calls_db_add(mock_user_service, mock_session):
+USER_DATA = {
+    "username": "unittest",
+    "email": "unit@test.com",
+    "password": "password123",
+    "first_name": "Unit",
+    "last_name": "Test"
+}
+
+def test_create_user_inserts_in_one_statement(mock_user_service, mock_session):
     # 1. Arrange: Prepare data
-    user_data = {
-        "username": "unittest",
-        "email": "unit@test.com",
-        "password": "password123",
-        "first_name": "Unit",
-        "last_name": "Test"
-    }
-    user_create_model = UserCreate(**user_data)
+    user_create_model = UserCreate(**USER_DATA)
 
     # 2. Mock the behavior
-    # Tell the mock: "When checking if user exists, say No (None)"
-    # This ensures we enter the creation logic
-    mock_user_service.user_exists = Mock(return_value=False)
+    # INSERT ... ON CONFLICT DO NOTHING RETURNING gives back the new row
+    created_user = Mock(email=USER_DATA["email"], uid="7c9e6679-7425-40de-944b-e07fc1f90ae7")
+    mock_session.exec.return_value.scalars.return_value.first.return_value = created_user
 
     # 3. Act: Call the function
-    mock_user_service.create_user(user_create_model)
+    new_user = mock_user_service.create_user(user_create_model)
 
-    # 4. Assert: Check if DB was touched
-    # "Did we try to ADD a new user to the session?"
-    assert mock_session.add.called
-    
-    # "Did we try to COMMIT the session?"
-    assert mock_session.commit.called
-    
-    # "Did we try to REFRESH the user?"
-    assert mock_session.refresh.called
+    # 4. Assert: user INSERT + outbox INSERT in one transaction, no existence check
+    assert new_user is created_user
+    user_insert, outbox_insert = [call.args[0] for call in mock_session.exec.call_args_list]
+    assert user_insert.table.name == "users"
+    assert "ON CONFLICT DO NOTHING" in str(user_insert)
+    assert outbox_insert.table.name == "outbox"
+    assert mock_session.commit.call_count == 1
     
-    print("Service Logic Verified: DB Add/Commit called successfully.")
\ No newline at end of file
+    print("Service Logic Verified: user + outbox INSERT, single COMMIT.")
+
+def test_create_user_conflict_raises_user_already_exists(mock_user_service, mock_session):
+    # ON CONFLICT DO NOTHING returns no row when the email or username is taken
+    mock_session.exec.return_value.scalars.return_value.first.return_value = None
+
+    with pytest.raises(UserAlreadyExists):
+        mock_user_service.create_user(UserCreate(**USER_DATA))
+
+    assert not mock_session.commit.called
+
+def test_cached_lookup_binds_each_calls_value():
+    # The lambda statement is compiled once; each call must still get its own parameter
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    with Session(engine) as session:
+        for name in ("ann", "bob"):
+            session.add(User(username=name, email=f"{name}@example.com", first_name=name, last_name="X", password_hash="x"))
+        session.commit()
+
+        assert session.exec(user_by_email("ann@example.com")).scalars().first().username == "ann"
+        assert session.exec(user_by_email("bob@example.com")).scalars().first().username == "bob"
+        assert session.exec(user_by_email("nobody@example.com")).scalars().first() is None
+
+def test_delete_book_marks_it_and_queues_the_purge(mock_session, monkeypatch):
+    monkeypatch.setattr(book_service_module.leaderboards, "book_removed", Mock())
+    monkeypatch.setattr(book_service_module.autocomplete, "book_deleted", Mock())
+    mock_session.exec.return_value.first.return_value = Mock(
+        uid=uuid.uuid4(), language="English", publisher="P", author="A", published_date=date(2000, 1, 1), page_count=10
+    )
+    book_uid = str(uuid.uuid4())
+
+    assert BookService().delete_book(book_uid, mock_session) is True
+
+    # Nothing is deleted from books or reviews in the request: one UPDATE, then the outbox row
+    statements = [call.args[0] for call in mock_session.exec.call_args_list]
+    assert str(statements[0]).startswith("UPDATE books SET deleted_at")
+    assert not any(getattr(getattr(s, "table", None), "name", None) in ("books", "reviews") and s.is_delete for s in statements)
+    outbox_insert = statements[-1]
+    assert outbox_insert.table.name == "outbox"
+    assert outbox_insert.compile().params["task_name"] == "purge_book"
+    assert mock_session.commit.call_count == 1
+
+def test_purge_deletes_reviews_in_batches(monkeypatch):
+    monkeypatch.setattr(Config, "BOOK_PURGE_BATCH_SIZE", 2)
+    monkeypatch.setattr(Config, "BOOK_PURGE_PAUSE_SECONDS", 0)
+    batches = iter([2, 2, 1])
+    monkeypatch.setattr(purge, "delete_review_batch", lambda session, book_uid: next(batches))
+    monkeypatch.setattr(purge, "refresh_book_details", Mock())
+
+    session = Mock()
+    session.__enter__ = Mock(return_value=session)
+    session.__exit__ = Mock(return_value=False)
+    monkeypatch.setattr(purge, "Session", lambda engine: session)
+    session.exec.return_value.first.return_value = Mock(deleted_at="2026-10-19")
+    session.exec.return_value.all.return_value = []
+
+    removed = purge.purge_book(str(uuid.uuid4()))
+
+    # Three short transactions for the reviews, one for the stragglers and the book
+    assert removed == 5
+    assert session.commit.call_count == 4
+
+def test_review_on_a_deleted_book_is_not_found(mock_session, monkeypatch):
+    review_added = Mock()
+    monkeypatch.setattr(review_service_module.leaderboards, "review_added", review_added)
+    # INSERT ... SELECT found no live book, so nothing came back
+    mock_session.exec.return_value.scalars.return_value.first.return_value = None
+
+    with pytest.raises(BookNotFound):
+        ReviewService().add_review_to_book(
+            str(uuid.uuid4()), str(uuid.uuid4()), ReviewCreateModel(rating=5, review_text="Gone"), mock_session
+        )
+
+    statement = mock_session.exec.call_args.args[0]
+    assert "books.deleted_at IS NULL" in str(statement)
+    # The book stays off the leaderboards book_removed cleared
+    review_added.assert_not_called()
+    mock_session.commit.assert_not_called()
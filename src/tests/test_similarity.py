@@ -0,0 +1,54 @@
+from unittest.mock import Mock
+import uuid
+from books.similarity import build_matrix, normalize_columns, top_k_similar, affected_columns
+
+# alice and bob both read A and B; carol read B and C; dave only read D
+PAIRS = [
+    ("alice", "A"), ("alice", "B"),
+    ("bob", "A"), ("bob", "B"), ("bob", "B"),  # duplicate review counts once
+    ("carol", "B"), ("carol", "C"),
+    ("dave", "D"),
+]
+
+def similar(book: str, k: int = 10):
+    matrix, books = build_matrix(PAIRS)
+    column = books.index(book)
+    [(_, neighbours)] = top_k_similar(normalize_columns(matrix), [column], k=k, batch_size=2)
+    return [(books[other], round(score, 3)) for other, score in neighbours]
+
+def test_cosine_neighbours_are_ranked():
+    # A and B share 2 readers: 2 / (sqrt(2) * sqrt(3))
+    assert similar("A") == [("B", 0.816)]
+    assert similar("B") == [("A", 0.816), ("C", 0.577)]
+    assert similar("B", k=1) == [("A", 0.816)]
+    assert similar("D") == []
+
+def test_incremental_targets_cover_co_readers():
+    matrix, books = build_matrix(PAIRS)
+    affected = {books[i] for i in affected_columns(matrix, [books.index("C")])}
+    assert affected == {"B", "C"}
+
+def test_similar_endpoint_serves_stored_neighbours(client, mock_session):
+    book_uid, other_uid = uuid.uuid4(), uuid.uuid4()
+    mock_session.get.return_value = Mock(similar=[{"uid": str(other_uid), "score": 0.5}])
+    # The book itself (still live), then its neighbours
+    mock_session.exec.side_effect = [
+        Mock(first=Mock(return_value=book_uid)),
+        [Mock(uid=other_uid, title="Dune", author="Frank Herbert")],
+    ]
+
+    response = client.get(f"/api/v1/books/{book_uid}/similar")
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {"uid": str(other_uid), "title": "Dune", "author": "Frank Herbert", "score": 0.5}
+    ]
+
+def test_similar_endpoint_is_404_for_a_deleted_book(client, mock_session):
+    mock_session.get.return_value = Mock(similar=[{"uid": str(uuid.uuid4()), "score": 0.5}])
+    mock_session.exec.return_value.first.return_value = None
+
+    response = client.get(f"/api/v1/books/{uuid.uuid4()}/similar")
+
+    assert response.status_code == 404
+    assert "books.deleted_at IS NULL" in str(mock_session.exec.call_args.args[0])
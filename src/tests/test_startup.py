@@ -0,0 +1,30 @@
+import os
+from startup_report import measure_imports, parse_importtime
+
+# Generous on purpose: this guards against regressions, not machine speed
+IMPORT_BUDGET_MS = int(os.environ.get("IMPORT_TIME_BUDGET_MS", 3000))
+
+# Subsystems that must only be initialised on first use
+LAZY_MODULES = {"celery", "fastapi_mail", "passlib.context", "redis.asyncio", "numpy"}
+
+def test_parse_importtime():
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       454 |      13576 |     psycopg2\n"
+        "import time:      4061 |      96964 |   db.main\n"
+        "import time:     21406 |    1468484 | main\n"
+    )
+
+    timings = parse_importtime(output)
+
+    assert [(t.module, t.depth) for t in timings] == [("psycopg2", 2), ("db.main", 1), ("main", 0)]
+    assert timings[-1].cumulative_us == 1468484
+
+def test_app_import_stays_lazy_and_within_budget():
+    timings = measure_imports("main")
+    imported = {t.module for t in timings}
+
+    assert not LAZY_MODULES & imported
+
+    total_us = next(t.cumulative_us for t in timings if t.module == "main")
+    assert total_us / 1000 < IMPORT_BUDGET_MS
@@ -0,0 +1,75 @@
+import json
+import pytest
+import tracing
+
+# OpenTelemetry is optional (see tracing.py)
+pytest.importorskip("opentelemetry.sdk")
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry import trace
+
+@pytest.fixture
+def spans(monkeypatch):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(tracing, "enabled", True)
+    monkeypatch.setattr(tracing, "tracer", provider.get_tracer("test"))
+    return exporter
+
+def test_traced_class_gets_a_span_per_public_method(spans):
+    @tracing.traced
+    class Service:
+        def lookup(self):
+            return self._helper()
+
+        def _helper(self):
+            return 42
+
+    assert Service().lookup() == 42
+    assert [s.name for s in spans.get_finished_spans()] == ["Service.lookup"]
+
+def test_trace_context_survives_the_outbox(spans):
+    with tracing.span("request") as request_span:
+        carrier = tracing.current_context()
+    # Stored as JSON in the outbox row, then restored by the dispatcher
+    carrier = json.loads(json.dumps(carrier))
+
+    with tracing.attached(carrier):
+        restored = trace.get_current_span().get_span_context()
+    assert restored.trace_id == request_span.get_span_context().trace_id
+
+def test_tracing_off_is_a_no_op():
+    class Service:
+        def lookup(self):
+            return 1
+
+    assert tracing.traced(Service) is Service
+    assert tracing.current_context() is None
+    with tracing.attached(None), tracing.span("nothing"):
+        pass
+
+def test_app_is_instrumented_by_the_lifespan_not_at_import(monkeypatch):
+    from contextlib import asynccontextmanager
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from opentelemetry.instrumentation.asgi import OpenTelemetryMiddleware
+    import main
+
+    assert not getattr(main.app, "_is_instrumented_by_opentelemetry", False)
+
+    monkeypatch.setattr(tracing, "enabled", True)
+    monkeypatch.setattr(tracing, "_installed", True)  # skip the process-wide provider and instrumentors
+
+    @asynccontextmanager
+    async def lifespan(app):
+        tracing.setup_tracing(app)
+        yield
+
+    app = FastAPI(lifespan=lifespan)
+    app.get("/ping")(lambda: "pong")
+    with TestClient(app) as client:
+        assert client.get("/ping").json() == "pong"
+        # The stack built before the lifespan ran was replaced by one with the tracing middleware
+        assert isinstance(app.middleware_stack.app, OpenTelemetryMiddleware)
@@ -0,0 +1,54 @@
+from sqlalchemy.dialects import postgresql
+import asyncio
+import fakeredis
+import pytest
+import db.redis
+from books.views import ViewCounter, upsert_view_counts, PENDING_KEY
+
+@pytest.fixture
+def redis(monkeypatch):
+    server = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(db.redis, "get_redis", lambda: server)
+    return server
+
+def test_flush_pushes_counts_to_redis(redis):
+    counter = ViewCounter()
+    for _ in range(3):
+        counter.record("a")
+    counter.record("b")
+
+    assert asyncio.run(counter.flush()) == 2
+    assert asyncio.run(redis.hgetall(PENDING_KEY)) == {"a": "3", "b": "1"}
+    assert counter.drain() == {}
+
+def test_failed_flush_keeps_counts(monkeypatch):
+    def unreachable():
+        raise ConnectionError("redis down")
+    monkeypatch.setattr(db.redis, "get_redis", unreachable)
+
+    counter = ViewCounter()
+    counter.record("a")
+    assert asyncio.run(counter.flush()) == 0
+    counter.record("a")
+    assert counter.drain() == {"a": 2}
+
+def test_buffer_is_bounded(monkeypatch):
+    monkeypatch.setattr("books.views.Config.VIEW_COUNTS_MAX_BUFFERED", 2)
+    counter = ViewCounter()
+    for uid in ["a", "b", "c", "a"]:
+        counter.record(uid)
+    # Known books keep counting, new ones are dropped once the buffer is full
+    assert counter.drain() == {"a": 2, "b": 1}
+
+def test_upsert_is_a_single_statement():
+    class Session:
+        statements = []
+        def exec(self, statement):
+            self.statements.append(statement)
+
+    session = Session()
+    upsert_view_counts(session, {"2f1c9a52-0d7e-4c1e-9d6b-3a4f5e6d7c8b": 4, "8e2d0b1a-7c6f-4e5d-8a9b-1c2d3e4f5a6b": 1})
+    assert len(session.statements) == 1
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (book_uid) DO UPDATE" in sql
+    assert "book_stats.view_count + excluded.view_count" in sql
@@ -0,0 +1,178 @@
+"""
+OpenTelemetry tracing (optional).
+
+With TRACING_ENABLED and the opentelemetry packages installed, a request produces
+one trace: the route (FastAPI), auth steps, service methods, every SQL statement
+and Redis command, and the Celery tasks it queued through the outbox. Sampling is
+head-based: the decision is made once at the start of a trace and inherited by
+every child span, including the ones in the Celery worker.
+
+Without it, every helper here is a no-op and nothing is wrapped.
+"""
+from contextlib import contextmanager, nullcontext
+import functools
+import inspect
+import json
+import logging
+import threading
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# The API is optional, like brotli/zstandard in compression.py
+try:
+    from opentelemetry import trace, context, propagate
+except ImportError:
+    trace = None
+
+enabled = Config.TRACING_ENABLED and trace is not None
+tracer = trace.get_tracer("bookly") if enabled else None
+
+# ==========================================
+# 1. Manual Spans
+# ==========================================
+def span(name: str, **attributes):
+    """`with span("jwt.decode"):` -- a child span of whatever is current, or nothing."""
+    if not enabled:
+        return nullcontext()
+    return tracer.start_as_current_span(name, attributes=attributes or None)
+
+def traced(cls):
+    """
+    Class decorator: one span per public method, named `BookService.get_book`.
+    Leaves the class untouched when tracing is off, so it costs nothing then.
+    """
+    if not enabled:
+        return cls
+    for name, method in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(method):
+            continue
+        setattr(cls, name, _wrap(method, f"{cls.__name__}.{name}"))
+    return cls
+
+def _wrap(method, span_name: str):
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(span_name):
+                return await method(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with tracer.start_as_current_span(span_name):
+            return method(*args, **kwargs)
+    return wrapper
+
+# ==========================================
+# 2. Carrying a Trace Across the Outbox
+# ==========================================
+def current_context():
+    """The active trace as W3C headers ({"traceparent": ...}), or None if there's nothing to carry."""
+    if not enabled:
+        return None
+    carrier = {}
+    propagate.inject(carrier)
+    return carrier or None
+
+@contextmanager
+def attached(carrier):
+    """Makes a saved trace current again, e.g. while the outbox publishes the job it belongs to."""
+    if not enabled or not carrier:
+        yield
+        return
+    token = context.attach(propagate.extract(carrier))
+    try:
+        yield
+    finally:
+        context.detach(token)
+
+# ==========================================
+# 3. Exporters
+# ==========================================
+def build_exporter():
+    kind = Config.TRACING_EXPORTER
+    if kind == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(endpoint=Config.TRACING_OTLP_ENDPOINT)
+    if kind == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        return ConsoleSpanExporter()
+    return JsonLinesSpanExporter(Config.TRACING_FILE_PATH)
+
+class JsonLinesSpanExporter:
+    """
+    One JSON span per line in a local file: a stand-in for a collector in
+    development (`jq` or any OTLP-JSON viewer can read it).
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        from opentelemetry.sdk.trace.export import SpanExportResult
+        lines = "".join(json.dumps(json.loads(s.to_json())) + "\n" for s in spans)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+# ==========================================
+# 4. Setup (web app or Celery worker)
+# ==========================================
+_installed = False
+
+def setup_tracing(app=None):
+    """
+    Installs the tracer provider and instruments SQLAlchemy, Redis and Celery, once
+    per process. Pass the FastAPI app from the lifespan; the worker calls it without one.
+    """
+    global _installed
+    if not enabled:
+        if Config.TRACING_ENABLED:
+            logger.warning("TRACING_ENABLED is set but the opentelemetry packages aren't installed")
+        return
+
+    if app is not None:
+        instrument_app(app)
+    if _installed:
+        return
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+    from opentelemetry.instrumentation.redis import RedisInstrumentor
+    from opentelemetry.instrumentation.celery import CeleryInstrumentor
+    from db.main import engine, replica_router
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": Config.TRACING_SERVICE_NAME}),
+        # Head-based: roots are sampled at TRACING_SAMPLE_RATE, children follow their parent
+        sampler=ParentBased(TraceIdRatioBased(Config.TRACING_SAMPLE_RATE))
+    )
+    # Exports from a background thread (restarted in each forked worker by the SDK)
+    provider.add_span_processor(BatchSpanProcessor(build_exporter()))
+    trace.set_tracer_provider(provider)
+
+    SQLAlchemyInstrumentor().instrument(engines=[engine, *replica_router.engines])
+    RedisInstrumentor().instrument()
+    CeleryInstrumentor().instrument()
+    _installed = True
+
+def instrument_app(app):
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    if getattr(app, "_is_instrumented_by_opentelemetry", False):
+        return
+    # Health probes would be most of the traces and tell us nothing
+    FastAPIInstrumentor.instrument_app(app, excluded_urls="/health/.*")
+    # The lifespan runs inside the middleware stack Starlette already built: rebuild
+    # it (as uninstrument_app does) so the next requests go through the tracing middleware
+    if app.middleware_stack is not None:
+        app.middleware_stack = app.build_middleware_stack()